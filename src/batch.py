@@ -0,0 +1,275 @@
+"""Runs a fleet of configs on a pool of worker processes.
+
+The configs are given as paths or glob patterns, or as a manifest file listing one path per line. Every worker is
+a long-lived process that imports the sim and loads the ephemeris once, then runs config after config. The runs
+are scheduled longest first, from the wall times of the previous batch in the same results directory, so that a
+long run does not start last and hold up the end of the batch. Each run is written to the results directory as
+`<name>.csv`, with its integrator diagnostics in `<name>_integrator.csv` (and its orbital events in
+`<name>_events.csv`), and `manifest.json` records the status (ok, interrupted by an exception in a step, or
+failed), outputs, wall time and throughput of every run. It is rewritten after every run, so an interrupted batch
+still has a manifest of the runs it finished. With `--metrics DIR`, every run also writes its throughput to
+`DIR/<name>.prom` while it steps, for the textfile collector of a node exporter (see core/metrics.py).
+
+Usage:
+    python src/batch.py "configs/*.json" [--manifest list.txt] [--results runs/batch] [--workers 4] [--cache]
+        [--metrics DIR]
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+import glob
+import json
+import os
+from pathlib import Path
+import tempfile
+import time
+from typing import Dict, List, Optional, Sequence
+from core.config import Config
+from core.metrics import SimMetrics
+from core.run_cache import RunCache
+from main import SimRunner
+from utils.astropy_util import get_body_position
+from utils.constants import SIM_ROOT, BodyEnum
+from utils.data_handling import df_to_csv
+
+DEFAULT_PATTERNS = ["configs/*.json"]
+DEFAULT_RESULTS_DIR = SIM_ROOT / "runs" / "batch"
+MANIFEST_NAME = "manifest.json"
+# json files in the configs directory that are not configs
+NOT_CONFIGS = {"schema.json"}
+
+
+@dataclass
+class Job:
+    """A config to run, and the name of its outputs in the results directory."""
+
+    config_path: str
+    name: str
+    # expected wall time (s), from the previous batch
+    estimate: Optional[float] = None
+
+
+@dataclass
+class JobResult:
+    """The outcome of a run, as recorded in the manifest."""
+
+    config_path: str
+    name: str
+    status: str
+    outputs: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    wall_time: float = 0.0
+    steps: int = 0
+    sim_time: float = 0.0
+    steps_per_second: float = 0.0
+    sim_seconds_per_second: float = 0.0
+    worker: int = 0
+
+
+def resolve_configs(patterns: Sequence[str], manifest: Optional[str] = None) -> List[str]:
+    """The config paths matched by `patterns` and listed in `manifest` (one path or pattern per line, # comments),
+    without duplicates, in the order they are given."""
+    patterns = list(patterns)
+    if manifest is not None:
+        with open(manifest, "r") as read_file:
+            lines = [line.split("#", 1)[0].strip() for line in read_file]
+        patterns += [line for line in lines if line]
+
+    paths: List[str] = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for path in matches:
+            if Path(path).name not in NOT_CONFIGS and path not in paths:
+                paths.append(path)
+    return paths
+
+
+def make_jobs(config_paths: Sequence[str], previous: Optional[Dict] = None) -> List[Job]:
+    """One job per config, named after the config file (with a numeric suffix if two share a name), ordered by
+    the wall time their run took in the `previous` manifest, longest first. Runs without a previous wall time go
+    first, as they may be the longest."""
+    wall_times = {run["config_path"]: run["wall_time"] for run in (previous or {}).get("runs", [])}
+    jobs: List[Job] = []
+    names = set()
+    for path in config_paths:
+        name = Path(path).stem
+        suffix = 1
+        while name in names:
+            suffix += 1
+            name = f"{Path(path).stem}_{suffix}"
+        names.add(name)
+        jobs.append(Job(path, name, wall_times.get(path)))
+    return sorted(jobs, key=lambda job: -job.estimate if job.estimate is not None else float("-inf"))
+
+
+def _warm_up() -> None:
+    """Initializer of the workers: loads the ephemeris once, so the first run of every worker does not pay it."""
+    for body in (BodyEnum.Moon, BodyEnum.Sun):
+        get_body_position(int(time.time()), body)
+
+
+def run_job(job: Job, results_dir: str, use_cache: bool = False, metrics_dir: Optional[str] = None) -> JobResult:
+    """Runs the config of `job` and writes its outputs to `results_dir`, and its metrics to `metrics_dir` if given.
+    Failures are recorded, not raised. A run stopped by an exception in a step is recorded as interrupted, with the
+    steps it took up to there."""
+    start = time.perf_counter()
+    result = JobResult(job.config_path, job.name, "ok", worker=os.getpid())
+    try:
+        config = Config.make_config(job.config_path)
+        cache = RunCache() if use_cache else None
+        metrics = None
+        if metrics_dir is not None:
+            metrics = SimMetrics(str(Path(metrics_dir) / f"{job.name}.prom"), labels={"run": job.name})
+        runner = SimRunner(config, shm_name=None, cache=cache, metrics=metrics)
+        run_df = runner.run()
+        if runner.interrupted:
+            result.status = "interrupted"
+            result.error = runner.error
+        df_to_csv(run_df, job.name, results_dir)
+        result.outputs.append(f"{job.name}.csv")
+        if "events" in run_df.attrs:
+            df_to_csv(run_df.attrs["events"], f"{job.name}_events", results_dir)
+            result.outputs.append(f"{job.name}_events.csv")
+        if "integrator" in run_df.attrs:
+            df_to_csv(run_df.attrs["integrator"], f"{job.name}_integrator", results_dir)
+            result.outputs.append(f"{job.name}_integrator.csv")
+        result.steps = len(run_df)
+        if len(run_df):
+            times = run_df["true_state.time"]
+            result.sim_time = float(times.iloc[-1] - config.init_cond.time)
+    except Exception as e:
+        result.status = "failed"
+        result.error = f"{type(e).__name__}: {e}"
+
+    result.wall_time = time.perf_counter() - start
+    if result.wall_time > 0:
+        result.steps_per_second = result.steps / result.wall_time
+        result.sim_seconds_per_second = result.sim_time / result.wall_time
+    return result
+
+
+def write_manifest(results_dir: Path, manifest: Dict) -> None:
+    """Writes the manifest through a temporary file, so a reader never sees a partly written one."""
+    fd, tmp_name = tempfile.mkstemp(dir=results_dir, suffix=".tmp")
+    with os.fdopen(fd, "w") as write_file:
+        json.dump(manifest, write_file, indent=4)
+    os.replace(tmp_name, results_dir / MANIFEST_NAME)
+
+
+def read_manifest(results_dir: Path) -> Optional[Dict]:
+    try:
+        return json.loads((results_dir / MANIFEST_NAME).read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+class Progress:
+    """Aggregate progress of a batch: runs done, elapsed time, ETA and throughput."""
+
+    def __init__(self, jobs: Sequence[Job], workers: int) -> None:
+        self.total = len(jobs)
+        self.workers = workers
+        self.done = 0
+        self.failed = 0
+        self.steps = 0
+        self.start = time.perf_counter()
+        # expected wall time of the runs not finished yet, for those with an estimate
+        self._remaining = {job.config_path: job.estimate for job in jobs}
+
+    def eta(self) -> float:
+        """Seconds until the batch is done: the remaining runs take their estimate, or the mean wall time of the
+        runs done so far, spread over the workers."""
+        elapsed = time.perf_counter() - self.start
+        if self.done == 0:
+            return 0.0
+        mean = elapsed * self.workers / self.done
+        remaining = sum(mean if estimate is None else estimate for estimate in self._remaining.values())
+        return remaining / self.workers
+
+    def update(self, result: JobResult) -> str:
+        """Records a finished run, and returns the progress line to print."""
+        self.done += 1
+        self.failed += result.status != "ok"
+        self.steps += result.steps
+        self._remaining.pop(result.config_path, None)
+        elapsed = time.perf_counter() - self.start
+        eta = self.eta() if self.done < self.total else 0.0
+        if result.status == "ok":
+            detail = f"{result.steps} steps, {result.steps_per_second:.0f} steps/s"
+        else:
+            detail = result.error
+        return (
+            f"[{self.done}/{self.total}] {result.name} {result.status} in {result.wall_time:.1f} s ({detail}) | "
+            f"elapsed {_format_duration(elapsed)}, ETA {_format_duration(eta)}, {self.steps / elapsed:.0f} steps/s overall"
+        )
+
+
+def run_batch(
+    jobs: Sequence[Job],
+    results_dir: Path,
+    workers: Optional[int] = None,
+    use_cache: bool = False,
+    metrics_dir: Optional[str] = None,
+) -> Dict:
+    """Runs `jobs` on a pool of `workers` processes and writes their outputs and the manifest to `results_dir`.
+
+    Args:
+        jobs (Sequence[Job]): the runs, submitted in order
+        results_dir (Path): the directory of the outputs and the manifest
+        workers (Optional[int], optional): number of worker processes. Defaults to the number of CPUs, capped at
+            the number of jobs.
+        use_cache (bool, optional): reuse and store seeded runs in the run cache. Defaults to False.
+        metrics_dir (Optional[str], optional): directory the runs write their metrics to. Defaults to None.
+
+    Returns:
+        Dict: the manifest
+    """
+    results_dir.mkdir(parents=True, exist_ok=True)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    manifest = {"started": time.time(), "workers": workers, "runs": []}
+    progress = Progress(jobs, workers)
+    print(f"Running {len(jobs)} configs on {workers} workers into {results_dir}")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_up) as executor:
+        futures = [executor.submit(run_job, job, str(results_dir), use_cache, metrics_dir) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            manifest["runs"].append(asdict(result))
+            write_manifest(results_dir, manifest)
+            print(progress.update(result))
+
+    manifest["wall_time"] = time.perf_counter() - progress.start
+    manifest["failed"] = progress.failed
+    write_manifest(results_dir, manifest)
+    print(f"Finished {len(jobs)} runs ({progress.failed} failed) in {_format_duration(manifest['wall_time'])}")
+    return manifest
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Run a batch of configs on a pool of worker processes")
+    parser.add_argument("configs", nargs="*", help=f"config paths or glob patterns (default {DEFAULT_PATTERNS[0]})")
+    parser.add_argument("-m", "--manifest", type=str, default=None, help="file listing one config path per line")
+    parser.add_argument("-r", "--results", type=str, default=str(DEFAULT_RESULTS_DIR), help="results directory")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="number of workers (default: CPU count)")
+    parser.add_argument("-c", "--cache", action="store_true", help="reuse and store seeded runs in the run cache")
+    parser.add_argument("--metrics", type=str, default=None, help="directory the runs write their .prom metrics to")
+    args = parser.parse_args(argv)
+
+    patterns = args.configs or ([] if args.manifest else DEFAULT_PATTERNS)
+    config_paths = resolve_configs(patterns, args.manifest)
+    if not config_paths:
+        parser.error("no configs match")
+    results_dir = Path(args.results)
+    jobs = make_jobs(config_paths, read_manifest(results_dir))
+    return run_batch(jobs, results_dir, args.workers, args.cache, args.metrics)
+
+
+if __name__ == "__main__":
+    main()
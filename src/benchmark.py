@@ -0,0 +1,167 @@
+"""Accuracy versus cost of the integration settings.
+
+Every config is propagated for the same span of sim time with each combination of propagator, solve_ivp method,
+tolerance and step length, and compared against a tight tolerance DOP853 reference. The table lists the wall time,
+the number of evaluations of the state update function and the final position error of each combination, and
+marks the combinations on the Pareto front of wall time against error for their config.
+
+Usage:
+    python src/benchmark.py configs/iss.json configs/tli.json [--duration 600] [--steps 0.1 1 10 60]
+        [--methods RK45 DOP853] [--rtols 1e-3 1e-6 1e-9] [--propagators cowell encke] [-o runs/benchmark.csv]
+"""
+
+import argparse
+from dataclasses import dataclass
+from itertools import product
+from pathlib import Path
+import time
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from core.config import Config
+from core.integrator.fast_forward import can_fast_forward
+from core.integrator.integrator import propagate_state
+from core.models.model_list import ModelContainer
+from core.phase import mission_phase
+from core.state.state import POSITION_INDICES
+from core.state.statetime import StateTime
+from utils.constants import IntegratorEnum, PropagatorEnum
+
+# settings of the reference solution
+REFERENCE_SETTINGS = {
+    "phase_settings": {},
+    "propagator": PropagatorEnum.Cowell,
+    "integrator": IntegratorEnum.DOP853,
+    "rtol": 1e-12,
+    "atol": 1e-6,
+    "d_t": 600.0,
+}
+# absolute tolerance (meters) paired with a relative tolerance, positions are ~1e7 m
+ATOL_PER_RTOL = 1e3
+
+
+@dataclass
+class BenchmarkResult:
+    """The final state of a propagation, and what it cost."""
+
+    final: StateTime
+    wall_time: float
+    rhs_evaluations: int
+    steps: int
+
+
+def with_settings(config: Config, settings: Dict) -> Config:
+    """A copy of `config` with its parameters updated by `settings`."""
+    config_dict = config.to_dict()
+    config_dict["parameters"].update({key: getattr(value, "value", value) for key, value in settings.items()})
+    return Config(**config_dict)
+
+
+def propagate(config: Config, duration: float, start_state: Optional[StateTime] = None) -> BenchmarkResult:
+    """Propagates a state for `duration` seconds of sim time, stepping like the sim does, and times it. The last
+    step is shortened to end exactly at the end of the span.
+
+    Args:
+        config (Config): the models and integrator settings
+        duration (float): seconds of sim time to propagate
+        start_state (Optional[StateTime], optional): the state to start from. Defaults to None, the initial
+            condition of the config.
+
+    Returns:
+        BenchmarkResult: the final state and the cost of the propagation
+    """
+    models = ModelContainer(config)
+    param = config.param
+    state_time = config.init_cond if start_state is None else start_state
+    t_end = state_time.time + duration
+
+    steps = 0
+    start = time.perf_counter()
+    while state_time.time < t_end:
+        if param.phase_settings:
+            models.use_phase(mission_phase(state_time))
+        dt = models.d_t
+        if param.propagator == PropagatorEnum.Kepler and can_fast_forward(models, state_time):
+            dt = param.kepler_max_jump
+        state_time = propagate_state(models, state_time, min(dt, t_end - state_time.time))
+        steps += 1
+    wall_time = time.perf_counter() - start
+
+    return BenchmarkResult(state_time, wall_time, models.rhs_evaluations, steps)
+
+
+def position_error(a: StateTime, b: StateTime) -> float:
+    delta = a.state.to_array()[POSITION_INDICES] - b.state.to_array()[POSITION_INDICES]
+    return float(np.linalg.norm(delta.astype(np.float64)))
+
+
+def pareto_front(wall_times: np.ndarray, errors: np.ndarray) -> np.ndarray:
+    """Whether each point is not dominated, i.e. no other point is at least as fast and at least as accurate, and
+    strictly better in one of them."""
+    faster_or_equal = wall_times[np.newaxis, :] <= wall_times[:, np.newaxis]
+    better_or_equal = errors[np.newaxis, :] <= errors[:, np.newaxis]
+    strictly = (wall_times[np.newaxis, :] < wall_times[:, np.newaxis]) | (errors[np.newaxis, :] < errors[:, np.newaxis])
+    return ~np.any(faster_or_equal & better_or_equal & strictly, axis=1)
+
+
+def run_matrix(
+    config_paths: Sequence[str],
+    duration: float,
+    steps: Sequence[float],
+    methods: Sequence[str],
+    rtols: Sequence[float],
+    propagators: Sequence[str],
+) -> pd.DataFrame:
+    """Benchmarks every combination of settings on every config.
+
+    Returns:
+        pd.DataFrame: one row per config and combination of settings
+    """
+    rows: List[Dict] = []
+    for path in config_paths:
+        config = Config.make_config(path)
+        reference = propagate(with_settings(config, REFERENCE_SETTINGS), duration)
+
+        for propagator, method, rtol, d_t in product(propagators, methods, rtols, steps):
+            settings = {"propagator": propagator, "integrator": method, "rtol": rtol, "atol": rtol * ATOL_PER_RTOL, "d_t": d_t}
+            result = propagate(with_settings(config, {**settings, "phase_settings": {}}), duration)
+            rows.append(
+                {
+                    "config": Path(path).stem,
+                    **settings,
+                    "wall_time": result.wall_time,
+                    "rhs_evaluations": result.rhs_evaluations,
+                    "steps": result.steps,
+                    "final_position_error": position_error(result.final, reference.final),
+                }
+            )
+
+    table = pd.DataFrame(rows)
+    table["pareto"] = False
+    for _, group in table.groupby("config"):
+        front = pareto_front(group["wall_time"].to_numpy(), group["final_position_error"].to_numpy())
+        table.loc[group.index, "pareto"] = front
+    return table.sort_values(["config", "wall_time"]).reset_index(drop=True)
+
+
+def main(argv: Optional[List[str]] = None) -> pd.DataFrame:
+    parser = argparse.ArgumentParser(description="Benchmark the accuracy and cost of the integration settings")
+    parser.add_argument("configs", nargs="+", help="paths of the json configs to benchmark")
+    parser.add_argument("--duration", type=float, default=600.0, help="seconds of sim time to propagate (default 600)")
+    parser.add_argument("--steps", type=float, nargs="+", default=[0.1, 1.0, 10.0, 60.0], help="step lengths d_t (s)")
+    parser.add_argument("--methods", nargs="+", default=["RK45", "DOP853"], help="solve_ivp methods")
+    parser.add_argument("--rtols", type=float, nargs="+", default=[1e-3, 1e-6, 1e-9], help="relative tolerances")
+    parser.add_argument("--propagators", nargs="+", default=["cowell", "encke"], help="cowell, encke and/or kepler")
+    parser.add_argument("-o", "--out", type=str, default=None, help="write the table to this CSV file")
+    args = parser.parse_args(argv)
+
+    table = run_matrix(args.configs, args.duration, args.steps, args.methods, args.rtols, args.propagators)
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(table.to_string(index=False, float_format=lambda value: f"{value:.3g}"))
+    if args.out is not None:
+        table.to_csv(args.out, index=False)
+    return table
+
+
+if __name__ == "__main__":
+    main()
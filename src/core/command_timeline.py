@@ -0,0 +1,161 @@
+"""Time-tagged actuator commands, compiled from the `command_timeline` parameter.
+
+Each command is one of
+    {"command": "thrust", "start": t0, "end": t1, "direction": [x, y, z], "force": F}
+    {"command": "electrolysis", "start": t0, "end": t1}
+    {"command": "attitude_pulse", "time": t, "delta_ang_vel": [wx, wy, wz]}
+with times in seconds of sim time (the same clock as the state `time`). The thrust direction is in GCRS and is
+normalized, and the force defaults to the `thruster_force` parameter. The intervals of each kind may not overlap.
+
+The commands are compiled into sorted arrays, so the command active at a time is found by binary search. The
+integrator splits its steps at every command boundary, so the forcing is smooth within each segment and can be
+integrated with long steps, and applies the attitude pulses between segments. While a segment is integrated the
+timeline is held on it (see `CommandTimeline.hold`), so the solver stages at either end of the segment see the
+same commands as the rest of it.
+"""
+
+from contextlib import contextmanager
+import json
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from core.parameters import Parameters
+from core.state.state import ANGULAR_VELOCITY_INDICES
+from utils.constants import CommandEnum
+
+
+def _intervals(commands: Sequence[Dict], kind: CommandEnum) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """The start and end times of the commands of `kind` in time order, and their order in `commands`."""
+    indices = [i for i, command in enumerate(commands) if CommandEnum(command["command"]) == kind]
+    starts = np.array([commands[i]["start"] for i in indices], dtype=np.float64)
+    ends = np.array([commands[i]["end"] for i in indices], dtype=np.float64)
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], ends[order]
+    if np.any(ends < starts):
+        raise ValueError(f"A {kind.value} command ends before it starts")
+    if np.any(starts[1:] < ends[:-1]):
+        raise ValueError(f"The {kind.value} commands overlap")
+    return starts, ends, np.array(indices, dtype=int)[order]
+
+
+def _active(starts: np.ndarray, ends: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """The index of the interval each of `times` is in (intervals include their start but not their end), -1 if
+    none."""
+    index = np.searchsorted(starts, times, side="right") - 1
+    inside = (index >= 0) & (times < ends[np.maximum(index, 0)]) if len(starts) else np.zeros(np.shape(times), bool)
+    return np.where(inside, index, -1)
+
+
+class CommandTimeline:
+    """The commands of a run as sorted arrays.
+
+    Example:
+        timeline = CommandTimeline.from_parameters(config.param)
+        timeline.boundaries(t, t + dt)
+    """
+
+    def __init__(self, commands: Sequence[Dict], thruster_force: float = 0.0, electrolyzer_rate: float = 0.0) -> None:
+        """
+        Args:
+            commands (Sequence[Dict]): the commands, in any order
+            thruster_force (float, optional): thrust (N) of the thrust commands that do not give a force
+            electrolyzer_rate (float, optional): kg/s electrolyzed during the electrolysis commands
+        """
+        commands = list(commands)
+        self.electrolyzer_rate = electrolyzer_rate
+
+        self.thrust_start, self.thrust_end, order = _intervals(commands, CommandEnum.Thrust)
+        # n-by-3 thrust force vectors (N) in GCRS
+        self.thrust_force = np.zeros((len(order), 3))
+        for row, i in enumerate(order):
+            direction = np.asarray(commands[i]["direction"], dtype=np.float64)
+            self.thrust_force[row] = commands[i].get("force", thruster_force) * direction / np.linalg.norm(direction)
+
+        self.electrolysis_start, self.electrolysis_end, _ = _intervals(commands, CommandEnum.Electrolysis)
+
+        pulses = [command for command in commands if CommandEnum(command["command"]) == CommandEnum.AttitudePulse]
+        pulse_times = np.array([pulse["time"] for pulse in pulses], dtype=np.float64)
+        delta_ang_vel = np.array([pulse["delta_ang_vel"] for pulse in pulses], dtype=np.float64).reshape(-1, 3)
+        # pulses at the same time add up
+        self.pulse_times, inverse = np.unique(pulse_times, return_inverse=True)
+        self.pulse_delta_ang_vel = np.zeros((len(self.pulse_times), 3))
+        np.add.at(self.pulse_delta_ang_vel, inverse, delta_ang_vel)
+
+        # the segment the integrator is on, see `hold`
+        self._segment: Optional[Tuple[float, float]] = None
+        self._boundaries = np.unique(
+            np.concatenate(
+                [self.thrust_start, self.thrust_end, self.electrolysis_start, self.electrolysis_end, self.pulse_times]
+            )
+        )
+
+    @classmethod
+    def from_parameters(cls, parameters: Parameters) -> "CommandTimeline":
+        return cls(parameters.command_timeline, parameters.thruster_force, parameters.electolyzer_rate)
+
+    def __bool__(self) -> bool:
+        return len(self._boundaries) > 0
+
+    def boundaries(self, t_start: float, t_end: float) -> np.ndarray:
+        """The times strictly between `t_start` and `t_end` at which a command starts, ends or fires."""
+        lo = np.searchsorted(self._boundaries, t_start, side="right")
+        hi = np.searchsorted(self._boundaries, t_end, side="left")
+        return self._boundaries[lo:hi]
+
+    @contextmanager
+    def hold(self, t_start: float, t_end: float) -> Iterator[None]:
+        """Within the block, the commands at any time of [t_start, t_end] are the ones active in the middle of the
+        segment. The segment must not contain a boundary."""
+        self._segment = (t_start, t_end)
+        try:
+            yield
+        finally:
+            self._segment = None
+
+    def _lookup_times(self, times: np.ndarray) -> np.ndarray:
+        times = np.asarray(times, dtype=np.float64)
+        if self._segment is None:
+            return times
+        t_start, t_end = self._segment
+        return np.where((times >= t_start) & (times <= t_end), (t_start + t_end) / 2, times)
+
+    def thrusting(self, t: float) -> bool:
+        return bool(_active(self.thrust_start, self.thrust_end, self._lookup_times(t)) >= 0)
+
+    def thrust_forces(self, times: np.ndarray) -> np.ndarray:
+        """n-by-3 commanded thrust forces (N) at each of `times`, zero outside the thrust commands."""
+        index = _active(self.thrust_start, self.thrust_end, self._lookup_times(times))
+        forces = np.zeros((len(index), 3))
+        forces[index >= 0] = self.thrust_force[index[index >= 0]]
+        return forces
+
+    def electrolysis_rates(self, times: np.ndarray) -> np.ndarray:
+        """The commanded electrolysis rate (kg/s) at each of `times`."""
+        index = _active(self.electrolysis_start, self.electrolysis_end, self._lookup_times(times))
+        return np.where(index >= 0, self.electrolyzer_rate, 0.0)
+
+    def apply_pulses(self, t: float, state_array: np.ndarray) -> np.ndarray:
+        """A copy of `state_array` with the attitude pulses commanded at exactly time `t` applied, or `state_array`
+        itself if there are none."""
+        i = np.searchsorted(self.pulse_times, t)
+        if i == len(self.pulse_times) or self.pulse_times[i] != t:
+            return state_array
+        state_array = state_array.copy()
+        state_array[ANGULAR_VELOCITY_INDICES] += self.pulse_delta_ang_vel[i]
+        return state_array
+
+
+def _canonical(command: Dict) -> str:
+    return json.dumps(command, sort_keys=True)
+
+
+def _command_time(command: Dict) -> float:
+    return float(command["time"] if CommandEnum(command["command"]) == CommandEnum.AttitudePulse else command["start"])
+
+
+def first_difference(commands: Sequence[Dict], other_commands: Sequence[Dict]) -> float:
+    """The earliest time at which two command timelines differ, inf if they are the same."""
+    keys = {_canonical(command) for command in commands}
+    other_keys = {_canonical(command) for command in other_commands}
+    differing: List[Dict] = [command for command in commands if _canonical(command) not in other_keys]
+    differing += [command for command in other_commands if _canonical(command) not in keys]
+    return min((_command_time(command) for command in differing), default=float("inf"))
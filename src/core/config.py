@@ -1,7 +1,9 @@
 """Configurations of parameters, initial conditions, and default models for a given simulation."""
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 import json
+from enum import Enum
+import numpy as np
 from utils.log import log
 from jsonschema import Draft3Validator, ValidationError
 from utils.constants import ModelEnum
@@ -18,6 +20,16 @@ class JsonError(Exception):
     pass
 
 
+def _to_builtin(value):
+    """Converts numpy scalars (which can end up in the state after propagation) and string enums into
+    built-in python types."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
 class Config:
     """Representation of the parameters and initial conditions of the simulation.
     This module depends on parameters.py, models.py, and state.py.
@@ -31,6 +43,7 @@ class Config:
         parameters: Dict,
         initial_condition: Dict,
         models: List[ModelEnum] = [ModelEnum.AttitudeModel, ModelEnum.PositionModel],
+        initial_covariance: Optional[Dict] = None,
     ):
 
         self.param = Parameters(param_dict=parameters)
@@ -39,8 +52,11 @@ class Config:
         # convert string list to model list
         model_objs = []
         for model in models:
-            model_objs.append(model)
+            model_objs.append(ModelEnum(model))
         self.models = model_objs  # models is a list of the names of the models that are used in a sim
+
+        # uncertainty of the initial condition, used by the unscented propagation mode (see core/unscented.py)
+        self.init_cov = initial_covariance
         self._frozen = True
 
     def __setattr__(self, __name, __value) -> None:
@@ -53,6 +69,19 @@ class Config:
             raise MutationException("Cannot mutate config.")
         object.__delattr__(self, __name)
 
+    def to_dict(self) -> Dict:
+        """The inverse of `make_config`: a json-compatible dictionary that recreates this config with
+        `Config(**config.to_dict())`. Every field is written out, including the defaults."""
+        initial_condition = {"time": self.init_cond.time, **self.init_cond.state.__dict__}
+        config_dict = {
+            "parameters": {key: _to_builtin(value) for key, value in self.param.__dict__.items()},
+            "initial_condition": {key: _to_builtin(value) for key, value in initial_condition.items()},
+            "models": [ModelEnum(model).value for model in self.models],
+        }
+        if self.init_cov is not None:
+            config_dict["initial_covariance"] = self.init_cov
+        return config_dict
+
     @classmethod
     def make_config(cls, path_str: str):
         """make_config creates a config object from json file in the proposed location.
@@ -93,6 +122,13 @@ class Config:
             except TypeError:
                 pass  # there is no "gyro_noise" in the json
 
+            json_init_cov = data.get("initial_covariance", None)
+            if json_init_cov is not None:  # validate the covariance matrix is square and matches its fields
+                n_fields = len(json_init_cov["fields"])
+                matrix = json_init_cov["matrix"]
+                if len(matrix) != n_fields or any(len(row) != n_fields for row in matrix):
+                    raise JsonError("initial_covariance matrix does not match its fields.")
+
             json_params = data.get("parameters", {})
             if json_params == {}:
                 log.warning("Parameters are not specified")
@@ -107,4 +143,4 @@ class Config:
             for model_str in json_models:
                 actual_models.append(ModelEnum(model_str))
 
-        return cls(json_params, json_init_cond, actual_models)
+        return cls(json_params, json_init_cond, actual_models, json_init_cov)
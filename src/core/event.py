@@ -1,8 +1,30 @@
-from typing import Tuple
+from dataclasses import replace
+from typing import Sequence, Tuple
+import numpy as np
 from core.integrator.integrator import propagate_state
 from core.models.model_list import ModelContainer
-from core.state.state import State, ObservedState
+from core.state.state import ANGULAR_VELOCITY_INDICES, State, ObservedState, array_to_state
 from core.state.statetime import StateTime
+from utils.constants import D_T
+
+
+def observe(model_container: ModelContainer, state_time: StateTime) -> ObservedState:
+    """Evaluates the sensor models on a true state.
+
+    Args:
+        model_container (ModelContainer): models of the sim
+        state_time (StateTime): the true state
+
+    Returns:
+        ObservedState: the state as the sensors report it
+    """
+    temp_state = State()
+    for sensor_model in model_container.sensor:
+        temp_state.update(sensor_model.evaluate(state_time))
+
+    observed_state = ObservedState()
+    observed_state.init_from_state(temp_state)
+    return observed_state
 
 
 class Event:
@@ -26,8 +48,9 @@ class Event:
 class NormalEvent(Event):
     """Representation of a normal event"""
 
-    def __init__(self, model_container: ModelContainer):
+    def __init__(self, model_container: ModelContainer, dt: float = D_T):
         super().__init__(model_container)
+        self.dt = dt
 
     def evaluate(self, state_time: StateTime) -> Tuple[StateTime, ObservedState]:
         """Evaluates all the models for this event
@@ -39,26 +62,29 @@ class NormalEvent(Event):
             Tuple[StateTime, ObservedState]: The propagated statetime and observed state
         """
         # Evaluate Actuator models to update state
+        if self.model_container.actuator:
+            # actuate a copy, the state of the previous step is part of that step's output
+            state_time = StateTime(replace(state_time.state), state_time.time)
         for actuator_model in self.model_container.actuator:
             state_time.update(actuator_model.evaluate(state_time))
 
         # Evaluate environmental models to propagate state
-        new_state_time: StateTime = propagate_state(self.model_container, state_time)
-
-        # Evaluate sensor models
-        temp_state = State()
-        for sensor_model in self.model_container.sensor:
-            temp_state.update(sensor_model.evaluate(new_state_time))
-        
-        observed_state = ObservedState()
-        observed_state.init_from_state(temp_state)
+        new_state_time: StateTime = propagate_state(self.model_container, state_time, self.dt)
 
-        return new_state_time, observed_state
+        return new_state_time, observe(self.model_container, new_state_time)
 
 
 class AttitudeFiringEvent(Event):
-    def __init__(self, model_container: ModelContainer):
-        self.model_container = model_container
+    def __init__(self, model_container: ModelContainer, delta_ang_vel: Sequence[float] = (0.0, 0.0, 0.0)):
+        """
+        Args:
+            model_container (ModelContainer): models of the sim
+            delta_ang_vel (Sequence[float], optional): change of the angular velocity (rad/s) from the firing.
+                The `attitude_pulse` commands of the `command_timeline` parameter are applied the same way by the
+                integrator.
+        """
+        super().__init__(model_container)
+        self.delta_ang_vel = np.asarray(delta_ang_vel, dtype=np.float64)
 
     def evaluate(self, state_time: StateTime) -> Tuple[StateTime, ObservedState]:
         """Performs attitude firing event. This is currently simplified as an instantaneous modification of the attitude state variables.
@@ -69,4 +95,7 @@ class AttitudeFiringEvent(Event):
         Returns:
             Tuple[StateTime, ObservedState]: The propagated statetime and observed state
         """
-        ...
+        state_array = state_time.state.to_array().astype(np.float64)
+        state_array[ANGULAR_VELOCITY_INDICES] += self.delta_ang_vel
+        new_state_time = StateTime(array_to_state(state_array), state_time.time)
+        return new_state_time, observe(self.model_container, new_state_time)
@@ -0,0 +1,344 @@
+"""Hardware-in-the-loop lockstep with an external flight software process.
+
+After every step the sim sends the observed state to the flight software and waits (up to a timeout) for the
+command of that step, which the actuator models apply from the next step on. Both messages carry the step's
+sequence number, so a late command is recognized and discarded rather than applied to the wrong step. On a
+timeout the actuators hold the previous command.
+
+The messages travel over a TCP or UNIX socket (the sim listens, the flight software connects) or over a shared
+memory segment created by the sim ("shm://name"), in which every message slot is preceded by a u32 counter that
+the writer bumps once the message is in place. The sim does not wait for the flight software to attach to a shared
+memory segment, the steps before it does time out.
+
+Message format (all little endian):
+    observation, sim to flight software: magic b"CLHL", version (u8), sequence number (u32), time (f64),
+        value count (u16), then `count` float64 values of the observed state in `STATE_ARRAY_ORDER`
+    command, flight software to sim: magic b"CLHL", version (u8), sequence number (u32), propulsion_on (bool),
+        solenoid_actuation_on (bool), electrolysis_duration (f64)
+"""
+
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+import os
+import socket
+import struct
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from core.state.command import ActuatorCommand
+from core.state.state import ObservedState, STATE_ARRAY_ORDER
+from core.state.statetime import PropagatedOutput
+from core.telemetry import parse_address
+from utils.log import log
+
+HIL_VERSION = 1
+HIL_MAGIC = b"CLHL"
+# seconds the sim waits for the command of a step
+DEFAULT_HIL_TIMEOUT = 0.05
+# seconds the sim waits for the flight software to connect
+DEFAULT_CONNECT_TIMEOUT = 30.0
+# fraction of a step period the round trip should stay under
+RTT_BUDGET = 0.1
+
+OBSERVATION_HEADER = struct.Struct("<4sBIdH")
+OBSERVATION_SIZE = OBSERVATION_HEADER.size + 8 * len(STATE_ARRAY_ORDER)
+COMMAND = struct.Struct("<4sBI??d")
+_COUNTER = struct.Struct("<I")
+
+
+def encode_observation(seq: int, time: float, observed_state: ObservedState) -> bytes:
+    values = np.ascontiguousarray(observed_state.to_array(), dtype="<f8")
+    return OBSERVATION_HEADER.pack(HIL_MAGIC, HIL_VERSION, seq, time, len(values)) + values.tobytes()
+
+
+def decode_observation(message: bytes) -> Tuple[int, float, np.ndarray]:
+    magic, version, seq, time, count = OBSERVATION_HEADER.unpack_from(message)
+    _check(magic, version)
+    return seq, time, np.frombuffer(message, dtype="<f8", count=count, offset=OBSERVATION_HEADER.size)
+
+
+def encode_command(seq: int, command: ActuatorCommand) -> bytes:
+    return COMMAND.pack(
+        HIL_MAGIC,
+        HIL_VERSION,
+        seq,
+        command.propulsion_on,
+        command.solenoid_actuation_on,
+        command.electrolysis_duration,
+    )
+
+
+def decode_command(message: bytes) -> Tuple[int, ActuatorCommand]:
+    magic, version, seq, propulsion_on, solenoid_actuation_on, electrolysis_duration = COMMAND.unpack(message)
+    _check(magic, version)
+    return seq, ActuatorCommand(propulsion_on, solenoid_actuation_on, electrolysis_duration)
+
+
+def _check(magic: bytes, version: int) -> None:
+    if magic != HIL_MAGIC or version != HIL_VERSION:
+        raise ValueError(f"Unexpected HIL message with magic {magic!r} and version {version}")
+
+
+class _SocketChannel:
+    """Fixed size messages over a connected socket."""
+
+    def __init__(self, sock: socket.socket) -> None:
+        self._sock = sock
+        self._buffer = bytearray()
+
+    def write(self, message: bytes) -> None:
+        self._sock.sendall(message)
+
+    def read(self, size: int, timeout: Optional[float]) -> Optional[bytes]:
+        """The next message of `size` bytes, or None if it does not arrive within `timeout` seconds. A partially
+        received message is kept for the next read."""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while len(self._buffer) < size:
+            if deadline is not None:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return None
+                self._sock.settimeout(remaining)
+            try:
+                chunk = self._sock.recv(max(size - len(self._buffer), 4096))
+            except socket.timeout:
+                return None
+            if not chunk:
+                raise ConnectionError("The HIL peer closed the connection")
+            self._buffer += chunk
+        message = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return message
+
+
+class _SharedMemoryChannel:
+    """One message slot in a shared memory segment, preceded by a counter that is bumped after every write."""
+
+    def __init__(self, buf: memoryview, offset: int, size: int) -> None:
+        self._buf = buf
+        self._offset = offset
+        # the segment starts zeroed, so a reader that attaches late still picks up the latest message
+        self._read = 0
+
+    @staticmethod
+    def segment_size(*sizes: int) -> int:
+        return sum(_COUNTER.size + size for size in sizes)
+
+    def _counter(self) -> int:
+        return _COUNTER.unpack_from(self._buf, self._offset)[0]
+
+    def write(self, message: bytes) -> None:
+        start = self._offset + _COUNTER.size
+        self._buf[start : start + len(message)] = message
+        _COUNTER.pack_into(self._buf, self._offset, (self._counter() + 1) & 0xFFFFFFFF)
+
+    def read(self, size: int, timeout: Optional[float]) -> Optional[bytes]:
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while self._counter() == self._read:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            time.sleep(0)
+        self._read = self._counter()
+        start = self._offset + _COUNTER.size
+        return bytes(self._buf[start : start + size])
+
+
+def _split_address(address: str) -> Tuple[str, str, Optional[int]]:
+    if address.startswith("shm://"):
+        return "shm", address[len("shm://") :], None
+    return parse_address(address)
+
+
+@dataclass
+class LockstepStats:
+    """Round trip times (in seconds) of the answered steps, and the number of missed commands."""
+
+    round_trips: List[float] = field(default_factory=list)
+    # sim seconds of the step of each round trip, NaN where it is not known
+    step_sizes: List[float] = field(default_factory=list)
+    timeouts: int = 0
+    # commands that arrived after their step timed out
+    stale: int = 0
+
+    def summary(self) -> Dict[str, float]:
+        rtt = np.array(self.round_trips)
+        summary = {"steps": len(rtt) + self.timeouts, "timeouts": self.timeouts, "stale": self.stale}
+        if len(rtt):
+            summary.update(
+                {
+                    "rtt_mean": float(rtt.mean()),
+                    "rtt_p50": float(np.percentile(rtt, 50)),
+                    "rtt_p99": float(np.percentile(rtt, 99)),
+                    "rtt_max": float(rtt.max()),
+                }
+            )
+            # the round trips as a fraction of their step, to compare with RTT_BUDGET
+            fractions = rtt / np.array(self.step_sizes)
+            fractions = fractions[np.isfinite(fractions)]
+            if len(fractions):
+                summary["rtt_step_p99"] = float(np.percentile(fractions, 99))
+        return summary
+
+
+class Lockstep:
+    """The sim side of the lockstep protocol.
+
+    Example:
+        lockstep = Lockstep("unix:///tmp/cislunarsim-hil.sock")
+        lockstep.open()  # waits for the flight software to connect
+        while sim.should_run:
+            command = lockstep.exchange(sim.step())
+            if command is not None:
+                sim.apply_command(command)
+        lockstep.close()
+    """
+
+    def __init__(
+        self,
+        address: str,
+        timeout: float = DEFAULT_HIL_TIMEOUT,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    ) -> None:
+        """
+        Args:
+            address (str): tcp://host:port, unix:///path/to/socket or shm://name
+            timeout (float, optional): seconds to wait for the command of each step. Defaults to DEFAULT_HIL_TIMEOUT.
+            connect_timeout (float, optional): seconds to wait for the flight software to connect to a socket.
+                Defaults to DEFAULT_CONNECT_TIMEOUT.
+        """
+        self.address = address
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.stats = LockstepStats()
+        self._scheme, self._host, self._port = _split_address(address)
+        self._seq = 0
+        self._last_time: Optional[float] = None
+        self._sockets: List[socket.socket] = []
+        # whether this instance bound the path of a unix:// address, and so removes it on close
+        self._bound_path = False
+        self._shm: Optional[shared_memory.SharedMemory] = None
+
+    def open(self) -> None:
+        if self._scheme == "shm":
+            self._shm = shared_memory.SharedMemory(
+                name=self._host, create=True, size=_SharedMemoryChannel.segment_size(OBSERVATION_SIZE, COMMAND.size)
+            )
+            self._shm.buf[:] = bytes(self._shm.size)
+            self._out = _SharedMemoryChannel(self._shm.buf, 0, OBSERVATION_SIZE)
+            self._in = _SharedMemoryChannel(self._shm.buf, _COUNTER.size + OBSERVATION_SIZE, COMMAND.size)
+            return
+
+        # closed by `close` even if binding fails
+        if self._scheme == "unix":
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sockets.append(listener)
+            listener.bind(self._host)
+            self._bound_path = True
+        else:
+            listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._sockets.append(listener)
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listener.bind((self._host, self._port))
+            self._port = listener.getsockname()[1]
+            self.address = f"tcp://{self._host}:{self._port}"
+        listener.listen(1)
+        listener.settimeout(self.connect_timeout)
+        log.info(f"Waiting for the flight software to connect to {self.address}")
+
+        try:
+            connection, _ = listener.accept()
+        except socket.timeout:
+            raise TimeoutError(f"The flight software did not connect to {self.address}")
+        if self._scheme == "tcp":
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sockets.append(connection)
+        self._out = self._in = _SocketChannel(connection)
+
+    def exchange(self, output: PropagatedOutput, step_size: Optional[float] = None) -> Optional[ActuatorCommand]:
+        """Sends the observed state of a step and waits for its command.
+
+        Args:
+            output (PropagatedOutput): the output of the step
+            step_size (Optional[float], optional): sim seconds of the step, whose round trip should stay under
+                RTT_BUDGET of it. Defaults to None, the time since the output of the previous exchange.
+
+        Returns:
+            Optional[ActuatorCommand]: the command of the step, or None if it did not arrive in time
+        """
+        seq = self._seq
+        self._seq = (self._seq + 1) & 0xFFFFFFFF
+        if step_size is None:
+            step_size = output.true_state.time - self._last_time if self._last_time is not None else np.nan
+        self._last_time = output.true_state.time
+
+        start = time.perf_counter()
+        deadline = start + self.timeout
+        self._out.write(encode_observation(seq, output.true_state.time, output.observed_state))
+        while True:
+            message = self._in.read(COMMAND.size, deadline - time.perf_counter())
+            if message is None:
+                self.stats.timeouts += 1
+                log.debug(f"No command for step {seq} within {self.timeout}s, holding the previous command")
+                return None
+            command_seq, command = decode_command(message)
+            if command_seq == seq:
+                self.stats.round_trips.append(time.perf_counter() - start)
+                self.stats.step_sizes.append(step_size)
+                return command
+            self.stats.stale += 1
+
+    def close(self) -> None:
+        """Closes the connection and logs the round trip statistics."""
+        for sock in self._sockets:
+            sock.close()
+        self._sockets = []
+        # the path may belong to another process listening on it
+        if self._bound_path and os.path.exists(self._host):
+            os.remove(self._host)
+        self._bound_path = False
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+        summary = self.stats.summary()
+        log.info(f"HIL lockstep: {summary}")
+        if summary.get("rtt_step_p99", 0.0) > RTT_BUDGET:
+            log.warning(
+                f"HIL round trips (p99 {summary['rtt_step_p99']:.0%} of their step) exceed {RTT_BUDGET:.0%} of a step"
+            )
+
+
+class HilClient:
+    """The flight software side of the lockstep protocol, for test harnesses written in python."""
+
+    def __init__(self, address: str) -> None:
+        self._scheme, host, port = _split_address(address)
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        if self._scheme == "shm":
+            self._shm = shared_memory.SharedMemory(name=host)
+            self._in = _SharedMemoryChannel(self._shm.buf, 0, OBSERVATION_SIZE)
+            self._out = _SharedMemoryChannel(self._shm.buf, _COUNTER.size + OBSERVATION_SIZE, COMMAND.size)
+            return
+
+        if self._scheme == "unix":
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.connect(host)
+        else:
+            self._sock = socket.create_connection((host, port))
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._in = self._out = _SocketChannel(self._sock)
+
+    def receive_observation(self, timeout: Optional[float] = None) -> Optional[Tuple[int, float, np.ndarray]]:
+        """The (sequence number, time, observed state array) of the next step, None on a timeout."""
+        message = self._in.read(OBSERVATION_SIZE, timeout)
+        return None if message is None else decode_observation(message)
+
+    def send_command(self, seq: int, command: ActuatorCommand) -> None:
+        self._out.write(encode_command(seq, command))
+
+    def close(self) -> None:
+        if self._shm is not None:
+            self._shm.close()
+        else:
+            self._sock.close()
@@ -0,0 +1,216 @@
+"""Bookkeeping of the work solve_ivp does, one row per integrated segment.
+
+The solution of `solve_ivp` has the number of evaluations of the derivative (`nfev`), its status and message, and,
+when no output times are requested, the time of every step it accepted, but not the steps it rejected. For the
+explicit Runge-Kutta methods they follow from the evaluation count: the solver evaluates the derivative twice
+before its first step (at the start, and to select the initial step size) and `n_stages` times per attempted step,
+plus, for DOP853, 3 times for the dense output of each step in which an event is located. The implicit methods
+also evaluate the derivative for their Jacobians, so their rejections are not counted.
+
+Each segment is kept as a row of a structured array (about 60 bytes), so a run of millions of steps keeps its
+diagnostics: the segment start and end, nfev, status, the accepted and rejected steps and the smallest, mean and
+largest step size. The smallest step leaves out the first step of the segment, whose size the solver guesses
+before any error estimate (often far too small), and its last step, which is cut short to end on the segment end;
+it is NaN for a segment of two steps or fewer. A segment whose smallest step is below `STEP_SHRINK_RATIO` times the
+median of the smallest steps of the `STEP_SHRINK_WINDOW` segments before it is flagged as an alert, and a warning is logged where a stretch of such
+segments begins: that is where the dynamics got hard for the integrator.
+"""
+
+from collections import deque
+from typing import Deque, Dict, Optional
+import numpy as np
+import pandas as pd
+from scipy.integrate._ivp.ivp import OdeResult
+from utils.constants import IntegratorEnum
+from utils.log import log
+
+# evaluations per attempted step, and per step with a located event, of the explicit Runge-Kutta methods
+RK_EVALUATIONS = {IntegratorEnum.RK23: (3, 0), IntegratorEnum.RK45: (6, 0), IntegratorEnum.DOP853: (12, 3)}
+
+# a segment whose smallest step is below this fraction of the recent median raises an alert
+STEP_SHRINK_RATIO = 1e-2
+# number of recent segments whose smallest steps the median is taken over
+STEP_SHRINK_WINDOW = 100
+
+DIAGNOSTICS_DTYPE = np.dtype(
+    [
+        ("t_start", np.float64),
+        ("t_end", np.float64),
+        ("nfev", np.int32),
+        ("status", np.int8),
+        ("accepted", np.int32),
+        # -1 for the methods whose rejections are not counted
+        ("rejected", np.int32),
+        ("h_min", np.float64),
+        ("h_mean", np.float64),
+        ("h_max", np.float64),
+        ("alert", np.bool_),
+    ]
+)
+
+
+def event_steps(solution: OdeResult) -> int:
+    """The number of accepted steps of `solution` in which it located an event. Events located in the same step
+    share its dense output."""
+    if solution.t_events is None:
+        return 0
+    times = np.concatenate([np.ravel(event_times) for event_times in solution.t_events])
+    if not len(times):
+        return 0
+    # the step (t[i], t[i + 1]] each event is in
+    steps = np.searchsorted(solution.t, times, side="left") - 1
+    return len(np.unique(np.clip(steps, 0, None)))
+
+
+def rejected_steps(method: str, nfev: int, accepted: int, event_steps: int = 0) -> Optional[int]:
+    """The number of steps a solve_ivp call rejected, None for the methods whose rejections are not counted.
+
+    Args:
+        method (str): the solve_ivp method
+        nfev (int): the `nfev` of the solution
+        accepted (int): the number of steps it accepted
+        event_steps (int, optional): the number of accepted steps in which it located events. Defaults to 0.
+    """
+    try:
+        per_step, per_event = RK_EVALUATIONS[IntegratorEnum(method)]
+    except (KeyError, ValueError):
+        return None
+    attempts = (nfev - 2 - per_event * event_steps) // per_step
+    return max(attempts - accepted, 0)
+
+
+class IntegratorDiagnostics:
+    """The diagnostics of every solve_ivp call of a run.
+
+    Example:
+        solution = solve_ivp(f, (t, t + dt), y, **models.solver_options)
+        models.diagnostics.record(solution, models.solver_options["method"])
+        ...
+        models.diagnostics.log_summary()
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self._rows = np.zeros(capacity, dtype=DIAGNOSTICS_DTYPE)
+        self._count = 0
+        # the message of the segments that failed, by row
+        self.messages: Dict[int, str] = {}
+        # totals over all the segments
+        self.accepted_steps = 0
+        self.rejected_steps = 0
+        self._recent_h_min: Deque[float] = deque(maxlen=STEP_SHRINK_WINDOW)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def rows(self) -> np.ndarray:
+        """The rows of the segments so far, a structured array of `DIAGNOSTICS_DTYPE`."""
+        return self._rows[: self._count]
+
+    def record(self, solution: OdeResult, method: str) -> None:
+        """Adds the segment integrated by a solve_ivp call with `method`."""
+        steps = np.diff(solution.t)
+        accepted = len(steps)
+        rejected = rejected_steps(method, solution.nfev, accepted, event_steps(solution))
+
+        alert = False
+        h_min = h_mean = h_max = np.nan
+        if accepted:
+            h_mean, h_max = float(steps.mean()), float(steps.max())
+        if accepted > 2:
+            # the size of the first step is a guess, and the last step is cut short to end on the segment end
+            h_min = float(steps[1:-1].min())
+            if self._recent_h_min:
+                reference = float(np.median(self._recent_h_min))
+                alert = h_min < STEP_SHRINK_RATIO * reference
+                if alert and not (self._count and self._rows[self._count - 1]["alert"]):
+                    log.warning(
+                        f"Integrator steps shrank to {h_min:.3g} s at t={solution.t[0]} "
+                        f"(recent median smallest step {reference:.3g} s)"
+                    )
+            self._recent_h_min.append(h_min)
+        if solution.status < 0:
+            log.warning(f"Integration failed at t={solution.t[-1]}: {solution.message}")
+            self.messages[self._count] = solution.message
+
+        rejected_count = -1 if rejected is None else rejected
+        self._append(
+            (solution.t[0], solution.t[-1], solution.nfev, solution.status, accepted, rejected_count, h_min, h_mean,
+             h_max, alert)
+        )
+        self.accepted_steps += accepted
+        self.rejected_steps += rejected or 0
+
+    def _append(self, row: tuple) -> None:
+        if self._count == len(self._rows):
+            self._rows = np.resize(self._rows, 2 * len(self._rows))
+        self._rows[self._count] = row
+        self._count += 1
+
+    def to_df(self) -> pd.DataFrame:
+        """The diagnostics table of the run, with the message of the failed segments."""
+        table = pd.DataFrame(self.rows)
+        table["message"] = pd.Series(self.messages, index=table.index, dtype=object).fillna("")
+        return table
+
+    def extend_from_df(self, table: pd.DataFrame, end_time: float = float("inf")) -> None:
+        """Adds the segments of a diagnostics table (of `to_df`) that end by `end_time`, e.g. of the reused
+        steps of a cached run."""
+        table = table[table["t_end"] <= end_time]
+        for row in table.to_dict("records"):
+            if row["message"]:
+                self.messages[self._count] = row["message"]
+            self._append(tuple(row[name] for name in DIAGNOSTICS_DTYPE.names))
+            self.accepted_steps += int(row["accepted"])
+            self.rejected_steps += max(int(row["rejected"]), 0)
+            if row["accepted"] > 2:
+                self._recent_h_min.append(float(row["h_min"]))
+
+    def summary(self) -> Dict[str, float]:
+        rows = self.rows
+        summary = {
+            "segments": len(rows),
+            "nfev": int(rows["nfev"].sum()),
+            "accepted": self.accepted_steps,
+            "rejected": self.rejected_steps,
+            "failed": len(self.messages),
+            "alerts": int(rows["alert"].sum()),
+        }
+        stepped = rows[rows["accepted"] > 0]
+        if len(stepped):
+            summary.update(
+                {
+                    "nfev_per_step": summary["nfev"] / max(self.accepted_steps, 1),
+                    "h_median": float(np.median(stepped["h_mean"])),
+                    "h_max": float(stepped["h_max"].max()),
+                }
+            )
+        h_min = rows["h_min"][~np.isnan(rows["h_min"])]
+        if len(h_min):
+            summary["h_min"] = float(h_min.min())
+        if summary["alerts"]:
+            summary["first_alert"] = float(rows["t_start"][rows["alert"]][0])
+        return summary
+
+    def log_summary(self) -> None:
+        summary = self.summary()
+        if not summary["segments"]:
+            return
+        message = (
+            f"Integrator: {summary['segments']} segments, {summary['accepted']} steps, {summary['rejected']} "
+            f"rejected, {summary['nfev']} evaluations"
+        )
+        if "h_max" in summary:
+            message += (
+                f" ({summary['nfev_per_step']:.1f} per step), median segment mean step {summary['h_median']:.3g} s, "
+                f"largest {summary['h_max']:.3g} s"
+            )
+        if "h_min" in summary:
+            message += f", smallest {summary['h_min']:.3g} s"
+        if summary["failed"] or summary["alerts"]:
+            log.warning(
+                f"{message}, {summary['failed']} failed segments, {summary['alerts']} segments with shrunken steps"
+                + (f" from t={summary['first_alert']}" if "first_alert" in summary else "")
+            )
+        else:
+            log.info(message)
@@ -0,0 +1,104 @@
+"""Encke's method: propagates an osculating two-body reference orbit around the Earth analytically and only
+integrates the (small) deviation of the craft from it. Because the deviation changes much more slowly than the
+full Earth-dominated acceleration, the solver can take much larger steps than it can with Cowell's method.
+"""
+
+import numpy as np
+from scipy.integrate import solve_ivp
+from core.integrator.orbital_events import EventFunction, event_functions, to_event
+from core.models.model_list import ModelContainer, PositionDynamics
+from core.state.state import POSITION_INDICES, VELOCITY_INDICES, array_to_state
+from core.state.statetime import StateTime
+from utils.constants import mu_earth
+from utils.kepler import kepler_propagate
+
+
+def propagate_encke(models: ModelContainer, state_time: StateTime, dt: float) -> StateTime:
+    """Propagates a state over a timestep of `dt` seconds with Encke's method.
+    The reference orbit is rectified (re-osculated to the true state) whenever the deviation grows beyond
+    `rectify_tol` times the distance to the Earth.
+
+    Args:
+        models (ModelContainer): models used to evaluate the full state derivative
+        state_time (StateTime): the initial state, which is also the first osculating reference
+        dt (float): length of the timestep
+
+    Returns:
+        StateTime: the propagated state at t+dt
+    """
+    update_function = models.state_update_function
+    rectify_tol = models.parameters.rectify_tol
+
+    t = state_time.time
+    t_end = t + dt
+    state_array = state_time.state.to_array().astype(np.float64)
+    functions = event_functions(models.parameters.orbital_events, t, t_end)
+
+    while t < t_end:
+        # osculating reference orbit at the current time
+        t_ref = t
+        r_ref = state_array[POSITION_INDICES]
+        v_ref = state_array[VELOCITY_INDICES]
+
+        def reference(t: float):
+            return kepler_propagate(r_ref, v_ref, t - t_ref)
+
+        def full_state(t: float, deviation_array: np.ndarray) -> np.ndarray:
+            rho, nu = reference(t)
+            full_array = deviation_array.copy()
+            full_array[POSITION_INDICES] += rho
+            full_array[VELOCITY_INDICES] += nu
+            return full_array
+
+        def deviation_update_function(t: float, deviation_array: np.ndarray) -> np.ndarray:
+            rho, nu = reference(t)
+            full_array = deviation_array.copy()
+            full_array[POSITION_INDICES] += rho
+            full_array[VELOCITY_INDICES] += nu
+
+            d_state = update_function(t, full_array)
+            # the reference orbit accounts for the reference velocity and the two-body acceleration
+            d_state[POSITION_INDICES] -= nu
+            d_state[VELOCITY_INDICES] += mu_earth * rho / np.dot(rho, rho) ** (3 / 2)
+            return d_state
+
+        def rectify(t: float, deviation_array: np.ndarray) -> float:
+            rho, _ = reference(t)
+            deviation = deviation_array[POSITION_INDICES]
+            return rectify_tol * np.sqrt(np.dot(rho, rho)) - np.sqrt(np.dot(deviation, deviation))
+
+        rectify.terminal = True  # type: ignore
+        rectify.direction = -1  # type: ignore
+
+        deviation_array = state_array.copy()
+        deviation_array[POSITION_INDICES] = 0.0
+        deviation_array[VELOCITY_INDICES] = 0.0
+        # the event functions are defined on the full state
+        deviation_functions = [
+            EventFunction(lambda t, d, g=function.g: g(t, full_state(t, d)), function.direction, function.kind, function.body)
+            for function in functions
+        ]
+        solution = solve_ivp(
+            deviation_update_function,
+            (t, t_end),
+            deviation_array,
+            events=[rectify] + deviation_functions,
+            **models.solver_options,
+        )
+        models.diagnostics.record(solution, models.solver_options["method"])
+        for function, times, deviations in zip(functions, solution.t_events[1:], solution.y_events[1:]):
+            models.detected_events.extend(to_event(function, t, full_state(t, d)) for t, d in zip(times, deviations))
+
+        # rebuild the full state at the end of this arc
+        t = solution.t[-1]
+        rho, nu = reference(t)
+        state_array = solution.y[:, -1].copy()
+        state_array[POSITION_INDICES] += rho
+        state_array[VELOCITY_INDICES] += nu
+
+    return StateTime(array_to_state(state_array), t)
+
+
+def uses_encke(models: ModelContainer) -> bool:
+    """Encke's method only makes sense when the position dynamics are being propagated."""
+    return any(isinstance(model, PositionDynamics) for model in models.environmental)
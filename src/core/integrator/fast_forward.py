@@ -0,0 +1,73 @@
+"""Analytic fast-forward of coast arcs. When the Moon and Sun accelerations are negligible compared to the
+Earth's gravity, the position and velocity are jumped along the two-body orbit with the universal variable
+Kepler solver instead of being integrated numerically.
+"""
+
+from typing import Optional
+import numpy as np
+from scipy.integrate import solve_ivp
+from core.integrator.orbital_events import event_functions, kepler_events
+from core.models.model_list import ModelContainer, PositionDynamics, build_state_update_function
+from core.state.state import POSITION_INDICES, VELOCITY_INDICES, array_to_state
+from core.state.statetime import StateTime
+from utils.kepler import kepler_propagate
+
+
+def _position_model(models: ModelContainer) -> Optional[PositionDynamics]:
+    for model in models.environmental:
+        if isinstance(model, PositionDynamics):
+            return model
+    return None
+
+
+def can_fast_forward(models: ModelContainer, state_time: StateTime) -> bool:
+    """Whether the third body perturbations at `state_time` are below `kepler_tol`."""
+    position_model = _position_model(models)
+    if position_model is None:
+        return False
+    return position_model.perturbation_ratio(state_time) <= models.parameters.kepler_tol
+
+
+def kepler_jump(models: ModelContainer, state_time: StateTime, dt: float) -> Optional[StateTime]:
+    """Jumps the position and velocity `dt` seconds along the two-body orbit around the Earth.
+    Any other environment models (e.g. attitude) are still integrated numerically over the jump.
+
+    Args:
+        models (ModelContainer): the models of the sim
+        state_time (StateTime): the state at the start of the jump
+        dt (float): length of the jump
+
+    Returns:
+        Optional[StateTime]: the state at t+dt, or None if the perturbations are too large at either end of
+            the jump or the thrusters are firing, in which case the caller should integrate numerically instead.
+    """
+    thrusting = models.timeline.thrusting(state_time.time) or state_time.state.force_propulsion_thrusters
+    if thrusting or not can_fast_forward(models, state_time):
+        return None
+
+    t = state_time.time
+    start_array = state_time.state.to_array().astype(np.float64)
+    r, v = kepler_propagate(start_array[POSITION_INDICES], start_array[VELOCITY_INDICES], dt)
+
+    # the perturbations at the end of the jump only depend on the position, so the jump is checked before the
+    # other models are integrated over it
+    state_array = start_array.copy()
+    state_array[POSITION_INDICES] = r
+    state_array[VELOCITY_INDICES] = v
+    if not can_fast_forward(models, StateTime(array_to_state(state_array), t + dt)):
+        return None
+
+    other_models = [model for model in models.environmental if not isinstance(model, PositionDynamics)]
+    if other_models:
+        solution = solve_ivp(
+            build_state_update_function(other_models), (t, t + dt), start_array, **models.solver_options
+        )
+        models.diagnostics.record(solution, models.solver_options["method"])
+        state_array = solution.y[:, -1]
+        state_array[POSITION_INDICES] = r
+        state_array[VELOCITY_INDICES] = v
+
+    jumped_state_time = StateTime(array_to_state(state_array), t + dt)
+    functions = event_functions(models.parameters.orbital_events, t, t + dt)
+    models.detected_events.extend(kepler_events(functions, start_array, t, dt))
+    return jumped_state_time
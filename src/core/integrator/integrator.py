@@ -1,8 +1,13 @@
+from typing import Tuple
+import numpy as np
 from scipy.integrate import solve_ivp
 from core.state.statetime import StateTime
 from core.state.state import array_to_state
 from core.models.model_list import ModelContainer
-from utils.constants import D_T
+from core.integrator.encke import propagate_encke, uses_encke
+from core.integrator.fast_forward import kepler_jump
+from core.integrator.orbital_events import collect_events, event_functions
+from utils.constants import D_T, PropagatorEnum
 
 
 def propagate_state(
@@ -11,11 +16,102 @@ def propagate_state(
     dt: float = D_T,
 ) -> StateTime:
     """Takes in a state and propagates it over a timestep of `dt` seconds.
-    Returns a new State object at t+dt"""
+    Returns a new State object at t+dt
+
+    The step is split into segments at the boundaries of the commands in `models.timeline`, so that the commanded
+    forcing is constant within each segment, and the attitude pulses are applied at the start of the segment
+    that begins at their time."""
+    timeline = models.timeline
+    if not timeline:
+        return _propagate_segment(models, state_time, dt)
+
+    t_end = state_time.time + dt
+    for boundary in [*timeline.boundaries(state_time.time, t_end), t_end]:
+        state_array = state_time.state.to_array()
+        pulsed_array = timeline.apply_pulses(state_time.time, state_array)
+        if pulsed_array is not state_array:
+            state_time = StateTime(array_to_state(pulsed_array), state_time.time)
+        with timeline.hold(state_time.time, boundary):
+            state_time = _propagate_segment(models, state_time, boundary - state_time.time)
+    return state_time
+
+
+def _propagate_segment(models: ModelContainer, state_time: StateTime, dt: float) -> StateTime:
+    """Propagates a state over `dt` seconds with the propagator of the parameters."""
+    if models.parameters.propagator == PropagatorEnum.Encke and uses_encke(models):
+        return propagate_encke(models, state_time, dt)
+    if models.parameters.propagator == PropagatorEnum.Kepler:
+        jumped_state_time = kepler_jump(models, state_time, dt)
+        if jumped_state_time is not None:
+            return jumped_state_time
+        # the perturbations are too large to fast-forward, fall back to integrating numerically
+
     t = state_time.time
     propagate_state_function = models.state_update_function
     state_array = state_time.state.to_array()
-    solution = solve_ivp(propagate_state_function, (t, t + dt), state_array)
+    functions = event_functions(models.parameters.orbital_events, t, t + dt)
+    solution = solve_ivp(
+        propagate_state_function, (t, t + dt), state_array, events=functions or None, **models.solver_options
+    )
+    models.diagnostics.record(solution, models.solver_options["method"])
+    if functions:
+        models.detected_events.extend(collect_events(functions, solution.t_events, solution.y_events))
     propagated_state = solution.y[:, -1]  # get the last state in the solution
     propagated_state_obj = StateTime(array_to_state(propagated_state), solution.t[-1])
     return propagated_state_obj
+
+
+def coast(models: ModelContainer, state_time: StateTime, duration: float) -> StateTime:
+    """Propagates a state over a long coast of `duration` seconds in steps of at most `kepler_max_jump`
+    seconds, without recording the intermediate states. With the Kepler propagator, every step where the
+    perturbations are negligible is jumped analytically.
+
+    Args:
+        models (ModelContainer): models used to propagate the state
+        state_time (StateTime): the state at the start of the coast
+        duration (float): length of the coast
+
+    Returns:
+        StateTime: the state at the end of the coast
+    """
+    t_end = state_time.time + duration
+    while state_time.time < t_end:
+        dt = min(models.parameters.kepler_max_jump, t_end - state_time.time)
+        state_time = propagate_state(models, state_time, dt)
+    return state_time
+
+
+def propagate_batch(
+    models: ModelContainer,
+    t: float,
+    state_matrix: np.ndarray,
+    dt: float = D_T,
+) -> Tuple[float, np.ndarray]:
+    """Propagates several states together over a timestep of `dt` seconds.
+    All the rows of `state_matrix` are integrated as one flattened array, so the solver
+    picks a single set of steps for the whole batch.
+
+    Args:
+        models (ModelContainer): models whose `evaluate_batch` evaluates the state derivatives of all the rows at once
+        t (float): time shared by every state in the batch
+        state_matrix (np.ndarray): m-by-n array, one state array (in `STATE_ARRAY_ORDER`) per row
+        dt (float, optional): length of the timestep. Defaults to D_T.
+
+    Returns:
+        Tuple[float, np.ndarray]: the time at the end of the step and the propagated m-by-n state matrix
+    """
+    shape = state_matrix.shape
+
+    def batch_update_function(t: float, flat_states: np.ndarray) -> np.ndarray:
+        return models.batch_update_function(t, flat_states.reshape(shape)).ravel()
+
+    # split at the command boundaries like `propagate_state`
+    timeline = models.timeline
+    t_end = t + dt
+    for boundary in [*timeline.boundaries(t, t_end), t_end]:
+        state_matrix = np.array([timeline.apply_pulses(t, row) for row in state_matrix]).reshape(shape)
+        with timeline.hold(t, boundary):
+            solution = solve_ivp(batch_update_function, (t, boundary), state_matrix.ravel(), **models.solver_options)
+        models.diagnostics.record(solution, models.solver_options["method"])
+        t, state_matrix = solution.t[-1], solution.y[:, -1].reshape(shape)
+    return t, state_matrix
@@ -0,0 +1,185 @@
+"""Detection of orbital events during the integration.
+
+Each event is the zero crossing of a smooth function of the time and state: the radial velocity for the apsides,
+the distance from the Moon minus its sphere of influence radius, and the angular separation of the Sun and a body
+minus the sum (penumbra) or difference (umbra) of their apparent radii. The numerical propagators hand these
+functions to `solve_ivp`, which locates the crossings by root finding on the dense output of the solver, and the
+Kepler jumps root-find on the analytic orbit. The exact event times are found whatever the step length.
+"""
+
+from dataclasses import asdict, dataclass, fields
+from typing import Callable, List, Sequence
+import numpy as np
+import pandas as pd
+from scipy.optimize import brentq
+from core.state.state import POSITION_INDICES, VELOCITY_INDICES
+from utils.astropy_util import get_body_position
+from utils.constants import MOON_SOI, R_EARTH, R_MOON, R_SUN, BodyEnum, OrbitalEventEnum
+from utils.kepler import kepler_propagate
+
+# longest span (s) of a Kepler jump sampled for sign changes before root finding
+KEPLER_SCAN_STEP = 60.0
+
+
+@dataclass
+class OrbitalEvent:
+    """An orbital event and the position and velocity of the craft when it happened."""
+
+    time: float
+    kind: str
+    body: str
+    x: float
+    y: float
+    z: float
+    vel_x: float
+    vel_y: float
+    vel_z: float
+
+
+class _Ephemeris:
+    """Linear interpolation of the body positions over a step. The event functions are evaluated at every stage
+    of the solver, so they cannot afford an ephemeris query per evaluation."""
+
+    def __init__(self, bodies: Sequence[BodyEnum], t_start: float, t_end: float) -> None:
+        self.bodies = list(bodies)
+        self.t0 = t_start // 1
+        self.t1 = max(t_end // 1 + 1, self.t0 + 1)
+        self.p0 = np.array([get_body_position(self.t0, body) for body in self.bodies])
+        self.p1 = np.array([get_body_position(self.t1, body) for body in self.bodies])
+
+    def position(self, t: float, body: BodyEnum) -> np.ndarray:
+        i = self.bodies.index(body)
+        weight = (t - self.t0) / (self.t1 - self.t0)
+        return self.p0[i] * (1 - weight) + self.p1[i] * weight
+
+
+@dataclass
+class EventFunction:
+    """g(t, state_array), whose crossings from positive to negative are `falling` events and from negative to
+    positive are `rising` events. `direction` follows the `solve_ivp` convention."""
+
+    g: Callable[[float, np.ndarray], float]
+    direction: int
+    kind: str
+    body: str
+
+    def __call__(self, t: float, state_array: np.ndarray) -> float:
+        return self.g(t, state_array)
+
+
+def _shadow_functions(ephemeris: _Ephemeris, body: BodyEnum, radius: float) -> List[Callable[[float, np.ndarray], float]]:
+    """The penumbra and umbra functions of `body`, negative while the craft is in that part of its shadow."""
+
+    def angles(t: float, state_array: np.ndarray):
+        r = state_array[POSITION_INDICES]
+        to_sun = ephemeris.position(t, BodyEnum.Sun) - r
+        to_body = ephemeris.position(t, body) - r
+        d_sun = np.linalg.norm(to_sun)
+        d_body = np.linalg.norm(to_body)
+        sun_radius = np.arcsin(min(R_SUN / d_sun, 1.0))
+        body_radius = np.arcsin(min(radius / d_body, 1.0))
+        separation = np.arctan2(np.linalg.norm(np.cross(to_sun, to_body)), np.dot(to_sun, to_body))
+        return sun_radius, body_radius, separation
+
+    def penumbra(t: float, state_array: np.ndarray) -> float:
+        sun_radius, body_radius, separation = angles(t, state_array)
+        return separation - (body_radius + sun_radius)
+
+    def umbra(t: float, state_array: np.ndarray) -> float:
+        sun_radius, body_radius, separation = angles(t, state_array)
+        return separation - (body_radius - sun_radius)
+
+    return [penumbra, umbra]
+
+
+def event_functions(groups: Sequence[str], t_start: float, t_end: float) -> List[EventFunction]:
+    """The event functions of the requested event groups (see `OrbitalEventEnum`) over the step [t_start, t_end]."""
+    groups = [OrbitalEventEnum(group) for group in groups]
+    if not groups:
+        return []
+    ephemeris = _Ephemeris([BodyEnum.Earth, BodyEnum.Moon, BodyEnum.Sun], t_start, t_end)
+    functions: List[EventFunction] = []
+
+    def both(g: Callable[[float, np.ndarray], float], falling: str, rising: str, body: str) -> None:
+        functions.append(EventFunction(g, -1, falling, body))
+        functions.append(EventFunction(g, 1, rising, body))
+
+    if OrbitalEventEnum.Apsides in groups:
+
+        def radial_velocity(t: float, state_array: np.ndarray) -> float:
+            return float(np.dot(state_array[POSITION_INDICES], state_array[VELOCITY_INDICES]))
+
+        both(radial_velocity, "apoapsis", "periapsis", "earth")
+
+    if OrbitalEventEnum.MoonSoi in groups:
+
+        def moon_soi(t: float, state_array: np.ndarray) -> float:
+            return float(np.linalg.norm(state_array[POSITION_INDICES] - ephemeris.position(t, BodyEnum.Moon)) - MOON_SOI)
+
+        both(moon_soi, "soi_entry", "soi_exit", "moon")
+
+    if OrbitalEventEnum.Eclipse in groups:
+        for body, radius in ((BodyEnum.Earth, R_EARTH), (BodyEnum.Moon, R_MOON)):
+            penumbra, umbra = _shadow_functions(ephemeris, body, radius)
+            both(penumbra, "penumbra_entry", "penumbra_exit", body.name.lower())
+            both(umbra, "umbra_entry", "umbra_exit", body.name.lower())
+
+    return functions
+
+
+def to_event(function: EventFunction, t: float, state_array: np.ndarray) -> OrbitalEvent:
+    r = state_array[POSITION_INDICES]
+    v = state_array[VELOCITY_INDICES]
+    return OrbitalEvent(float(t), function.kind, function.body, *map(float, r), *map(float, v))
+
+
+def collect_events(
+    functions: Sequence[EventFunction], t_events: Sequence[np.ndarray], y_events: Sequence[np.ndarray]
+) -> List[OrbitalEvent]:
+    """The events located by `solve_ivp`, given the `t_events` and `y_events` of its solution for `functions`."""
+    events = []
+    for function, times, states in zip(functions, t_events, y_events):
+        events.extend(to_event(function, t, state_array) for t, state_array in zip(times, states))
+    return sorted(events, key=lambda event: event.time)
+
+
+def kepler_events(
+    functions: Sequence[EventFunction], state_array: np.ndarray, t_start: float, dt: float
+) -> List[OrbitalEvent]:
+    """The events along a Kepler jump of `dt` seconds from `state_array` at `t_start`. The jump is sampled every
+    KEPLER_SCAN_STEP seconds at most, and every sign change is located by root finding on the analytic orbit."""
+    if not functions or dt <= 0:
+        return []
+    r0 = state_array[POSITION_INDICES]
+    v0 = state_array[VELOCITY_INDICES]
+
+    def state_at(t: float) -> np.ndarray:
+        r, v = kepler_propagate(r0, v0, t - t_start)
+        jumped = state_array.copy()
+        jumped[POSITION_INDICES] = r
+        jumped[VELOCITY_INDICES] = v
+        return jumped
+
+    times = np.linspace(t_start, t_start + dt, int(np.ceil(dt / KEPLER_SCAN_STEP)) + 1)
+    states = [state_at(t) for t in times]
+    events = []
+    for function in functions:
+        values = np.array([function(t, state) for t, state in zip(times, states)])
+        for i in np.flatnonzero(np.sign(values[:-1]) != np.sign(values[1:])):
+            if np.sign(values[i + 1] - values[i]) != function.direction:
+                continue
+            t = brentq(lambda t: function(t, state_at(t)), times[i], times[i + 1])
+            events.append(to_event(function, t, state_at(t)))
+    return sorted(events, key=lambda event: event.time)
+
+
+def events_to_df(events: Sequence[OrbitalEvent]) -> pd.DataFrame:
+    """The event table of a run, one row per event in time order."""
+    columns = [field.name for field in fields(OrbitalEvent)]
+    table = pd.DataFrame([asdict(event) for event in events], columns=columns)
+    return table.sort_values("time", kind="stable").reset_index(drop=True)
+
+
+def events_from_df(table: pd.DataFrame, end_time: float = float("inf")) -> List[OrbitalEvent]:
+    """The events of an event table up to `end_time`, the inverse of `events_to_df`."""
+    return [OrbitalEvent(**row) for row in table[table["time"] <= end_time].to_dict("records")]
@@ -0,0 +1,205 @@
+"""Throughput metrics of a running sim, written to a file for monitoring.
+
+Every `interval` wall seconds (checked after each step), the metrics are written to the file atomically: to a
+temporary file in the same directory, which then replaces it, so a scraper never reads a partly written file. A
+path ending in `.prom` is written in the Prometheus text format, for the textfile collector of the node exporter,
+any other path as JSON. The rates are over the interval since the previous write, so a run that slows down shows
+it within one interval; the ETA is the time to the first of the `max_iter` and `MAX_RUN_DURATION` limits at the
+current rates. The file is written a last time when the run ends, with `running` set to 0.
+
+Metrics:
+    steps, sim_time, rhs_evaluations, integrator_steps, rejected_steps: totals since the start of the run
+    steps_per_second, sim_seconds_per_second: rates over the last interval
+    rhs_evaluations_per_step, rejected_steps_per_step: per sim step, over the last interval
+    ephemeris_cache_hit_ratio: hits of the ephemeris cache (`get_body_position`) over its queries, since the start
+    resident_memory_bytes: the resident set size of the process
+    eta_seconds: wall seconds until the run hits a limit, at the current rates, -1 before the first step
+    running: 1 while the run steps, 0 once it ended
+"""
+
+import json
+import os
+from pathlib import Path
+import resource
+import tempfile
+import time
+from typing import Callable, Dict, Optional
+from core.config import Config
+from core.sim import CislunarSim
+from utils.astropy_util import get_body_position
+from utils.constants import MAX_RUN_DURATION
+
+METRIC_PREFIX = "cislunarsim_"
+# wall seconds between two writes of the metrics
+DEFAULT_METRICS_INTERVAL = 5.0
+
+# the help text and Prometheus type of every metric
+METRICS = {
+    "steps": ("Steps taken by the sim.", "counter"),
+    "sim_time": ("Sim seconds propagated.", "counter"),
+    "rhs_evaluations": ("Evaluations of the state update function.", "counter"),
+    "integrator_steps": ("Steps accepted by the integrator.", "counter"),
+    "rejected_steps": ("Steps rejected by the integrator.", "counter"),
+    "steps_per_second": ("Sim steps per wall second.", "gauge"),
+    "sim_seconds_per_second": ("Sim seconds per wall second.", "gauge"),
+    "rhs_evaluations_per_step": ("Evaluations of the state update function per sim step.", "gauge"),
+    "rejected_steps_per_step": ("Steps rejected by the integrator per sim step.", "gauge"),
+    "ephemeris_cache_hit_ratio": ("Share of the ephemeris queries answered by the cache.", "gauge"),
+    "resident_memory_bytes": ("Resident set size of the sim process.", "gauge"),
+    "eta_seconds": ("Wall seconds until the run hits its step or duration limit.", "gauge"),
+    "running": ("1 while the run is stepping, 0 once it ended.", "gauge"),
+}
+
+
+def resident_memory() -> int:
+    """The resident set size of the process in bytes, or its peak where the current one is not available."""
+    try:
+        with open("/proc/self/statm", "r") as read_file:
+            return int(read_file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def to_prometheus(metrics: Dict[str, float], labels: Optional[Dict[str, str]] = None) -> str:
+    """The metrics in the Prometheus text exposition format."""
+    label_text = ",".join(f'{key}="{_escape(str(value))}"' for key, value in (labels or {}).items())
+    label_text = f"{{{label_text}}}" if label_text else ""
+    lines = []
+    for name, value in metrics.items():
+        help_text, kind = METRICS[name]
+        full_name = f"{METRIC_PREFIX}{name}" + ("_total" if kind == "counter" else "")
+        lines += [f"# HELP {full_name} {help_text}", f"# TYPE {full_name} {kind}", f"{full_name}{label_text} {value!r}"]
+    return "\n".join(lines) + "\n"
+
+
+def write_atomically(path: Path, text: str) -> None:
+    """Writes `text` to `path` through a temporary file in the same directory, so readers see the old or the new
+    content, never a mix."""
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as write_file:
+            write_file.write(text)
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.remove(tmp_name)
+        raise
+
+
+class SimMetrics:
+    """Tracks the throughput of a run and writes it to `path` periodically.
+
+    Example:
+        metrics = SimMetrics("/var/lib/node_exporter/tli.prom", labels={"run": "tli"})
+        metrics.start(sim, config)
+        while sim.should_run:
+            sim.step()
+            metrics.update(sim)
+        metrics.finish(sim)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        interval: float = DEFAULT_METRICS_INTERVAL,
+        labels: Optional[Dict[str, str]] = None,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        """
+        Args:
+            path (str): the file the metrics are written to, in the Prometheus text format if it ends in .prom
+            interval (float, optional): wall seconds between two writes. Defaults to DEFAULT_METRICS_INTERVAL.
+            labels (Optional[Dict[str, str]], optional): labels of the Prometheus metrics, e.g. the name of the run
+            clock (Callable[[], float], optional): monotonic clock in seconds. Defaults to time.perf_counter.
+        """
+        self.path = Path(path)
+        self.interval = interval
+        self.labels = labels or {}
+        self._clock = clock
+        self.metrics: Dict[str, float] = {}
+
+    def start(self, sim: CislunarSim, config: Config) -> None:
+        """Records the state of the run before its first step, and writes the metrics."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._max_iter = config.param.max_iter
+        self._end_time = config.init_cond.time + MAX_RUN_DURATION
+        self._start_time = sim.state_time.time
+        cache = get_body_position.cache_info()
+        self._cache_start = (cache.hits, cache.misses)
+        self._last = (self._clock(), *self._totals(sim))
+        self.update(sim, force=True)
+
+    def _totals(self, sim: CislunarSim):
+        models = sim.models
+        return sim.num_iters, sim.state_time.time, models.rhs_evaluations, models.diagnostics.rejected_steps
+
+    def update(self, sim: CislunarSim, force: bool = False) -> bool:
+        """Writes the metrics if `interval` seconds passed since the last write (or if `force`), returns whether
+        it did."""
+        now = self._clock()
+        if not force and now - self._last[0] < self.interval:
+            return False
+
+        totals = self._totals(sim)
+        steps, t, rhs_evaluations, rejected = totals
+        last_wall, last_steps, last_t, last_rhs_evaluations, last_rejected = self._last
+        wall = now - last_wall
+        interval_steps = steps - last_steps
+        if wall > 0 and interval_steps > 0:
+            steps_per_second = interval_steps / wall
+            sim_seconds_per_second = (t - last_t) / wall
+            rhs_evaluations_per_step = (rhs_evaluations - last_rhs_evaluations) / interval_steps
+            rejected_steps_per_step = (rejected - last_rejected) / interval_steps
+            self._last = (now, *totals)
+        else:
+            # nothing happened since the last write, keep the rates of the last interval
+            steps_per_second = self.metrics.get("steps_per_second", 0.0)
+            sim_seconds_per_second = self.metrics.get("sim_seconds_per_second", 0.0)
+            rhs_evaluations_per_step = self.metrics.get("rhs_evaluations_per_step", 0.0)
+            rejected_steps_per_step = self.metrics.get("rejected_steps_per_step", 0.0)
+
+        eta = float("inf")
+        if steps_per_second > 0:
+            eta = min(eta, max(self._max_iter - steps, 0) / steps_per_second)
+        if sim_seconds_per_second > 0:
+            eta = min(eta, max(self._end_time - t, 0.0) / sim_seconds_per_second)
+
+        cache = get_body_position.cache_info()
+        hits, misses = cache.hits - self._cache_start[0], cache.misses - self._cache_start[1]
+        models = sim.models
+        self.metrics = {
+            "steps": steps,
+            "sim_time": t - self._start_time,
+            "rhs_evaluations": rhs_evaluations,
+            "integrator_steps": models.diagnostics.accepted_steps,
+            "rejected_steps": rejected,
+            "steps_per_second": steps_per_second,
+            "sim_seconds_per_second": sim_seconds_per_second,
+            "rhs_evaluations_per_step": rhs_evaluations_per_step,
+            "rejected_steps_per_step": rejected_steps_per_step,
+            "ephemeris_cache_hit_ratio": hits / (hits + misses) if hits + misses else 1.0,
+            "resident_memory_bytes": resident_memory(),
+            "eta_seconds": eta if eta != float("inf") else -1.0,
+            "running": 1,
+        }
+        self.write()
+        return True
+
+    def finish(self, sim: CislunarSim) -> None:
+        """Writes the metrics at the end of the run."""
+        self.update(sim, force=True)
+        self.metrics.update({"eta_seconds": 0.0, "running": 0})
+        self.write()
+
+    def write(self) -> None:
+        if self.path.suffix == ".prom":
+            text = to_prometheus(self.metrics, self.labels)
+        else:
+            text = json.dumps({"labels": self.labels, "time": time.time(), **self.metrics}, indent=4)
+        write_atomically(self.path, text)
@@ -1,9 +1,10 @@
 from abc import abstractmethod
-from core.state.state import State
+from core.state.state import POSITION_INDICES, QUATERNION_INDICES, State, array_to_state
 from utils.astropy_util import get_body_position
 from typing import Dict
 import numpy as np
 from utils.constants import BodyEnum
+from core.models.gravity import ephemeris_positions
 from core.models.model_base import Model
 from typing import Union, Tuple, List
 
@@ -11,9 +12,16 @@ from typing import Union, Tuple, List
 class DerivedStateModel(Model):
     """Abstract Base class for all models this sim uses."""
 
+    # derived state fields of the model, in the column order of `evaluate_batch` (vectors take 3 columns)
+    fields: List[str] = []
+
     def __init__(self) -> None:
         pass
 
+    @property
+    def outputs(self) -> List[str]:
+        return self.fields
+
     @abstractmethod
     def evaluate(self, time: float, state: State) -> Dict[str, Union[float, int, bool]]:
         """Evaluates the model based on the current state.
@@ -27,6 +35,10 @@ class DerivedStateModel(Model):
         """
         ...
 
+    def _evaluate_row(self, t: float, state_array: np.ndarray) -> np.ndarray:
+        values = self.evaluate(t, array_to_state(state_array))
+        return np.concatenate([np.ravel(values[field]) for field in self.fields])
+
 
 def quat_to_rotvec(q: Tuple[float, float, float, float]) -> np.ndarray:
     """Converts a 4-tuple representation of a quaternion into a 3-tuple Euler angle rotation vector.
@@ -55,6 +67,9 @@ def cartesian_to_spherical(x: float, y: float, z: float) -> Tuple[float, float,
 
 
 class DerivedAttitude(DerivedStateModel):
+    inputs = ["quat_v1", "quat_v2", "quat_v3"]
+    fields = ["attitude_vector", "azimuth", "elevation"]
+
     def evaluate(self, _: float, state: State):
         spin_vector = quat_to_rotvec((state.quat_v1, state.quat_v2, state.quat_v3, state.quat_r))
         spherical_coordinates = cartesian_to_spherical(*spin_vector)
@@ -65,10 +80,26 @@ class DerivedAttitude(DerivedStateModel):
             "elevation": spherical_coordinates[2],
         }
 
+    def evaluate_batch(self, times: np.ndarray, state_matrix: np.ndarray) -> np.ndarray:
+        """n-by-5 array of the spin vector, azimuth and elevation of n state arrays."""
+        vector_part = np.asarray(state_matrix, dtype=np.float64)[:, QUATERNION_INDICES[:3]]
+        norm = np.linalg.norm(vector_part, axis=1)
+        spin_vector = np.zeros_like(vector_part)
+        spin_vector[norm > 0] = vector_part[norm > 0] / norm[norm > 0, np.newaxis]
+
+        r = np.linalg.norm(spin_vector, axis=1)
+        azimuth = np.arctan2(spin_vector[:, 1], spin_vector[:, 0])
+        elevation = np.zeros_like(r)
+        elevation[r > 0] = np.arccos(spin_vector[r > 0, 2] / r[r > 0])
+        return np.column_stack([spin_vector, azimuth, elevation])
+
 
 class DerivedPosition(DerivedStateModel):
     """Updates position column vectors for use in the position dynamics model."""
 
+    inputs = ["x", "y", "z"]
+    fields = ["r_co", "r_mo", "r_so", "r_eo", "r_mc", "r_sc", "r_ec"]
+
     def evaluate(self, t: float, state: State) -> Dict[str, np.ndarray]:
 
         # Position column vectors from moon/sun/earth/craft to the origin, where the origin is
@@ -100,5 +131,13 @@ class DerivedPosition(DerivedStateModel):
             "r_ec": r_ec,
         }
 
+    def evaluate_batch(self, times: np.ndarray, state_matrix: np.ndarray) -> np.ndarray:
+        """n-by-21 array of the position vectors of n state arrays, with the ephemeris queried once for all
+        of them."""
+        r_co = np.asarray(state_matrix, dtype=np.float64)[:, POSITION_INDICES]
+        r_mo, r_so = np.moveaxis(ephemeris_positions(times, [BodyEnum.Moon, BodyEnum.Sun]), 1, 0)
+        r_eo = np.zeros_like(r_co)
+        return np.hstack([r_co, r_mo, r_so, r_eo, r_mo - r_co, r_so - r_co, r_eo - r_co])
+
 
 DERIVED_MODEL_LIST: List[DerivedStateModel] = [DerivedPosition(), DerivedAttitude()]
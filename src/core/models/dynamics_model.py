@@ -2,59 +2,24 @@ import numpy as np
 from core.models.model import EnvironmentModel
 from core.models.derived_models import DerivedStateModel
 from typing import Dict, Any
-from core.state.state import State
+from core.models.mass_properties import get_mass_properties
+from core.parameters import Parameters
+from core.state.state import ANGULAR_VELOCITY_INDICES, QUATERNION_INDICES, STATE_ARRAY_ORDER, State
 from core.state.statetime import StateTime
 from utils.gnc_utils import quaternion_derivative
 
 
 class InertiaModel(DerivedStateModel):
-    def evaluate(self, state: State) -> Dict[str, Any]:
-        fill_frac = state.fill_frac
-
-        dcm = np.array([[0, 1, 0], [0, 0, -1], [-1, 0, 0]], dtype=np.int32)
-        dcmT = np.transpose(dcm)
-
-        # Inertia tensor when full. Structure is:
-        # [[Ixx, Ixy, Ixz],
-        #  [Iyx, Iyy, Iyz],
-        #  [Izx, Izy, Izz]].
-        # Units are (kg * m^2).
-        idf = (
-            np.array(
-                [
-                    [933513642.20, 260948256.18, 430810000.30],
-                    [260948256.18, 1070855457.07, 387172545.62],
-                    [430810000.30, 387172545.62, 629606813.62],
-                ],
-                dtype=np.float64,
-            )
-            * 1e-9
-        )
-        idf_b = np.matmul(np.matmul(dcm, idf), dcmT)
-
-        # Inertia tensor at 125 mL. Structure is:
-        # [[Ixx, Ixy, Ixz],
-        #  [Iyx, Iyy, Iyz],
-        #  [Izx, Izy, Izz]].
-        # Units are (kg * m^2).
-        idi = (
-            np.array(
-                [
-                    [855858994.14, 229481961.55, 377087149.13],
-                    [229481961.55, 963124288.81, 353943859.15],
-                    [377087149.13, 353943859.15, 559805590.96],
-                ],
-                dtype=np.float64,
-            )
-            * 1e-9
-        )
-        idi_b = np.matmul(np.matmul(dcm, idi), dcmT)
+    """Derives the body frame inertia tensor from the fill fraction of the tank."""
+
+    inputs = ["fill_frac"]
+    fields = ["Ixx", "Ixy", "Ixz", "Iyx", "Iyy", "Iyz", "Izx", "Izy", "Izz"]
 
-        # Determine inertia tensor for Oxygen via linear interpolation as a function of fill
-        # fraction.
+    def __init__(self) -> None:
+        self._mass_properties = get_mass_properties()
 
-        # TODO: determine whether linear fit is accurate enough
-        ioxy = (idf_b - idi_b) * fill_frac + idi_b
+    def evaluate(self, _: float, state: State) -> Dict[str, Any]:
+        ioxy = self._mass_properties.inertia(state.fill_frac)
 
         return {
             "Ixx": ioxy[0][0],
@@ -72,33 +37,27 @@ class InertiaModel(DerivedStateModel):
 class KaneModel(DerivedStateModel):
     """Calculates the Kane damping coefficient from 2016 simulation data by K. Doyle."""
 
-    def evaluate(self, state: State) -> Dict[str, Any]:
-        # Coefficients below are from Kyle's work.
-        # TODO: Update them when we conduct a new Ansys analysis.
-        k = 0.00085
-        factor = 1.2
-
-        N = 50
-        kane = fill = tau1 = tau2 = np.zeros(N)
-        for i in range(N):
-            fill[i] = (i - 1) / N
-            tau1[i] = k * fill[i]
-            tau2[i] = factor * k * (1 - fill[i])
-            kane[i] = -np.sqrt(tau1[i] ** 2 + tau2[i] ** 2)
-
-        kane = kane - np.max(kane) + k
-        kane = kane - np.min(kane)
-        kane = kane * k / np.max(kane)
+    inputs = ["fill_frac"]
+    fields = ["kane_c"]
 
-        q = np.round(state.fill_frac / 0.02 + 1)
-        c = kane[q]
+    def __init__(self) -> None:
+        self._mass_properties = get_mass_properties()
 
-        return {"kane_c": c}
+    def evaluate(self, _: float, state: State) -> Dict[str, Any]:
+        return {"kane_c": self._mass_properties.kane_damping(state.fill_frac)}
 
 
 class AttitudeDynamics(EnvironmentModel):
     """Class for the angular velocity and position model."""
 
+    inputs = ["quat_v1", "quat_v2", "quat_v3", "quat_r", "ang_vel_x", "ang_vel_y", "ang_vel_z"]
+    outputs = ["quat_v1", "quat_v2", "quat_v3", "quat_r"]
+
+    def __init__(self, parameters: Parameters) -> None:
+        super().__init__(parameters)
+        # inertia tensor and Kane damping as functions of the fill fraction
+        self.mass_properties = get_mass_properties()
+
     def d_state(self, state_time: StateTime) -> Dict[str, Any]:
         """Evaluates
         (tau)   =   [I_b d(omega_{B/N})/dt]
@@ -118,3 +77,12 @@ class AttitudeDynamics(EnvironmentModel):
         # then calculate angular rates from momenta b/c inertia matricies change over time
 
         return {"quat_v1": d_quat[0], "quat_v2": d_quat[1], "quat_v3": d_quat[2], "quat_r": d_quat[3]}
+
+    def evaluate_batch(self, times: np.ndarray, state_matrix: np.ndarray) -> np.ndarray:
+        """The quaternion derivatives of n state arrays."""
+        state_matrix = np.asarray(state_matrix, dtype=np.float64)
+        d_states = np.zeros((len(state_matrix), len(STATE_ARRAY_ORDER)))
+        d_states[:, QUATERNION_INDICES] = quaternion_derivative(
+            state_matrix[:, QUATERNION_INDICES], state_matrix[:, ANGULAR_VELOCITY_INDICES]
+        )
+        return d_states
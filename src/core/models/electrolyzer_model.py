@@ -1,14 +1,25 @@
-from core.models.model import ActuatorModel
+from core.command_timeline import CommandTimeline
+from core.models.model import ActuatorModel, EnvironmentModel
 from core.parameters import Parameters
+from core.state.state import STATE_ARRAY_ORDER
 from core.state.statetime import StateTime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from utils.constants import R, M_WATER
 import numpy as np
 
 class ElectrolyzerModel(ActuatorModel):
   """Propagates fuel mass and chamber pressure according to electrolysis parameters"""
 
-  def __init__(self, duration: float, parameters: Parameters) -> None:
+  inputs = ["fuel_mass", "chamber_temp"]
+  outputs = ["fuel_mass", "chamber_pressure"]
+
+  def __init__(self, parameters: Parameters, duration: Optional[float] = None) -> None:
+      """
+      Args:
+          parameters (Parameters): parameters of the electrolyzer
+          duration (Optional[float], optional): electrolysis duration of every step. Defaults to None, which
+              electrolyzes for the `electrolysis_duration` of the latest command instead.
+      """
       super().__init__(parameters)
 
       self._duration = duration
@@ -24,13 +35,19 @@ class ElectrolyzerModel(ActuatorModel):
       Returns:
           Dict[str, Any]: The augmented fuel mass and chamber pressure
       """
+      if self._duration is not None:
+          duration = self._duration
+      else:
+          # a commanded electrolysis is only performed once
+          duration = self._command.electrolysis_duration
+          self._command.electrolysis_duration = 0.0
 
       # get fuel mass at this time
-      fuel_mass_i = np.array([state_time.state.fuel_mass])
-      chamber_temp = np.array([state_time.state.chamber_temp])
+      fuel_mass_i = state_time.state.fuel_mass
+      chamber_temp = state_time.state.chamber_temp
 
       # calculate updated fuel mass
-      kg_electrolyzed = self._duration * self._electrolyzer_rate
+      kg_electrolyzed = duration * self._electrolyzer_rate
       fuel_mass_d = fuel_mass_i - kg_electrolyzed
 
       # P = nRT / V, calculate updated chamber pressure
@@ -38,6 +55,27 @@ class ElectrolyzerModel(ActuatorModel):
 
       # return updated fuel mass and chamber pressure
       return {
-        "fuel_mass": fuel_mass_d,
-        "chamber_pressure": chamber_pressure_d
-      }
\ No newline at end of file
+        "fuel_mass": float(fuel_mass_d),
+        "chamber_pressure": float(chamber_pressure_d)
+      }
+
+
+class ElectrolysisDynamics(EnvironmentModel):
+  """Consumes water continuously during the electrolysis commands of the `command_timeline` parameter, at the
+  `electolyzer_rate`. Unlike `ElectrolyzerModel`, which applies each electrolysis as a jump at the start of a step,
+  the fuel mass is integrated along with the rest of the state."""
+
+  inputs = []
+  outputs = ["fuel_mass"]
+
+  def __init__(self, parameters: Parameters) -> None:
+      super().__init__(parameters)
+      self.timeline = CommandTimeline.from_parameters(parameters)
+
+  def d_state(self, state_time: StateTime) -> Dict[str, Any]:
+      return {"fuel_mass": -float(self.timeline.electrolysis_rates(np.array([state_time.time]))[0])}
+
+  def evaluate_batch(self, times: np.ndarray, state_matrix: np.ndarray) -> np.ndarray:
+      d_states = np.zeros((len(state_matrix), len(STATE_ARRAY_ORDER)))
+      d_states[:, STATE_ARRAY_ORDER.index("fuel_mass")] = -self.timeline.electrolysis_rates(times)
+      return d_states
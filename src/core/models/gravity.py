@@ -0,0 +1,73 @@
+"""Vectorized point mass gravity over a table of bodies."""
+
+from typing import List, Sequence
+import numpy as np
+from utils.astropy_util import get_body_position, get_body_positions
+from utils.constants import BODY_MU, BodyEnum
+
+
+def ephemeris_positions(times: np.ndarray, bodies: Sequence[BodyEnum]) -> np.ndarray:
+    """n-by-k-by-3 array of the positions of the bodies at each of the times, on the same one second ephemeris
+    grid as `BodyTable.positions`. The ephemeris is queried once per body for all the distinct grid times."""
+    ephemeris_times, inverse = np.unique(10 * np.asarray(times, dtype=np.float64) // 10, return_inverse=True)
+    positions = np.zeros((len(ephemeris_times), len(bodies), 3))
+    for i, body in enumerate(bodies):
+        positions[:, i] = get_body_positions(ephemeris_times, body)
+    return positions[inverse]
+
+
+class BodyTable:
+    """The gravitational parameters of the attracting bodies, held as contiguous arrays so that the
+    acceleration towards every body is computed in one numpy expression. Body positions come from the
+    cached ephemeris in `get_body_position`.
+    """
+
+    def __init__(self, bodies: Sequence[BodyEnum]) -> None:
+        self.bodies: List[BodyEnum] = list(bodies)
+        self.mu = np.ascontiguousarray([BODY_MU[body] for body in self.bodies], dtype=np.float64)
+
+        # positions of the bodies at the last ephemeris time that was queried
+        self._ephemeris_time = None
+        self._positions = np.zeros((len(self.bodies), 3))
+
+    @classmethod
+    def from_names(cls, names: Sequence[str]):
+        """Creates a body table from body names (e.g. `["earth", "moon", "sun"]`), as used in the config."""
+        return cls([BodyEnum[name.capitalize()] for name in names])
+
+    def index(self, body: BodyEnum) -> int:
+        return self.bodies.index(body)
+
+    def positions(self, t: float) -> np.ndarray:
+        """k-by-3 array of the positions of the bodies (in GCRS) at time `t`."""
+        ephemeris_time = 10 * t // 10
+        if ephemeris_time != self._ephemeris_time:
+            positions = [get_body_position(ephemeris_time, body) for body in self.bodies]
+            self._positions = np.array(positions, dtype=np.float64).reshape(len(self.bodies), 3)
+            self._ephemeris_time = ephemeris_time
+        return self._positions
+
+    def accelerations(self, t: float, r_craft: np.ndarray) -> np.ndarray:
+        """Computes the acceleration of the craft towards each body.
+
+        Args:
+            t (float): current time
+            r_craft (np.ndarray): position of the craft, either a length-3 array or an n-by-3 array of positions
+
+        Returns:
+            np.ndarray: k-by-3 (or n-by-k-by-3) array of accelerations, one row per body in the table
+        """
+        r_bc = self.positions(t) - np.asarray(r_craft)[..., np.newaxis, :]
+        r_bc_sq = np.einsum("...i,...i->...", r_bc, r_bc)
+        return (self.mu / (r_bc_sq * np.sqrt(r_bc_sq)))[..., np.newaxis] * r_bc
+
+    def batch_accelerations(self, times: np.ndarray, r_craft: np.ndarray) -> np.ndarray:
+        """n-by-k-by-3 array of the accelerations of n crafts at positions `r_craft` (n-by-3) towards each body,
+        at each of `times`."""
+        r_bc = ephemeris_positions(times, self.bodies) - np.asarray(r_craft)[:, np.newaxis, :]
+        r_bc_sq = np.einsum("...i,...i->...", r_bc, r_bc)
+        return (self.mu / (r_bc_sq * np.sqrt(r_bc_sq)))[..., np.newaxis] * r_bc
+
+    def acceleration(self, t: float, r_craft: np.ndarray) -> np.ndarray:
+        """The total gravitational acceleration of the craft, a length-3 (or n-by-3) array."""
+        return self.accelerations(t, r_craft).sum(axis=-2)
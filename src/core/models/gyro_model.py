@@ -3,7 +3,9 @@ Gyro sensor model documentation: https://cornell.box.com/s/6nu08iqfk5i389wlpp44r
 """
 
 from core.models.model import SensorModel
+from core.models.noise import NoiseStream
 from core.parameters import Parameters
+from core.state.state import ANGULAR_VELOCITY_INDICES, STATE_ARRAY_ORDER
 from core.state.statetime import StateTime
 from typing import Dict, Any
 import numpy as np
@@ -12,10 +14,15 @@ import numpy as np
 class GyroModel(SensorModel):
     """Applies the gyro bias and noise as specified in parameters.py"""
 
+    inputs = ["ang_vel_x", "ang_vel_y", "ang_vel_z"]
+    outputs = ["ang_vel_x", "ang_vel_y", "ang_vel_z"]
+
     def __init__(self, parameters: Parameters) -> None:
         super().__init__(parameters)
         self.gyro_bias = np.array(self._parameters.gyro_bias)
         self.gyro_noise = np.array(self._parameters.gyro_noise)
+        self.gyro_sensitivity = self._parameters.gyro_sensitivity
+        self._noise = NoiseStream(self._parameters.seed, "gyro", 3)
 
     def evaluate(self, state_time: StateTime) -> Dict[str, Any]:
         """Abstracts the angular velocities according to the model
@@ -30,15 +37,11 @@ class GyroModel(SensorModel):
         # setting up the initial angular velocity using x, y, z components 
         ang_vel_i = np.array([state_time.state.ang_vel_x, state_time.state.ang_vel_y, state_time.state.ang_vel_z])
 
-        # adding initial angular velocity to gyro_bias
-        ang_vel_d = ang_vel_i + self.gyro_bias
-        ang_vel_d = np.random.normal(loc=ang_vel_d, scale=self.gyro_noise, size=3)
+        # adding gyro_bias and noise to the initial angular velocity
+        ang_vel_d = ang_vel_i + self.gyro_bias + self.gyro_noise * self._noise.next()
 
-        #filling in the array, applying gyro sensitivity
-        for i in range(3):
-            ang_vel_d[i] = self._parameters.gyro_sensitivity * int(
-                self._parameters.gyro_sensitivity / 2 + ang_vel_d[i] / self._parameters.gyro_sensitivity
-            )
+        # applying gyro sensitivity (quantization, truncating towards zero)
+        ang_vel_d = self.gyro_sensitivity * np.trunc(self.gyro_sensitivity / 2 + ang_vel_d / self.gyro_sensitivity)
 
         #return components of the angular velocity
         return {
@@ -46,3 +49,14 @@ class GyroModel(SensorModel):
             "ang_vel_y": ang_vel_d[1],
             "ang_vel_z": ang_vel_d[2],
         }
+
+    def evaluate_batch(self, times: np.ndarray, state_matrix: np.ndarray) -> np.ndarray:
+        """Measures the angular velocities of n state arrays. The noise is drawn in one block, so the measurements
+        are the same as n calls to `evaluate` in row order."""
+        ang_vel_i = np.asarray(state_matrix, dtype=np.float64)[:, ANGULAR_VELOCITY_INDICES]
+        ang_vel_d = ang_vel_i + self.gyro_bias + self.gyro_noise * self._noise.take(len(ang_vel_i))
+        ang_vel_d = self.gyro_sensitivity * np.trunc(self.gyro_sensitivity / 2 + ang_vel_d / self.gyro_sensitivity)
+
+        observed = np.zeros((len(ang_vel_i), len(STATE_ARRAY_ORDER)))
+        observed[:, ANGULAR_VELOCITY_INDICES] = ang_vel_d
+        return observed
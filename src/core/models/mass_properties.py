@@ -0,0 +1,88 @@
+"""Mass properties of the craft as a function of the fill fraction of the tank. The body frame inertia
+tensors and the Kane damping curve only depend on the constants below, so they are computed once, the first time
+a model asks for them, and then interpolated."""
+
+from functools import lru_cache
+from typing import Union
+import numpy as np
+
+# DCM from the CAD frame of the inertia tensors below to the body frame
+CAD_TO_BODY_DCM = np.array([[0, 1, 0], [0, 0, -1], [-1, 0, 0]], dtype=np.float64)
+
+# Inertia tensor when full. Structure is:
+# [[Ixx, Ixy, Ixz],
+#  [Iyx, Iyy, Iyz],
+#  [Izx, Izy, Izz]].
+# Units are (kg * m^2).
+INERTIA_FULL_CAD = (
+    np.array(
+        [
+            [933513642.20, 260948256.18, 430810000.30],
+            [260948256.18, 1070855457.07, 387172545.62],
+            [430810000.30, 387172545.62, 629606813.62],
+        ],
+        dtype=np.float64,
+    )
+    * 1e-9
+)
+
+# Inertia tensor at 125 mL, same structure and units as above.
+INERTIA_INITIAL_CAD = (
+    np.array(
+        [
+            [855858994.14, 229481961.55, 377087149.13],
+            [229481961.55, 963124288.81, 353943859.15],
+            [377087149.13, 353943859.15, 559805590.96],
+        ],
+        dtype=np.float64,
+    )
+    * 1e-9
+)
+
+# Kane damping coefficients are from Kyle's work.
+# TODO: Update them when we conduct a new Ansys analysis.
+KANE_K = 0.00085
+KANE_FACTOR = 1.2
+KANE_TABLE_SIZE = 50
+
+
+class MassProperties:
+    """Precomputed body frame inertia endpoints and Kane damping curve. Get the shared instance with
+    `get_mass_properties` so that the tables are only built once."""
+
+    def __init__(self) -> None:
+        self.inertia_full = CAD_TO_BODY_DCM @ INERTIA_FULL_CAD @ CAD_TO_BODY_DCM.T
+        self.inertia_initial = CAD_TO_BODY_DCM @ INERTIA_INITIAL_CAD @ CAD_TO_BODY_DCM.T
+        self._inertia_slope = self.inertia_full - self.inertia_initial
+
+        # Kane damping constant from 2016 simulation data by K. Doyle, normalized to lie in [0, k]
+        self.kane_fill = np.arange(KANE_TABLE_SIZE) / KANE_TABLE_SIZE
+        tau1 = KANE_K * self.kane_fill
+        tau2 = KANE_FACTOR * KANE_K * (1 - self.kane_fill)
+        kane = -np.sqrt(tau1 ** 2 + tau2 ** 2)
+        kane = kane - np.max(kane) + KANE_K
+        kane = kane - np.min(kane)
+        self.kane_c = kane * KANE_K / np.max(kane)
+
+    def inertia(self, fill_frac: Union[float, np.ndarray]) -> np.ndarray:
+        """Body frame inertia tensor, linearly interpolated between the initial and full tanks.
+        TODO: determine whether linear fit is accurate enough
+
+        Args:
+            fill_frac (Union[float, np.ndarray]): fill fraction of the tank, or an array of them
+
+        Returns:
+            np.ndarray: 3-by-3 inertia tensor, or an (..., 3, 3) array with one tensor per fill fraction
+        """
+        fill_frac = np.asarray(fill_frac, dtype=np.float64)[..., np.newaxis, np.newaxis]
+        return self.inertia_initial + self._inertia_slope * fill_frac
+
+    def kane_damping(self, fill_frac: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """Kane damping constant, interpolated from the damping curve."""
+        return np.interp(fill_frac, self.kane_fill, self.kane_c)
+
+
+@lru_cache(maxsize=1)
+def get_mass_properties() -> MassProperties:
+    """The `MassProperties` of the craft, built the first time they are requested."""
+    return MassProperties()
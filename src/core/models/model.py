@@ -1,9 +1,13 @@
 from abc import abstractmethod
+from dataclasses import replace
 from typing import Dict, Any, Type, Union
+import numpy as np
+from core.state.state import array_to_state, state_row
 from core.state.statetime import StateTime
 from core.parameters import Parameters
 from utils.constants import State_Type
 from core.models.model_base import Model
+from core.state.command import ActuatorCommand
 
 
 class EnvironmentModel(Model):
@@ -30,6 +34,10 @@ class EnvironmentModel(Model):
         """
         ...
 
+    def _evaluate_row(self, t: float, state_array: np.ndarray) -> np.ndarray:
+        """The derivative of a state array, zero in the fields the model does not update."""
+        return state_row(self.evaluate(StateTime(array_to_state(state_array), t)))
+
 
 class SensorModel(Model):
     def __init__(self, parameters: Parameters) -> None:
@@ -39,6 +47,10 @@ class SensorModel(Model):
     def evaluate(self, state: StateTime) -> Dict[str, Any]:
         ...
 
+    def _evaluate_row(self, t: float, state_array: np.ndarray) -> np.ndarray:
+        """The observed values of a state array, zero in the fields the sensor does not observe."""
+        return state_row(self.evaluate(StateTime(array_to_state(state_array), t)))
+
 
 class ActuatorModel(Model):
     def __init__(self, parameters: Parameters) -> None:
@@ -48,6 +60,16 @@ class ActuatorModel(Model):
             parameters (Parameters): parameters for actuator model
         """
         super().__init__(parameters)
+        self._command = ActuatorCommand()
+
+    def command(self, command: ActuatorCommand) -> None:
+        """Latches the latest command from the flight software, used by `evaluate` from the next step on.
+
+        Args:
+            command (ActuatorCommand): the commanded actuations
+        """
+        # every model gets its own copy, which it may update as it performs the command
+        self._command = replace(command)
 
     @abstractmethod
     def evaluate(self, state_time: StateTime) -> Dict[str, Any]:
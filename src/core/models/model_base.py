@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, List, Optional
+import numpy as np
 from core.parameters import Parameters
 
 
@@ -8,6 +9,11 @@ class Model(ABC):
     Abstract Base class for all models this sim uses.
     """
 
+    # fields of the state and derived state the model reads, None if undeclared (it may read any field)
+    inputs: Optional[List[str]] = None
+    # fields the model writes (for environment models, the fields whose derivatives it returns), None if undeclared
+    outputs: Optional[List[str]] = None
+
     def __init__(self, parameters: Parameters) -> None:
         """Model __init__
         All models will be dependent on some parameters, so we load them in
@@ -31,3 +37,23 @@ class Model(ABC):
         Returns:
             _type_: Defined in concrete instantiation of subclasses.
         """
+
+    def evaluate_batch(self, times: np.ndarray, state_matrix: np.ndarray) -> np.ndarray:
+        """Evaluates the model on n states at once, for vectorized consumers such as batched Monte Carlo or
+        post-processing of a run. The columns of the result are defined by each kind of model.
+        The default evaluates the rows one at a time with `_evaluate_row`; models override it with a
+        vectorized version.
+
+        Args:
+            times (np.ndarray): length-n array of times
+            state_matrix (np.ndarray): n-by-len(STATE_ARRAY_ORDER) array, one state array per row
+
+        Returns:
+            np.ndarray: n-by-m array of the outputs of the model for each state
+        """
+        rows = [self._evaluate_row(t, state_array) for t, state_array in zip(times, state_matrix)]
+        return np.array(rows, dtype=np.float64).reshape(len(state_matrix), -1)
+
+    def _evaluate_row(self, t: float, state_array: np.ndarray) -> np.ndarray:
+        """The outputs of the model for a single state, as a row of `evaluate_batch`."""
+        raise NotImplementedError(f"{type(self).__name__} does not support batch evaluation")
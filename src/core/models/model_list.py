@@ -1,18 +1,43 @@
-from typing import Callable, List, Dict
+from typing import Callable, List, Dict, Optional
 import numpy as np
 from core.models.model import ActuatorModel, EnvironmentModel, SensorModel, MODEL_TYPES
 from core.models.gyro_model import GyroModel
-from core.state.state import State, array_to_state
+from core.models.electrolyzer_model import ElectrolysisDynamics, ElectrolyzerModel
+from core.models.thruster_model import ThrusterModel
+from core.command_timeline import CommandTimeline
+from core.integrator.diagnostics import IntegratorDiagnostics
+from core.models.gravity import BodyTable
+from core.models.plan import EvaluationPlan, write_conflicts
+from core.state.state import POSITION_INDICES, STATE_ARRAY_ORDER, STATE_INDEX, VELOCITY_INDICES
 from core.state.statetime import StateTime
 from core.config import Config
-from utils.constants import ModelEnum, State_Type
+from utils.constants import BodyEnum, IntegratorEnum, ModelEnum, PhaseEnum, State_Type
+from utils.log import log
 from core.models.dynamics_model import AttitudeDynamics
 
+
+def commanded_thrust_forces(magnitudes: np.ndarray, velocities: np.ndarray) -> np.ndarray:
+    """n-by-3 thrust forces of the n `magnitudes` (N) along the n-by-3 `velocities`, zero where a velocity is."""
+    speeds = np.linalg.norm(velocities, axis=1)
+    forces = np.zeros_like(velocities, dtype=np.float64)
+    moving = speeds > 0
+    forces[moving] = (magnitudes[moving] / speeds[moving])[:, np.newaxis] * velocities[moving]
+    return forces
+
+
 class PositionDynamics(EnvironmentModel):
-    """The position dynamics model implementation."""
+    """The position dynamics model implementation. The craft is attracted by every body listed in the
+    `gravity_bodies` parameter, and pushed by the thrust commands of the `command_timeline` parameter and by the
+    `force_propulsion_thrusters` of the state, which the `ThrusterModel` sets from the commands of the flight
+    software. The flight software commands no direction, so that thrust is along the velocity."""
+
+    inputs = ["x", "y", "z", "vel_x", "vel_y", "vel_z", "fuel_mass", "force_propulsion_thrusters"]
+    outputs = ["x", "y", "z", "vel_x", "vel_y", "vel_z"]
 
     def __init__(self, parameters) -> None:
         super().__init__(parameters)
+        self.body_table = BodyTable.from_names(self._parameters.gravity_bodies)
+        self.timeline = CommandTimeline.from_parameters(self._parameters)
 
     def evaluate(self, state_time: StateTime) -> Dict[str, State_Type]:
         return super().evaluate(state_time)
@@ -28,28 +53,16 @@ class PositionDynamics(EnvironmentModel):
             Dict[str, State_Type]: The updated vector [v a]
         """
 
-        # Position column vectors from body to the craft
-        r_mc = state_time.derived_state.r_mc
-        r_sc = state_time.derived_state.r_sc
-        r_ec = state_time.derived_state.r_ec
-
-        # Mu values of the body, where mu = G * m_body
-        G = 6.6743e-11
-        mu_moon = G * 7.34767309e22
-        mu_sun = G * 1.988409870698051e30
-        mu_earth = G * 5.972167867791379e24
-        # mu_moon = 0
-        # mu_sun = 0
-
-        # Acceleration column vector calculation
-        a = (
-            # Moon to craft acceleration component
-            mu_moon * r_mc / (np.dot(r_mc, r_mc) ** (3 / 2))
-            # Sun to craft acceleration component
-            + mu_sun * r_sc / (np.dot(r_sc, r_sc) ** (3 / 2))
-            # Earth to craft acceleration component
-            + mu_earth * r_ec / (np.dot(r_ec, r_ec) ** (3 / 2))
-        )
+        a = self.accelerations(state_time).sum(axis=0)
+        state = state_time.state
+        forces = np.zeros((1, 3))
+        if self.timeline:
+            forces += self.timeline.thrust_forces(np.array([state_time.time]))
+        if state.force_propulsion_thrusters:
+            velocity = np.array([[state.vel_x, state.vel_y, state.vel_z]])
+            forces += commanded_thrust_forces(np.array([state.force_propulsion_thrusters]), velocity)
+        if np.any(forces):
+            a = a + self.thrust_accelerations(forces, np.array([state.fuel_mass]))[0]
         return {
             "x": state_time.state.vel_x,
             "y": state_time.state.vel_y,
@@ -59,8 +72,61 @@ class PositionDynamics(EnvironmentModel):
             "vel_z": a[2],
         }
 
+    def accelerations(self, state_time: StateTime) -> np.ndarray:
+        """Computes the gravitational acceleration of the craft towards each body.
+
+        Args:
+            state_time (StateTime): the current state
+
+        Returns:
+            np.ndarray: k-by-3 array of acceleration components, ordered like `body_table.bodies`
+        """
+        r_co = np.array([state_time.state.x, state_time.state.y, state_time.state.z])
+        return self.body_table.accelerations(state_time.time, r_co)
+
+    def evaluate_batch(self, times: np.ndarray, state_matrix: np.ndarray) -> np.ndarray:
+        """The derivatives [v a] of n state arrays, with the ephemeris queried once for all of them."""
+        state_matrix = np.asarray(state_matrix, dtype=np.float64)
+        d_states = np.zeros((len(state_matrix), len(STATE_ARRAY_ORDER)))
+        d_states[:, POSITION_INDICES] = state_matrix[:, VELOCITY_INDICES]
+        accelerations = self.body_table.batch_accelerations(times, state_matrix[:, POSITION_INDICES])
+        d_states[:, VELOCITY_INDICES] = accelerations.sum(axis=1)
+        forces = np.zeros((len(state_matrix), 3))
+        if self.timeline:
+            forces += self.timeline.thrust_forces(times)
+        commanded = state_matrix[:, STATE_INDEX["force_propulsion_thrusters"]]
+        if np.any(commanded):
+            forces += commanded_thrust_forces(commanded, state_matrix[:, VELOCITY_INDICES])
+        if np.any(forces):
+            fuel_mass = state_matrix[:, STATE_INDEX["fuel_mass"]]
+            d_states[:, VELOCITY_INDICES] += self.thrust_accelerations(forces, fuel_mass)
+        return d_states
+
+    def thrust_accelerations(self, forces: np.ndarray, fuel_mass: np.ndarray) -> np.ndarray:
+        """n-by-3 accelerations of the craft under the n-by-3 thrust `forces`, for the craft masses of the
+        `dry_mass` parameter plus `fuel_mass`."""
+        thrusting = np.any(forces != 0, axis=1)
+        mass = self._parameters.dry_mass + np.asarray(fuel_mass, dtype=np.float64)
+        if np.any(mass[thrusting] <= 0):
+            raise ValueError("The craft has no mass to accelerate, set the dry_mass parameter to thrust")
+        accelerations = np.zeros_like(forces)
+        accelerations[thrusting] = forces[thrusting] / mass[thrusting, np.newaxis]
+        return accelerations
+
+    def perturbation_ratio(self, state_time: StateTime) -> float:
+        """The magnitude of the third body accelerations relative to the Earth's gravity."""
+        if BodyEnum.Earth not in self.body_table.bodies:
+            return np.inf
+        a_bodies = self.accelerations(state_time)
+        a_earth = a_bodies[self.body_table.index(BodyEnum.Earth)]
+        a_perturbation = a_bodies.sum(axis=0) - a_earth
+        return np.sqrt(np.dot(a_perturbation, a_perturbation) / np.dot(a_earth, a_earth))
+
 
 class TestModel(EnvironmentModel):
+    inputs = []
+    outputs = ["ang_vel_x", "ang_vel_y", "ang_vel_z", "x", "y", "z"]
+
     def d_state(self, state_time: StateTime) -> Dict[str, State_Type]:
         dx = 0
         dy = 0
@@ -84,6 +150,8 @@ MODEL_DICT: Dict[ModelEnum, MODEL_TYPES] = {
     ModelEnum.AttitudeModel: AttitudeDynamics,
     ModelEnum.PositionModel: PositionDynamics,
     ModelEnum.GyroModel: GyroModel,
+    ModelEnum.ThrusterModel: ThrusterModel,
+    ModelEnum.ElectrolyzerModel: ElectrolyzerModel,
     ModelEnum.UnittestModel: TestModel,
 }
 
@@ -91,33 +159,17 @@ MODEL_DICT: Dict[ModelEnum, MODEL_TYPES] = {
 def build_state_update_function(
     env_models: List[EnvironmentModel],
 ) -> Callable[[float, np.ndarray], np.ndarray]:
-    def update_function(t: float, state_array: np.ndarray) -> np.ndarray:
-        """The function that gets plugged into the integrator and propagates the state.
-        The input to this function is the current state.
-
-        Args:
-            state (np.ndarray): _description_
-
-        Returns:
-            np.ndarray: _description_
-        """
-        propagated_state = State()
-        state_in = StateTime(array_to_state(state_array), t)
-
-        for model in env_models:
-            propagated_state.update(model.evaluate(state_in))
-            
-        
-        # Turn propagated_state into an array so that it can be used in the Callable object
-        propagated_state_array = propagated_state.to_array()
-        return propagated_state_array
-
-    return update_function
+    """The function that gets plugged into the integrator and propagates the state, compiled into an
+    `EvaluationPlan` of the environment models."""
+    return EvaluationPlan(env_models).d_state
 
 
 class ModelContainer:
     def __init__(self, config: Config) -> None:
 
+        # Parameters of the sim, the integrator reads its settings from here.
+        self.parameters = config.param
+
         # Environmental models propagate the state of the spacecraft.
         self.environmental: List[EnvironmentModel] = []
 
@@ -145,6 +197,58 @@ class ModelContainer:
                     f"The type of `{model_name}` is not an expected type: {model}."
                 )
 
-        self.state_update_function: Callable = build_state_update_function(
-            self.environmental
-        )
+        # The commands of the `command_timeline` parameter, the integrator splits its steps at their boundaries.
+        self.timeline = CommandTimeline.from_parameters(self.parameters)
+        if len(self.timeline.electrolysis_start):
+            self.environmental.append(ElectrolysisDynamics(config.param))
+        # the models look the commands up in the same timeline, which the integrator holds on each segment
+        for model in self.environmental:
+            if isinstance(getattr(model, "timeline", None), CommandTimeline):
+                model.timeline = self.timeline
+
+        # The environment models compiled into a pruned, dependency ordered evaluation.
+        self.plan = EvaluationPlan(self.environmental)
+        for group in (self.environmental, self.actuator, self.sensor):
+            for field, names in write_conflicts(group).items():
+                log.warning(f"`{field}` is written by {', '.join(names)}, the last of them wins")
+        update_function = self.plan.d_state
+
+        # Number of evaluations of the state update function, a measure of the cost of the integration.
+        self.rhs_evaluations = 0
+        # nfev, status and step sizes of every solve_ivp call (see core/integrator/diagnostics.py).
+        self.diagnostics = IntegratorDiagnostics()
+
+        # Orbital events found by the integrator so far (see core/integrator/orbital_events.py).
+        self.detected_events: List = []
+
+        def counted_update_function(t: float, state_array: np.ndarray) -> np.ndarray:
+            self.rhs_evaluations += 1
+            return update_function(t, state_array)
+
+        self.state_update_function: Callable = counted_update_function
+
+        def batch_update_function(t: float, state_matrix: np.ndarray) -> np.ndarray:
+            """The derivatives of n state arrays at time `t`, from the `evaluate_batch` of every environment model."""
+            self.rhs_evaluations += len(state_matrix)
+            return self.plan.d_states(np.full(len(state_matrix), t, dtype=np.float64), state_matrix)
+
+        self.batch_update_function: Callable = batch_update_function
+
+        # The step length and the keyword arguments of solve_ivp, from the integrator parameters.
+        self.use_phase(None)
+
+    def use_phase(self, phase: Optional[PhaseEnum]) -> None:
+        """Switches to the integrator settings of a mission phase: its entry in `phase_settings` overrides the
+        `d_t`, `integrator`, `rtol` and `atol` parameters. None selects the parameters themselves."""
+        param = self.parameters
+        settings = {"d_t": param.d_t, "integrator": param.integrator, "rtol": param.rtol, "atol": param.atol}
+        if phase is not None:
+            settings.update(param.phase_settings.get(PhaseEnum(phase).value, {}))
+
+        self.phase = phase
+        self.d_t = settings["d_t"]
+        self.solver_options = {
+            "method": IntegratorEnum(settings["integrator"]).value,
+            "rtol": settings["rtol"],
+            "atol": settings["atol"],
+        }
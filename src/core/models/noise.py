@@ -0,0 +1,57 @@
+"""Seeded, block-generated noise for the sensor models.
+
+Every sensor owns its own `numpy.random.Generator`, seeded from the `seed` parameter and the name of the
+sensor, so a run is reproducible no matter which process (or how many other sensors) it runs alongside.
+"""
+
+from typing import Optional
+from zlib import crc32
+import numpy as np
+
+# number of samples generated at a time
+NOISE_BLOCK_SIZE = 4096
+
+
+class NoiseStream:
+    """A stream of standard normal samples of width `width`, generated `block_size` rows at a time."""
+
+    def __init__(self, seed: Optional[int], stream_name: str, width: int, block_size: int = NOISE_BLOCK_SIZE):
+        """
+        Args:
+            seed (Optional[int]): seed of the run, None draws fresh entropy from the OS
+            stream_name (str): name of the sensor, distinguishes the streams of a run
+            width (int): number of samples per row, e.g. 3 for a 3-axis sensor
+            block_size (int, optional): number of rows generated at a time. Defaults to NOISE_BLOCK_SIZE.
+        """
+        seed_sequence = np.random.SeedSequence(seed, spawn_key=(crc32(stream_name.encode()),))
+        self._rng = np.random.default_rng(seed_sequence)
+        self._width = width
+        self._block_size = block_size
+        self._block = np.empty((0, width))
+        self._index = 0
+
+    def _refill(self) -> None:
+        self._block = self._rng.standard_normal((self._block_size, self._width))
+        self._index = 0
+
+    def next(self) -> np.ndarray:
+        """The next row of samples, a length-`width` array."""
+        if self._index >= len(self._block):
+            self._refill()
+        row = self._block[self._index]
+        self._index += 1
+        return row
+
+    def take(self, n: int) -> np.ndarray:
+        """The next `n` rows of samples, an n-by-`width` array."""
+        rows = []
+        while n > 0:
+            if self._index >= len(self._block):
+                self._refill()
+            count = min(n, len(self._block) - self._index)
+            rows.append(self._block[self._index : self._index + count])
+            self._index += count
+            n -= count
+        if not rows:
+            return np.empty((0, self._width))
+        return np.concatenate(rows)
@@ -0,0 +1,109 @@
+"""Compiled evaluation plan of the environment models.
+
+Every model may declare the fields it reads (`inputs`) and writes (`outputs`). From the declarations, the plan
+keeps only the derived state models whose fields some environment model reads, ordered so that each one runs after
+the models it depends on, and precomputes the indices at which the outputs of each environment model are scattered
+into the derivative vector. A model that declares nothing is assumed to read every field, and its outputs are
+merged by key like before.
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from core.models.derived_models import DERIVED_MODEL_LIST, DerivedStateModel
+from core.models.model_base import Model
+from core.state.derived_state import DerivedState
+from core.state.state import STATE_ARRAY_ORDER, STATE_INDEX, array_to_state
+from core.state.statetime import StateTime
+
+DERIVED_FIELDS = set(DerivedState().__dict__.keys())
+
+
+def write_conflicts(models: Sequence[Model]) -> Dict[str, List[str]]:
+    """The fields declared as outputs by more than one of `models`, and the names of the models writing each."""
+    writers = defaultdict(list)
+    for model in models:
+        for field in model.outputs or []:
+            writers[field].append(type(model).__name__)
+    return {field: names for field, names in writers.items() if len(names) > 1}
+
+
+def required_derived_models(
+    models: Sequence[Model], derived_models: Sequence[DerivedStateModel] = DERIVED_MODEL_LIST
+) -> List[DerivedStateModel]:
+    """The derived state models that `models` depend on, directly or through other derived models, in an order
+    where every derived model comes after the ones whose fields it reads."""
+    producers: Dict[str, DerivedStateModel] = {}
+    for derived_model in derived_models:
+        for field in derived_model.outputs:
+            producers.setdefault(field, derived_model)
+
+    ordered: List[DerivedStateModel] = []
+    visiting: List[DerivedStateModel] = []
+
+    def visit(inputs: Optional[Sequence[str]]) -> None:
+        # undeclared inputs may read any derived field
+        fields = DERIVED_FIELDS if inputs is None else [field for field in inputs if field in DERIVED_FIELDS]
+        for field in sorted(fields):
+            producer = producers.get(field)
+            if producer is None or any(producer is model for model in ordered):
+                continue
+            if any(producer is model for model in visiting):
+                raise ValueError(f"The derived state models depend on each other through `{field}`")
+            visiting.append(producer)
+            visit(producer.inputs)
+            visiting.pop()
+            ordered.append(producer)
+
+    for model in models:
+        visit(model.inputs)
+    return ordered
+
+
+class EvaluationPlan:
+    """The state update function of a list of environment models, compiled from their declared fields.
+
+    Example:
+        plan = EvaluationPlan(models.environmental)
+        d_state_array = plan.d_state(t, state_array)
+    """
+
+    def __init__(
+        self, environmental: Sequence[Model], derived_models: Sequence[DerivedStateModel] = DERIVED_MODEL_LIST
+    ) -> None:
+        self.environmental = list(environmental)
+        # derived state models evaluated before the environment models, the others are skipped
+        self.derived_models = required_derived_models(self.environmental, derived_models)
+        # fields written by more than one environment model, the last one in the list wins
+        self.conflicts = write_conflicts(self.environmental)
+        # indices of the declared outputs of each model in a state array, None if the model declares none
+        self.output_indices: List[Optional[np.ndarray]] = [
+            None if model.outputs is None else np.array([STATE_INDEX[field] for field in model.outputs], dtype=int)
+            for model in self.environmental
+        ]
+
+    def d_state(self, t: float, state_array: np.ndarray) -> np.ndarray:
+        """The derivative of `state_array` at time `t`, zero in the fields no model updates."""
+        state_in = StateTime(array_to_state(state_array), t, DerivedState(), self.derived_models)
+        d_state_array = np.zeros(len(STATE_ARRAY_ORDER))
+        for model, indices in zip(self.environmental, self.output_indices):
+            values = model.evaluate(state_in)
+            if indices is None:
+                for field, value in values.items():
+                    if field in STATE_INDEX:
+                        d_state_array[STATE_INDEX[field]] = value
+            else:
+                d_state_array[indices] = [values[field] for field in model.outputs]
+        return d_state_array
+
+    def d_states(self, times: np.ndarray, state_matrix: np.ndarray) -> np.ndarray:
+        """The derivatives of the n rows of `state_matrix` at `times`, from the `evaluate_batch` of the models.
+        The batch of a model without declared outputs only overwrites the fields where it is non-zero."""
+        d_states = np.zeros((len(state_matrix), len(STATE_ARRAY_ORDER)))
+        for model, indices in zip(self.environmental, self.output_indices):
+            update = model.evaluate_batch(times, state_matrix)
+            if indices is None:
+                d_states = np.where(update != 0, update, d_states)
+            else:
+                d_states[:, indices] = update[:, indices]
+        return d_states
@@ -0,0 +1,26 @@
+from core.models.model import ActuatorModel
+from core.state.statetime import StateTime
+from typing import Dict, Any
+
+
+class ThrusterModel(ActuatorModel):
+    """Applies the commanded thruster and solenoid valve actuations to the state"""
+
+    inputs = []
+    outputs = ["propulsion_on", "solenoid_actuation_on", "force_propulsion_thrusters"]
+
+    def evaluate(self, state_time: StateTime) -> Dict[str, Any]:
+        """Sets the propulsion state according to the latest command
+
+        Args:
+            state_time (StateTime): The input statetime
+
+        Returns:
+            Dict[str, Any]: The thruster force and the state of the thrusters and the solenoid valve
+        """
+        propulsion_on = bool(self._command.propulsion_on)
+        return {
+            "propulsion_on": propulsion_on,
+            "solenoid_actuation_on": bool(self._command.solenoid_actuation_on),
+            "force_propulsion_thrusters": self._parameters.thruster_force if propulsion_on else 0.0,
+        }
@@ -0,0 +1,124 @@
+"""Paces the sim against the wall clock, for flight software testing that needs the sim to run in real time.
+
+The step that ends at sim time t is released at wall time `start + (t - t0) / rate` on a monotonic clock. A step
+that overruns its deadline is counted as a miss; with `catch_up` the following steps run back to back until the sim
+is on schedule again, otherwise the schedule is shifted so that the lost time is never made up.
+"""
+
+from dataclasses import dataclass, field
+import time
+from typing import Callable, Dict, List
+import numpy as np
+from utils.log import log
+
+# seconds before a deadline at which the pacer stops sleeping and spins, sleep() tends to overshoot
+SPIN_WINDOW = 1e-3
+# edges (seconds) of the release jitter histogram
+JITTER_BINS = np.array([0.0, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, np.inf])
+
+
+@dataclass
+class PacingStats:
+    """Per-step compute latency, release jitter of the steps that made their deadline, and the lateness of the
+    steps that did not (all in seconds)."""
+
+    latencies: List[float] = field(default_factory=list)
+    jitters: List[float] = field(default_factory=list)
+    lateness: List[float] = field(default_factory=list)
+
+    @property
+    def misses(self) -> int:
+        return len(self.lateness)
+
+    def jitter_histogram(self) -> np.ndarray:
+        """Number of on-time steps per bin of `JITTER_BINS`."""
+        return np.histogram(self.jitters, JITTER_BINS)[0]
+
+    def summary(self) -> Dict[str, float]:
+        latencies = np.array(self.latencies)
+        summary = {"steps": len(latencies), "misses": self.misses}
+        if len(latencies):
+            summary.update(
+                {
+                    "latency_mean": float(latencies.mean()),
+                    "latency_p99": float(np.percentile(latencies, 99)),
+                    "latency_max": float(latencies.max()),
+                }
+            )
+        if self.jitters:
+            summary["jitter_p99"] = float(np.percentile(self.jitters, 99))
+        if self.lateness:
+            summary["lateness_max"] = float(np.max(self.lateness))
+        return summary
+
+
+class Pacer:
+    """Releases steps at `rate` times the wall clock rate.
+
+    Example:
+        pacer = Pacer(rate=1.0)
+        pacer.start(sim.state_time.time)
+        while sim.should_run:
+            sim.step()
+            pacer.pace(sim.state_time.time)
+        pacer.log_summary()
+    """
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        catch_up: bool = True,
+        clock: Callable[[], float] = time.perf_counter,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """
+        Args:
+            rate (float, optional): sim seconds per wall clock second. Defaults to 1.0.
+            catch_up (bool, optional): whether to make up for overruns by running the next steps early.
+                Defaults to True.
+            clock (Callable[[], float], optional): monotonic clock in seconds. Defaults to time.perf_counter.
+            sleep (Callable[[float], None], optional): sleeps for a number of seconds. Defaults to time.sleep.
+        """
+        if rate <= 0:
+            raise ValueError(f"The pacing rate must be positive, got {rate}")
+        self.rate = rate
+        self.catch_up = catch_up
+        self.stats = PacingStats()
+        self._clock = clock
+        self._sleep = sleep
+        self._wall_start = 0.0
+        self._sim_start = 0.0
+        self._released = 0.0
+
+    def start(self, sim_time: float) -> None:
+        """Anchors the schedule: `sim_time` is now."""
+        self._wall_start = self._released = self._clock()
+        self._sim_start = sim_time
+
+    def pace(self, sim_time: float) -> None:
+        """Called once a step that ends at `sim_time` is computed, returns at its release time."""
+        now = self._clock()
+        self.stats.latencies.append(now - self._released)
+
+        deadline = self._wall_start + (sim_time - self._sim_start) / self.rate
+        if now > deadline:
+            self.stats.lateness.append(now - deadline)
+            if not self.catch_up:
+                self._wall_start += now - deadline
+            self._released = now
+            return
+
+        while now < deadline:
+            # sleep until just before the deadline, then spin, yielding to the other threads
+            remaining = deadline - now
+            self._sleep(remaining - SPIN_WINDOW if remaining > SPIN_WINDOW else 0)
+            now = self._clock()
+        self.stats.jitters.append(now - deadline)
+        self._released = now
+
+    def log_summary(self) -> None:
+        summary = self.stats.summary()
+        log.info(f"Pacing at {self.rate}x real time: {summary}")
+        log.info(f"Release jitter histogram (edges {JITTER_BINS.tolist()} s): {self.stats.jitter_histogram().tolist()}")
+        if self.stats.misses:
+            log.warning(f"{self.stats.misses} of {summary['steps']} steps missed their real time deadline")
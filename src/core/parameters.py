@@ -1,5 +1,6 @@
 import math
 from typing import Dict
+from utils.constants import D_T, IntegratorEnum, PropagatorEnum
 
 
 class Parameters:
@@ -26,6 +27,33 @@ class Parameters:
 
         # sim
         self.max_iter = 1e6
+        # seed of the sensor noise streams, None for a different run every time
+        self.seed = None
+
+        # bodies whose gravity acts on the craft, any of earth, moon, sun, venus, mars and jupiter
+        self.gravity_bodies = ["earth", "moon", "sun"]
+
+        # integrator
+        self.propagator = PropagatorEnum.Cowell
+        # Encke: rectify the reference orbit once |deviation| / |reference position| exceeds this
+        self.rectify_tol = 0.01
+        # Kepler: fast-forward while |Moon + Sun acceleration| / |Earth acceleration| is below this
+        self.kepler_tol = 1e-3
+        # Kepler: longest analytic jump, in seconds
+        self.kepler_max_jump = 3600.0
+        # length of a sim step, in seconds
+        self.d_t = D_T
+        # solve_ivp method of the numerical integration, and its relative and absolute tolerances
+        self.integrator = IntegratorEnum.RK45
+        self.rtol = 1e-3
+        self.atol = 1e-6
+        # integrator settings of each mission phase, e.g. {"near_earth": {"d_t": 10.0, "rtol": 1e-6}}, overriding
+        # d_t, integrator, rtol and atol while the craft is in that phase (see core/phase.py and src/tune.py)
+        self.phase_settings = {}
+        # orbital events to detect during the integration, any of apsides, moon_soi and eclipse
+        self.orbital_events = []
+        # time-tagged thrust, electrolysis and attitude pulse commands (see core/command_timeline.py)
+        self.command_timeline = []
 
         for key, value in param_dict.items():
             if key in self.__dict__.keys():
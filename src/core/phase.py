@@ -0,0 +1,20 @@
+"""Mission phases of a cislunar trajectory. Each phase can have its own integrator settings, see the
+`phase_settings` parameter."""
+
+import numpy as np
+from core.state.state import POSITION_INDICES
+from core.state.statetime import StateTime
+from utils.astropy_util import get_body_position
+from utils.constants import MOON_SOI, NEAR_EARTH_RADIUS, BodyEnum, PhaseEnum
+
+
+def mission_phase(state_time: StateTime) -> PhaseEnum:
+    """The phase of the craft at `state_time`: lunar approach inside the Moon's sphere of influence, near Earth
+    within NEAR_EARTH_RADIUS of the Earth, and cislunar coast anywhere else."""
+    r_craft = state_time.state.to_array()[POSITION_INDICES].astype(np.float64)
+    r_moon = np.array(get_body_position(state_time.time // 1, BodyEnum.Moon))
+    if np.linalg.norm(r_craft - r_moon) < MOON_SOI:
+        return PhaseEnum.LunarApproach
+    if np.linalg.norm(r_craft) < NEAR_EARTH_RADIUS:
+        return PhaseEnum.NearEarth
+    return PhaseEnum.CislunarCoast
@@ -0,0 +1,227 @@
+"""Content-addressed cache of finished sim runs.
+
+A run is keyed by the sha256 of its canonical config (every parameter, including the integrator settings and the
+RNG seed), the sim mode and a hash of the sim source code, so editing a model invalidates every stored run. The
+stored DataFrames live in one pickle file per run and are evicted least recently used first once the cache
+outgrows its size cap.
+
+Every step of a stored run is also a checkpoint. Next to each run the cache keeps its config and its "trunk"
+key, the hash of everything that determines the true trajectory. A config whose trunk matches a stored run shares
+that run's true trajectory up to `shared_prefix_end`, so only the steps after it have to be simulated.
+"""
+
+from functools import lru_cache
+import hashlib
+import json
+import os
+from pathlib import Path
+import tempfile
+from typing import Dict, List, Optional, Tuple, Union
+import pandas as pd
+from core.command_timeline import first_difference
+from core.config import Config
+from core.models.model import SensorModel
+from core.models.model_list import MODEL_DICT
+from core.state.state import State
+from core.state.statetime import StateTime
+from utils.constants import SIM_ROOT, ModelEnum
+from utils.log import log
+
+DEFAULT_CACHE_DIR = SIM_ROOT / "runs" / "cache"
+DEFAULT_CACHE_SIZE = 1 << 30  # bytes
+_SUFFIX = ".pkl"
+_METADATA_SUFFIX = ".json"
+
+# Parameters that change what the sensors report or when the sim stops, but not the true trajectory
+OBSERVATION_PARAMETERS = {"gyro_bias", "gyro_noise", "gyro_sensitivity", "seed"}
+STOP_PARAMETERS = {"max_iter"}
+# Parameters that only change the true trajectory from the time of their first difference on
+TIMELINE_PARAMETERS = {"command_timeline"}
+
+
+@lru_cache(maxsize=1)
+def code_version() -> str:
+    """sha256 of every python source file of the sim."""
+    src = SIM_ROOT / "src"
+    digest = hashlib.sha256()
+    for path in sorted(src.rglob("*.py")):
+        digest.update(path.relative_to(src).as_posix().encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _hash(config_dict: Dict, mode: str) -> str:
+    canonical = json.dumps(
+        {"config": config_dict, "mode": mode, "code": code_version()},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def config_key(config: Config, mode: str = "CislunarSim") -> str:
+    """The cache key of a run of `config` in sim mode `mode` (the name of the sim class)."""
+    return _hash(config.to_dict(), mode)
+
+
+def trunk_dict(config_dict: Dict) -> Dict:
+    """The part of a config (as made by `Config.to_dict`) that determines the true trajectory: everything but
+    the sensor models, the sensor parameters, the stop conditions and the commands, which only make trajectories
+    diverge from the time they differ (see `shared_prefix_end`)."""
+    ignored = OBSERVATION_PARAMETERS | STOP_PARAMETERS | TIMELINE_PARAMETERS
+    return {
+        **config_dict,
+        "parameters": {key: value for key, value in config_dict["parameters"].items() if key not in ignored},
+        "models": [
+            model for model in config_dict["models"] if not issubclass(MODEL_DICT[ModelEnum(model)], SensorModel)
+        ],
+    }
+
+
+def trunk_key(config: Config, mode: str = "CislunarSim") -> str:
+    """Hash of `trunk_dict`, equal for configs that can share true trajectories."""
+    return _hash(trunk_dict(config.to_dict()), mode)
+
+
+def shared_prefix_end(cached_config: Dict, config: Dict) -> float:
+    """The time up to which runs of two configs (as made by `Config.to_dict`) follow the same true trajectory,
+    inf if they never diverge and -inf if they do not share any step."""
+    if trunk_dict(cached_config) != trunk_dict(config):
+        return float("-inf")
+    return first_difference(
+        cached_config["parameters"].get("command_timeline", []), config["parameters"].get("command_timeline", [])
+    )
+
+
+def true_states(run_df: pd.DataFrame, end_time: float = float("inf")) -> List[StateTime]:
+    """Rebuilds the true state of every step of a stored run that ends before `end_time`."""
+    prefix = "true_state.state."
+    columns = [column for column in run_df.columns if column.startswith(prefix)]
+    rows = run_df[run_df["true_state.time"] < end_time]
+
+    states = []
+    for time, row in zip(rows["true_state.time"].tolist(), rows[columns].to_dict("records")):
+        state = State(**{column[len(prefix) :]: value for column, value in row.items()})
+        states.append(StateTime(state, time))
+    return states
+
+
+class RunCache:
+    """An on-disk LRU cache of run DataFrames, capped at `max_bytes`."""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_CACHE_SIZE) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _file(self, key: str) -> Path:
+        return self.path / f"{key}{_SUFFIX}"
+
+    def _metadata_file(self, key: str) -> Path:
+        return self.path / f"{key}{_METADATA_SUFFIX}"
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """The stored run of `key`, or None on a miss."""
+        file = self._file(key)
+        try:
+            run_df = pd.read_pickle(file)
+        except (FileNotFoundError, EOFError):
+            return None
+        # the modification time doubles as the last access time of the LRU
+        os.utime(file)
+        return run_df
+
+    def put(self, key: str, run_df: pd.DataFrame, metadata: Optional[Dict] = None) -> None:
+        """Stores `run_df` under `key`, then evicts old runs until the cache fits in `max_bytes`.
+
+        Args:
+            key (str): the cache key of the run
+            run_df (pd.DataFrame): the run
+            metadata (Optional[Dict], optional): the config and trunk key of the run (see `run_metadata`),
+                which make its steps available as checkpoints to `find_prefix`.
+        """
+        if metadata is not None:
+            self._write(self._metadata_file(key), lambda tmp_name: Path(tmp_name).write_text(json.dumps(metadata)))
+        self._write(self._file(key), run_df.to_pickle)
+        self.evict()
+
+    def _write(self, file: Path, write) -> None:
+        # write to a temporary file first so that concurrent readers never see a partial file
+        fd, tmp_name = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        os.close(fd)
+        try:
+            write(tmp_name)
+            os.replace(tmp_name, file)
+        finally:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+
+    def find_prefix(self, config: Config, mode: str = "CislunarSim") -> Optional[Tuple[pd.DataFrame, float]]:
+        """Finds the stored run that shares the longest true trajectory with a run of `config`.
+
+        Returns:
+            Optional[Tuple[pd.DataFrame, float]]: the stored run and the time up to which its steps can be
+                reused, or None if no stored run shares a step with `config`
+        """
+        config_dict = config.to_dict()
+        trunk = trunk_key(config, mode)
+
+        best = None
+        for metadata_file in self.path.glob(f"*{_METADATA_SUFFIX}"):
+            try:
+                metadata = json.loads(metadata_file.read_text())
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+            if metadata["trunk"] != trunk:
+                continue
+            end = shared_prefix_end(metadata["config"], config_dict)
+            # the run can only be reused up to its last step
+            reusable_end = min(end, metadata["end_time"])
+            if end > config_dict["initial_condition"]["time"] and (best is None or reusable_end > best[2]):
+                best = (metadata_file.stem, end, reusable_end)
+
+        if best is None:
+            return None
+        run_df = self.get(best[0])
+        if run_df is None:
+            return None
+        return run_df, best[1]
+
+    def evict(self) -> None:
+        """Removes the least recently used runs until the cache fits in `max_bytes`."""
+        entries = []
+        for file in self.path.glob(f"*{_SUFFIX}"):
+            try:
+                stat = file.stat()
+            except FileNotFoundError:  # evicted by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, file in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            for evicted in (file, file.with_suffix(_METADATA_SUFFIX)):
+                try:
+                    evicted.unlink()
+                except FileNotFoundError:
+                    pass
+            total -= size
+            log.debug(f"Evicted cached run {file.stem}")
+
+    def size(self) -> int:
+        """Total size of the stored runs in bytes."""
+        return sum(file.stat().st_size for file in self.path.glob(f"*{_SUFFIX}"))
+
+    def clear(self) -> None:
+        for file in [*self.path.glob(f"*{_SUFFIX}"), *self.path.glob(f"*{_METADATA_SUFFIX}")]:
+            file.unlink()
+
+
+def run_metadata(config: Config, run_df: pd.DataFrame, mode: str = "CislunarSim") -> Dict:
+    """The metadata `RunCache.find_prefix` needs to reuse the steps of `run_df`, a run of `config`."""
+    return {
+        "trunk": trunk_key(config, mode),
+        "config": config.to_dict(),
+        "end_time": float(run_df["true_state.time"].iloc[-1]),
+    }
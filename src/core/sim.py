@@ -1,12 +1,17 @@
 from queue import Queue
+from typing import Iterable, List, Optional
 import numpy as np
 from core.config import Config
+from core.state.command import ActuatorCommand
 from core.state.state import ObservedState
 from core.state.statetime import StateTime, PropagatedOutput
 from core.models.model_list import ModelContainer
 from utils.log import log
-from utils.constants import R_EARTH, EARTH_SOI
-from core.event import Event, NormalEvent
+from utils.constants import R_EARTH, EARTH_SOI, MAX_RUN_DURATION, PropagatorEnum
+from core.integrator.fast_forward import can_fast_forward
+from core.integrator.orbital_events import OrbitalEvent
+from core.phase import mission_phase
+from core.event import Event, NormalEvent, observe
 from multiprocessing import shared_memory
 from sys import getsizeof
 from utils.constants import SHRD_MEM_NAME
@@ -16,8 +21,15 @@ class CislunarSim:
     stepping the sim and checking stop conditions.
     """
 
-    def __init__(self, config: Config) -> None:
+    def __init__(self, config: Config, shm_name: Optional[str] = SHRD_MEM_NAME) -> None:
+        """
+        Args:
+            config (Config): the config to simulate
+            shm_name (Optional[str], optional): name of the shared memory the observed state is published to.
+                None disables publishing, e.g. when several sims run in parallel. Defaults to SHRD_MEM_NAME.
+        """
         self._config = config
+        self._shm_name = shm_name
         self._models = ModelContainer(self._config) #wouldn't need for event-based
         self.state_time: StateTime = self._config.init_cond
         self.observed_state = ObservedState()
@@ -29,27 +41,86 @@ class CislunarSim:
     def step(self) -> PropagatedOutput:
         """step() is the combined true and observed state after one step."""
 
-        event = NormalEvent(self._models)
+        event = NormalEvent(self._models, self.step_size())
         self.event_queue.put(event)
 
         current_event = self.event_queue.get()
         self.state_time, self.observed_state = current_event.evaluate(self.state_time)
-        # Feed the current observed state of the simulator into the shared memory.
+        if self._shm_name is not None:
+            self.publish_observed_state()
+        # check if we should stop the sim
+        self.should_run = not (self.should_stop())
+        self.num_iters += 1
+
+        log.debug(self.state_time)
+        return PropagatedOutput(self.state_time, self.observed_state)
+
+    @property
+    def models(self) -> ModelContainer:
+        return self._models
+
+    @property
+    def events(self) -> List[OrbitalEvent]:
+        """The orbital events detected so far, see the `orbital_events` parameter."""
+        return self._models.detected_events
+
+    def replay(self, true_states: Iterable[StateTime], events: Iterable[OrbitalEvent] = ()) -> List[PropagatedOutput]:
+        """Fast-forwards the sim through the true states of a stored run instead of propagating them. Only
+        the sensor models are evaluated, so the outputs match those of `step` as long as the stored states
+        come from a run with the same dynamics. Stops early if a stop condition is met.
+
+        Args:
+            true_states (Iterable[StateTime]): consecutive true states, the first one a step after the
+                initial condition
+            events (Iterable[OrbitalEvent], optional): the orbital events the stored run detected up to the
+                last of `true_states`. Defaults to none.
+
+        Returns:
+            List[PropagatedOutput]: the output of each replayed step
+        """
+        self._models.detected_events.extend(events)
+        outputs = []
+        for state_time in true_states:
+            if not self.should_run:
+                break
+            self.state_time = state_time
+            self.observed_state = observe(self._models, state_time)
+            self.should_run = not (self.should_stop())
+            self.num_iters += 1
+            outputs.append(PropagatedOutput(self.state_time, self.observed_state))
+        return outputs
+
+    def apply_command(self, command: ActuatorCommand) -> None:
+        """Passes a command from the flight software on to the actuator models, which apply it from the next step on."""
+        for actuator_model in self._models.actuator:
+            actuator_model.command(command)
+
+    def publish_observed_state(self) -> None:
+        """Feeds the current observed state of the simulator into the shared memory."""
         observed_array = self.observed_state.to_array()
         try:
-            shm = shared_memory.SharedMemory(name=SHRD_MEM_NAME) 
+            shm = shared_memory.SharedMemory(name=self._shm_name)
         except (FileNotFoundError) as e:
             log.warn(e)
             log.warn("Shared Memory likely closed by external process. Recreating with current data.")
-            shm = shared_memory.SharedMemory(create=True, name=SHRD_MEM_NAME, size=getsizeof(observed_array))
+            shm = shared_memory.SharedMemory(create=True, name=self._shm_name, size=getsizeof(observed_array))
         state_array = np.ndarray(observed_array.shape, dtype=observed_array.dtype, buffer=shm.buf)
         state_array[:] = observed_array[:]
-        # check if we should stop the sim
-        self.should_run = not (self.should_stop())
-        self.num_iters += 1
 
-        log.debug(self.state_time)
-        return PropagatedOutput(self.state_time, self.observed_state)
+    def step_size(self) -> float:
+        """The length of the next step. The Kepler propagator jumps `kepler_max_jump` seconds at a time while
+        the third body perturbations are negligible, otherwise every step is `d_t` seconds long, or as long as
+        the `phase_settings` of the current mission phase say. Switches the integrator to the settings of the
+        phase whenever it changes."""
+        param = self._config.param
+        if param.phase_settings:
+            phase = mission_phase(self.state_time)
+            if phase != self._models.phase:
+                log.info(f"Entering the {phase.value} phase at t={self.state_time.time}")
+                self._models.use_phase(phase)
+        if param.propagator == PropagatorEnum.Kepler and can_fast_forward(self._models, self.state_time):
+            return param.kepler_max_jump
+        return self._models.d_t
 
     def should_stop(self) -> bool:
         """Returns true if our state reaches a condition that should stop the sim
@@ -70,9 +141,9 @@ class CislunarSim:
             log.error("Stopping sim because it's running too long")
             return True
 
-        if (self.state_time.time - self._config.init_cond.time) > 6.312e7:
+        if (self.state_time.time - self._config.init_cond.time) > MAX_RUN_DURATION:
             log.error("Stopping sim because two years have passed")
-            log.debug(f"Elapsed time = {int(self.state_time.time - self._config.init_cond.time)}s > 6.312e7")
+            log.debug(f"Elapsed time = {int(self.state_time.time - self._config.init_cond.time)}s > {MAX_RUN_DURATION}")
             return True
         
         r_e = (state.x**2 + state.y**2 + state.z**2) ** 0.5
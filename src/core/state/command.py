@@ -0,0 +1,14 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class ActuatorCommand:
+    """This is a container class for the actuations the flight software commands. Actuator models hold on to the
+    latest command until a new one arrives."""
+
+    # fire the thrusters
+    propulsion_on: bool = False
+    # open the solenoid valve
+    solenoid_actuation_on: bool = False
+    # seconds of electrolysis to run, consumed by the electrolyzer once it is performed
+    electrolysis_duration: float = 0.0
@@ -72,6 +72,22 @@ class State:
 
 
 STATE_ARRAY_ORDER = list(State().__dict__.keys())
+STATE_INDEX = {field: index for index, field in enumerate(STATE_ARRAY_ORDER)}
+
+# Indices of the position and velocity fields in a state array
+POSITION_INDICES = [STATE_ARRAY_ORDER.index(field) for field in ("x", "y", "z")]
+VELOCITY_INDICES = [STATE_ARRAY_ORDER.index(field) for field in ("vel_x", "vel_y", "vel_z")]
+ANGULAR_VELOCITY_INDICES = [STATE_ARRAY_ORDER.index(field) for field in ("ang_vel_x", "ang_vel_y", "ang_vel_z")]
+QUATERNION_INDICES = [STATE_ARRAY_ORDER.index(field) for field in ("quat_v1", "quat_v2", "quat_v3", "quat_r")]
+
+
+def state_row(values: Dict[str, State_Type]) -> np.ndarray:
+    """A state array that holds `values` in their fields and zero in every other field."""
+    row = np.zeros(len(STATE_ARRAY_ORDER))
+    for key, value in values.items():
+        if key in STATE_INDEX:
+            row[STATE_INDEX[key]] = value
+    return row
 
 
 def array_to_state(values: np.ndarray) -> State:
@@ -1,9 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import InitVar, dataclass
 from core.state.state import State, ObservedState
 from core.state.derived_state import DerivedState
-from core.models.derived_models import DERIVED_MODEL_LIST
+from core.models.derived_models import DERIVED_MODEL_LIST, DerivedStateModel
 from utils.constants import State_Type
-from typing import Dict, Union
+from typing import Dict, Optional, Sequence, Union
 
 
 @dataclass
@@ -13,9 +13,11 @@ class StateTime:
     state: State = State()
     time: float = 0.0
     derived_state: DerivedState = DerivedState()
+    # derived state models evaluated on creation, None evaluates all of DERIVED_MODEL_LIST
+    derived_models: InitVar[Optional[Sequence[DerivedStateModel]]] = None
 
-    def __post_init__(self):
-        for derived_state_model in DERIVED_MODEL_LIST:
+    def __post_init__(self, derived_models: Optional[Sequence[DerivedStateModel]]):
+        for derived_state_model in DERIVED_MODEL_LIST if derived_models is None else derived_models:
             self.update_derived(derived_state_model.evaluate(self.time, self.state))
 
     @classmethod
@@ -29,12 +31,10 @@ class StateTime:
         Returns:
             StateTime: _description_
         """
-        try:
-            time = statetime_dict.pop("time")
-        except KeyError:
-            time = 0.0
+        state_dict = dict(statetime_dict)
+        time = state_dict.pop("time", 0.0)
 
-        return cls(State(**statetime_dict), time=time)
+        return cls(State(**state_dict), time=time)
 
     def update(self, state_dict: Dict[str, Union[int, float, bool]]) -> None:
         """update() is a procedure that updates the fields of the state with specified key/value pairs in state_dict.
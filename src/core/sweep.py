@@ -0,0 +1,214 @@
+"""Parameter sweeps: sample plans over ranges of `Parameters` and `initial_condition` fields, run in parallel,
+summarized into one tidy results table.
+
+Example:
+    sweep = Sweep(
+        Config.make_config("configs/tli.json"),
+        [SweepRange("vel_x", -540.0, -530.0), SweepRange("gyro_sensitivity", 1e-4, 1e-3)],
+        metrics={"final_radius": final_radius},
+        method=SamplingEnum.Sobol,
+        n_samples=64,
+    )
+    results = sweep.run()
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import itertools
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from scipy.stats import qmc
+from core.config import Config
+from core.parameters import Parameters
+from core.sim import CislunarSim
+from core.state.state import STATE_ARRAY_ORDER
+from utils.constants import StringEnum
+from utils.data_handling import states_to_df
+from utils.log import log
+
+# A summary metric maps the DataFrame of one run to a number
+Metric = Callable[[pd.DataFrame], float]
+
+# "gyro_bias[1]" addresses one element of a list parameter
+_INDEXED_FIELD = re.compile(r"^(\w+)\[(\d+)\]$")
+
+
+class SamplingEnum(StringEnum):
+    Grid = "grid"
+    LatinHypercube = "lhs"
+    Sobol = "sobol"
+
+
+@dataclass
+class SweepRange:
+    """The range of values a field is swept over. `field` is the name of a `Parameters` field or an
+    `initial_condition` field, or an element of a list parameter such as "gyro_bias[1]"."""
+
+    field: str
+    low: float
+    high: float
+    # number of evenly spaced values, only used by grid sampling
+    levels: int = 3
+
+
+def make_plan(
+    ranges: Sequence[SweepRange],
+    method: SamplingEnum = SamplingEnum.Grid,
+    n_samples: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> pd.DataFrame:
+    """Generates a sample plan over `ranges`.
+
+    Args:
+        ranges (Sequence[SweepRange]): the fields to sweep and their ranges
+        method (SamplingEnum, optional): full grid, Latin hypercube or (scrambled) Sobol sampling. Defaults to grid.
+        n_samples (Optional[int], optional): number of samples for Latin hypercube and Sobol sampling. Sobol
+            sampling is best balanced when this is a power of 2. Ignored by grid sampling.
+        seed (Optional[int], optional): seed of the Latin hypercube and Sobol samplers.
+
+    Returns:
+        pd.DataFrame: one row per sample, one column per field
+    """
+    fields = [sweep_range.field for sweep_range in ranges]
+    low = np.array([sweep_range.low for sweep_range in ranges], dtype=np.float64)
+    high = np.array([sweep_range.high for sweep_range in ranges], dtype=np.float64)
+
+    if method == SamplingEnum.Grid:
+        axes = [np.linspace(r.low, r.high, r.levels) for r in ranges]
+        return pd.DataFrame(list(itertools.product(*axes)), columns=fields)
+
+    if n_samples is None:
+        raise ValueError(f"{method} sampling needs n_samples.")
+    if method == SamplingEnum.LatinHypercube:
+        unit_samples = qmc.LatinHypercube(d=len(ranges), seed=seed).random(n_samples)
+    elif method == SamplingEnum.Sobol:
+        sampler = qmc.Sobol(d=len(ranges), seed=seed)
+        m = int(np.log2(n_samples))
+        if 2 ** m == n_samples:
+            unit_samples = sampler.random_base2(m)
+        else:
+            unit_samples = sampler.random(n_samples)
+    else:
+        raise ValueError(f"Unknown sampling method: {method}")
+
+    return pd.DataFrame(qmc.scale(unit_samples, low, high), columns=fields)
+
+
+def apply_sample(config_dict: Dict, sample: Dict[str, float]) -> Dict:
+    """Returns a copy of `config_dict` (as made by `Config.to_dict`) with the fields of `sample` replaced."""
+    new_dict = {
+        **config_dict,
+        "parameters": dict(config_dict["parameters"]),
+        "initial_condition": dict(config_dict["initial_condition"]),
+    }
+    parameter_fields = Parameters().__dict__.keys()
+
+    for field, value in sample.items():
+        indexed = _INDEXED_FIELD.match(field)
+        if indexed is not None:
+            name, index = indexed.group(1), int(indexed.group(2))
+            if name not in parameter_fields:
+                raise ValueError(f"`{name}` is not a list parameter.")
+            new_list = list(new_dict["parameters"][name])
+            new_list[index] = value
+            new_dict["parameters"][name] = new_list
+        elif field in parameter_fields:
+            new_dict["parameters"][field] = value
+        elif field in STATE_ARRAY_ORDER or field == "time":
+            new_dict["initial_condition"][field] = value
+        else:
+            raise ValueError(f"`{field}` is neither a parameter nor an initial condition.")
+
+    return new_dict
+
+
+def run_config(config: Config) -> pd.DataFrame:
+    """Runs a sim of `config` to completion without publishing to shared memory. An exception in a step is
+    raised, rather than cutting the run short."""
+    sim = CislunarSim(config, shm_name=None)
+    states = []
+    while sim.should_run:
+        states.append(sim.step())
+    return states_to_df(states)
+
+
+def _run_sample(job: Tuple[Dict, Dict[str, Metric]]) -> Dict[str, float]:
+    config_dict, metrics = job
+    try:
+        run_df = run_config(Config(**config_dict))
+        return {name: metric(run_df) for name, metric in metrics.items()}
+    except Exception as e:
+        log.error(f"Sweep sample failed: {e}")
+        return {name: np.nan for name in metrics}
+
+
+class Sweep:
+    """Runs a sim for every sample of a plan over `ranges` around `base_config`."""
+
+    def __init__(
+        self,
+        base_config: Config,
+        ranges: Sequence[SweepRange],
+        metrics: Dict[str, Metric],
+        method: SamplingEnum = SamplingEnum.Grid,
+        n_samples: Optional[int] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            base_config (Config): the config every sample starts from
+            ranges (Sequence[SweepRange]): the fields to sweep and their ranges
+            metrics (Dict[str, Metric]): summary metrics computed from the DataFrame of each run. They must be
+                picklable (e.g. module level functions) to run in parallel.
+            method (SamplingEnum, optional): sampling method of the plan. Defaults to grid.
+            n_samples (Optional[int], optional): number of samples, for Latin hypercube and Sobol sampling.
+            seed (Optional[int], optional): seed of the sampler.
+        """
+        self.base_config = base_config
+        self.metrics = metrics
+        self.plan = make_plan(ranges, method, n_samples, seed)
+
+    def config_dicts(self) -> List[Dict]:
+        base_dict = self.base_config.to_dict()
+        return [apply_sample(base_dict, sample) for sample in self.plan.to_dict("records")]
+
+    def run(self, processes: Optional[int] = None) -> pd.DataFrame:
+        """Runs every sample of the plan.
+
+        Args:
+            processes (Optional[int], optional): number of worker processes, 1 runs the samples in this process.
+                Defaults to the number of CPUs.
+
+        Returns:
+            pd.DataFrame: the plan with one extra column per metric
+        """
+        jobs = [(config_dict, self.metrics) for config_dict in self.config_dicts()]
+        log.info(f"Running a sweep of {len(jobs)} sims")
+
+        if processes == 1:
+            results = [_run_sample(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                results = list(executor.map(_run_sample, jobs))
+
+        return pd.concat([self.plan, pd.DataFrame(results, index=self.plan.index)], axis=1)
+
+
+def final_radius(run_df: pd.DataFrame) -> float:
+    """Distance from the Earth at the end of the run."""
+    last = run_df.iloc[-1]
+    return float(np.linalg.norm([last["true_state.state.x"], last["true_state.state.y"], last["true_state.state.z"]]))
+
+
+def min_radius(run_df: pd.DataFrame) -> float:
+    """Closest distance to the Earth during the run."""
+    positions = run_df[["true_state.state.x", "true_state.state.y", "true_state.state.z"]].to_numpy()
+    return float(np.min(np.linalg.norm(positions, axis=1)))
+
+
+def duration(run_df: pd.DataFrame) -> float:
+    """Simulated time from the first to the last step of the run."""
+    times = run_df["true_state.time"].to_numpy()
+    return float(times[-1] - times[0])
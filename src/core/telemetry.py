@@ -0,0 +1,277 @@
+"""Streams the output of the sim to local subscribers over TCP or UNIX sockets.
+
+The server runs an asyncio event loop in a background thread, so publishing a step never waits on a client. Every
+subscriber has its own bounded queue; when a client falls behind, its oldest frames are dropped instead of
+stalling the sim or the other clients.
+
+Wire format (all little endian):
+    subscribe request, client to server: magic b"CLTM", version (u8), kinds (u8 bitmask of 1 << FrameKind),
+        decimation (u16, every n-th step is sent)
+    frame, server to client: body length (u32), version (u8), kind (u8), step (u32), time (f64), value count
+        (u16), then the body. The body of a data frame is `count` float64 values in the field order announced
+        by the hello frame, the body of the hello frame is a utf-8 json object {"version", "fields"}.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from enum import IntEnum
+import json
+import os
+import struct
+import threading
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from core.state.state import STATE_ARRAY_ORDER
+from core.state.statetime import PropagatedOutput
+from utils.log import log
+
+TELEMETRY_VERSION = 1
+TELEMETRY_MAGIC = b"CLTM"
+DEFAULT_TELEMETRY_ADDRESS = "tcp://127.0.0.1:5760"
+# frames buffered per client before the oldest ones are dropped
+DEFAULT_QUEUE_SIZE = 256
+# seconds the clients get to receive their queued frames when the server stops
+STOP_TIMEOUT = 1.0
+
+SUBSCRIBE = struct.Struct("<4sBBH")
+FRAME_LENGTH = struct.Struct("<I")
+FRAME_HEADER = struct.Struct("<BBIdH")
+
+
+class FrameKind(IntEnum):
+    Hello = 0
+    # the observed state of a step
+    Observed = 1
+    # the true state followed by the observed state of a step
+    Propagated = 2
+
+
+FRAME_FIELDS: Dict[FrameKind, List[str]] = {
+    FrameKind.Observed: [f"observed_state.{field}" for field in STATE_ARRAY_ORDER],
+    FrameKind.Propagated: [f"true_state.state.{field}" for field in STATE_ARRAY_ORDER]
+    + [f"observed_state.{field}" for field in STATE_ARRAY_ORDER],
+}
+
+
+@dataclass
+class TelemetryFrame:
+    """A decoded frame. `values` holds the float64 values of a data frame, `info` the content of a hello frame."""
+
+    kind: FrameKind
+    step: int
+    time: float
+    values: Optional[np.ndarray] = None
+    info: Optional[Dict] = None
+
+
+def parse_address(address: str) -> Tuple[str, str, Optional[int]]:
+    """Splits "tcp://host:port" or "unix:///path/to/socket" into (scheme, host or path, port)."""
+    scheme, sep, rest = address.partition("://")
+    if sep and scheme == "unix":
+        return scheme, rest, None
+    if sep and scheme == "tcp":
+        host, _, port = rest.rpartition(":")
+        return scheme, host, int(port)
+    raise ValueError(f"Telemetry address must look like tcp://host:port or unix:///path: {address}")
+
+
+def encode_frame(kind: FrameKind, step: int, time: float, values: np.ndarray) -> bytes:
+    body = np.ascontiguousarray(values, dtype="<f8").tobytes()
+    header = FRAME_HEADER.pack(TELEMETRY_VERSION, kind, step & 0xFFFFFFFF, time, len(values))
+    return FRAME_LENGTH.pack(len(body)) + header + body
+
+
+def encode_hello() -> bytes:
+    fields = {kind.name.lower(): names for kind, names in FRAME_FIELDS.items()}
+    info = {"version": TELEMETRY_VERSION, "fields": fields}
+    body = json.dumps(info).encode()
+    return FRAME_LENGTH.pack(len(body)) + FRAME_HEADER.pack(TELEMETRY_VERSION, FrameKind.Hello, 0, 0.0, 0) + body
+
+
+async def read_frame(reader: asyncio.StreamReader) -> TelemetryFrame:
+    """Reads and decodes the next frame, raises `asyncio.IncompleteReadError` once the server closes."""
+    (length,) = FRAME_LENGTH.unpack(await reader.readexactly(FRAME_LENGTH.size))
+    version, kind, step, time, count = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    body = await reader.readexactly(length)
+    if version != TELEMETRY_VERSION:
+        raise ValueError(f"Unsupported telemetry version {version}")
+    if kind == FrameKind.Hello:
+        return TelemetryFrame(FrameKind.Hello, step, time, info=json.loads(body))
+    return TelemetryFrame(FrameKind(kind), step, time, values=np.frombuffer(body, dtype="<f8", count=count))
+
+
+async def subscribe(
+    address: str, kinds: Sequence[FrameKind] = (FrameKind.Observed,), decimation: int = 1
+) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Connects to a telemetry server and subscribes to `kinds`, receiving every `decimation`-th step. The first
+    frame read from the returned reader is the hello frame."""
+    scheme, host, port = parse_address(address)
+    if scheme == "unix":
+        reader, writer = await asyncio.open_unix_connection(host)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    mask = sum(1 << kind for kind in kinds)
+    writer.write(SUBSCRIBE.pack(TELEMETRY_MAGIC, TELEMETRY_VERSION, mask, decimation))
+    await writer.drain()
+    return reader, writer
+
+
+class _Client:
+    def __init__(self, writer: asyncio.StreamWriter, kinds: int, decimation: int, queue_size: int) -> None:
+        self.writer = writer
+        self.kinds = kinds
+        self.decimation = max(decimation, 1)
+        # None marks the end of the stream
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(queue_size)
+        self.dropped = 0
+        self.task = asyncio.current_task()
+
+    def wants(self, kind: FrameKind, step: int) -> bool:
+        return bool(self.kinds & (1 << kind)) and step % self.decimation == 0
+
+    def offer(self, frame: Optional[bytes]) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(frame)
+
+
+class TelemetryServer:
+    """Publishes the output of every step to the subscribed clients.
+
+    Example:
+        server = TelemetryServer("unix:///tmp/cislunarsim.sock")
+        server.start()
+        ...
+        server.publish(sim.step())
+        ...
+        server.stop()
+    """
+
+    def __init__(self, address: str = DEFAULT_TELEMETRY_ADDRESS, queue_size: int = DEFAULT_QUEUE_SIZE) -> None:
+        self.address = address
+        self.queue_size = queue_size
+        self._scheme, self._host, self._port = parse_address(address)
+        self._clients: Set[_Client] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._stopped: Optional[asyncio.Event] = None
+        self._step = 0
+
+    def start(self) -> None:
+        """Starts listening in a background thread, returns once clients can connect."""
+        self._thread = threading.Thread(target=self._serve, name="telemetry", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._server is None:
+            raise RuntimeError(f"Could not start the telemetry server on {self.address}")
+
+    def stop(self) -> None:
+        """Sends the clients their queued frames (for up to STOP_TIMEOUT seconds), disconnects them and stops the
+        background thread."""
+        if self._loop is not None and self._stopped is not None and not self._loop.is_closed():
+            try:
+                self._loop.call_soon_threadsafe(self._stopped.set)
+            except RuntimeError:
+                # the server failed to listen, and the loop closed, in the meantime
+                pass
+        if self._thread is not None:
+            self._thread.join()
+
+    @property
+    def dropped(self) -> int:
+        """Number of frames dropped for the connected clients that fell behind."""
+        return sum(client.dropped for client in list(self._clients))
+
+    def publish(self, output: PropagatedOutput) -> None:
+        """Queues the output of a step for the subscribed clients, without waiting for any of them."""
+        step = self._step
+        self._step += 1
+        if self._loop is None or not self._clients:
+            return
+
+        frames = {}
+        clients = list(self._clients)
+        if any(client.wants(FrameKind.Observed, step) for client in clients):
+            observed = output.observed_state.to_array()
+            frames[FrameKind.Observed] = encode_frame(FrameKind.Observed, step, output.true_state.time, observed)
+        if any(client.wants(FrameKind.Propagated, step) for client in clients):
+            values = np.concatenate([output.true_state.state.to_array(), output.observed_state.to_array()])
+            frames[FrameKind.Propagated] = encode_frame(FrameKind.Propagated, step, output.true_state.time, values)
+        if frames:
+            self._loop.call_soon_threadsafe(self._broadcast, step, frames)
+
+    def _broadcast(self, step: int, frames: Dict[FrameKind, bytes]) -> None:
+        for client in self._clients:
+            for kind, frame in frames.items():
+                if client.wants(kind, step):
+                    client.offer(frame)
+
+    def _serve(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._main())
+        finally:
+            self._loop.close()
+            # the path may belong to another process listening on it, if binding failed
+            if self._scheme == "unix" and self._server is not None and os.path.exists(self._host):
+                os.remove(self._host)
+
+    async def _main(self) -> None:
+        self._stopped = asyncio.Event()
+        try:
+            if self._scheme == "unix":
+                self._server = await asyncio.start_unix_server(self._handle, self._host)
+            else:
+                self._server = await asyncio.start_server(self._handle, self._host, self._port)
+                if self._port == 0:
+                    self._port = self._server.sockets[0].getsockname()[1]
+                    self.address = f"tcp://{self._host}:{self._port}"
+        except OSError as e:
+            log.error(f"Telemetry server failed to listen on {self.address}: {e}")
+            return
+        finally:
+            self._ready.set()
+
+        log.info(f"Telemetry server listening on {self.address}")
+        async with self._server:
+            await self._stopped.wait()
+            tasks = [client.task for client in self._clients if client.task is not None]
+            for client in self._clients:
+                client.offer(None)
+            if tasks:
+                _, pending = await asyncio.wait(tasks, timeout=STOP_TIMEOUT)
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            magic, version, kinds, decimation = SUBSCRIBE.unpack(await reader.readexactly(SUBSCRIBE.size))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        if magic != TELEMETRY_MAGIC or version != TELEMETRY_VERSION:
+            log.warning(f"Rejected telemetry client with magic {magic!r} and version {version}")
+            writer.close()
+            return
+
+        client = _Client(writer, kinds, decimation, self.queue_size)
+        self._clients.add(client)
+        try:
+            writer.write(encode_hello())
+            while True:
+                frame = await client.queue.get()
+                if frame is None:
+                    break
+                writer.write(frame)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._clients.discard(client)
+            if client.dropped:
+                log.warning(f"Telemetry client disconnected after {client.dropped} dropped frames")
+            writer.close()
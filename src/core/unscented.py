@@ -0,0 +1,134 @@
+"""Unscented-transform propagation of the uncertainty in the initial condition.
+
+Instead of running thousands of Monte Carlo trajectories, 2n+1 sigma points are drawn around the
+initial condition from its covariance, propagated together as one batch through the environment models,
+and recombined into a mean and covariance after every step.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from core.config import Config
+from core.integrator.integrator import propagate_batch
+from core.sim import CislunarSim
+from core.state.state import STATE_ARRAY_ORDER, array_to_state
+from core.state.statetime import StateTime
+from utils.constants import PropagatorEnum
+
+
+@dataclass
+class UnscentedOutput:
+    """Container class for the mean state and the covariance of the sigma points after one step."""
+
+    mean_state: StateTime
+    # covariance entries keyed by "field_a,field_b", upper triangle only
+    covariance: Dict[str, float]
+
+
+def sigma_points(
+    mean: np.ndarray, covariance: np.ndarray, alpha: float = 1.0, beta: float = 2.0, kappa: float = 0.0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Generates the 2n+1 scaled sigma points of the unscented transform (Wan and van der Merwe, 2000).
+
+    Args:
+        mean (np.ndarray): length-n mean vector
+        covariance (np.ndarray): n-by-n covariance matrix
+        alpha (float, optional): spread of the sigma points around the mean. Defaults to 1.0.
+        beta (float, optional): prior knowledge of the distribution, 2 is optimal for gaussians. Defaults to 2.0.
+        kappa (float, optional): secondary scaling parameter. Defaults to 0.0.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: (2n+1)-by-n sigma points, and their mean and covariance weights
+    """
+    n = len(mean)
+    lam = alpha ** 2 * (n + kappa) - n
+    sqrt_cov = np.linalg.cholesky((n + lam) * covariance)  # lower triangular, columns are the offsets
+
+    points = np.empty((2 * n + 1, n))
+    points[0] = mean
+    points[1 : n + 1] = mean + sqrt_cov.T
+    points[n + 1 :] = mean - sqrt_cov.T
+
+    mean_weights = np.full(2 * n + 1, 1 / (2 * (n + lam)))
+    mean_weights[0] = lam / (n + lam)
+    cov_weights = mean_weights.copy()
+    cov_weights[0] += 1 - alpha ** 2 + beta
+
+    return points, mean_weights, cov_weights
+
+
+def unscented_transform(
+    points: np.ndarray, mean_weights: np.ndarray, cov_weights: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Recombines propagated sigma points into a mean and covariance.
+
+    Args:
+        points (np.ndarray): (2n+1)-by-n propagated sigma points
+        mean_weights (np.ndarray): weights used for the mean
+        cov_weights (np.ndarray): weights used for the covariance
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: the length-n mean and n-by-n covariance
+    """
+    mean = mean_weights @ points
+    residuals = points - mean
+    covariance = (cov_weights * residuals.T) @ residuals
+    return mean, covariance
+
+
+class UnscentedSim(CislunarSim):
+    """Propagates the sigma points of `config.init_cov` instead of a single trajectory.
+    `state_time` always holds the mean state, so the usual stop conditions apply to the mean.
+    """
+
+    def __init__(self, config: Config, dt: Optional[float] = None) -> None:
+        super().__init__(config, shm_name=None)
+        if config.init_cov is None:
+            raise ValueError("The unscented propagation mode needs an initial_covariance in the config.")
+        # the sigma points are integrated together with Cowell's method at a fixed d_t, see `propagate_batch`
+        param = config.param
+        if PropagatorEnum(param.propagator) != PropagatorEnum.Cowell:
+            raise ValueError(f"The unscented propagation mode does not support the {PropagatorEnum(param.propagator).value} propagator.")
+        if param.phase_settings:
+            raise ValueError("The unscented propagation mode does not support phase_settings.")
+        if param.orbital_events:
+            raise ValueError("The unscented propagation mode does not detect orbital_events.")
+
+        self.dt = config.param.d_t if dt is None else dt
+        self.fields: List[str] = list(config.init_cov["fields"])
+        self.covariance = np.array(config.init_cov["matrix"], dtype=np.float64)
+        self._indices = [STATE_ARRAY_ORDER.index(field) for field in self.fields]
+
+        init_array = self.state_time.state.to_array().astype(np.float64)
+        points, self._mean_weights, self._cov_weights = sigma_points(
+            init_array[self._indices],
+            self.covariance,
+            config.init_cov.get("alpha", 1.0),
+            config.init_cov.get("beta", 2.0),
+            config.init_cov.get("kappa", 0.0),
+        )
+
+        # every sigma point is a full state array, the uncertain fields are the only ones that differ
+        self.sigma_states = np.tile(init_array, (len(points), 1))
+        self.sigma_states[:, self._indices] = points
+
+    def step(self) -> UnscentedOutput:
+        """Propagates all the sigma points by one step and recombines them into a mean and covariance."""
+        t, self.sigma_states = propagate_batch(self._models, self.state_time.time, self.sigma_states, self.dt)
+
+        mean_array = self._mean_weights @ self.sigma_states
+        _, self.covariance = unscented_transform(
+            self.sigma_states[:, self._indices], self._mean_weights, self._cov_weights
+        )
+        self.state_time = StateTime(array_to_state(mean_array), t)
+
+        self.should_run = not (self.should_stop())
+        self.num_iters += 1
+        return UnscentedOutput(self.state_time, self.covariance_dict())
+
+    def covariance_dict(self) -> Dict[str, float]:
+        """The upper triangle of the current covariance, keyed by "field_a,field_b"."""
+        n = len(self.fields)
+        return {
+            f"{self.fields[i]},{self.fields[j]}": self.covariance[i, j] for i in range(n) for j in range(i, n)
+        }
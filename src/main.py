@@ -1,9 +1,18 @@
 from utils.log import log
-from utils.data_handling import states_to_df, df_to_csv
+from utils.data_handling import current_int_time, states_to_df, df_to_csv
 import logging
-from typing import Union
+from pathlib import Path
+from typing import Optional, Union
 from core.config import Config
+from core.integrator.orbital_events import events_from_df, events_to_df
+from core.run_cache import RunCache, config_key, run_metadata, true_states
 from core.sim import CislunarSim
+from core.state.statetime import PropagatedOutput
+from core.telemetry import DEFAULT_TELEMETRY_ADDRESS, TelemetryServer
+from core.hil import DEFAULT_HIL_TIMEOUT, Lockstep
+from core.metrics import DEFAULT_METRICS_INTERVAL, SimMetrics
+from core.pacer import Pacer
+from core.unscented import UnscentedSim
 from sys import getsizeof
 from core.state import state
 import pandas as pd
@@ -21,7 +30,16 @@ _DESCRIPTION = """Cislunar Sim Runner!"""
 class SimRunner:
     """This class serves as the main entry point to the sim."""
 
-    def __init__(self, config: Union[Config, None] = None) -> None:
+    def __init__(
+        self,
+        config: Union[Config, None] = None,
+        shm_name: Optional[str] = SHRD_MEM_NAME,
+        cache: Optional[RunCache] = None,
+        telemetry: Optional[TelemetryServer] = None,
+        hil: Optional[Lockstep] = None,
+        pacer: Optional[Pacer] = None,
+        metrics: Optional[SimMetrics] = None,
+    ) -> None:
         """Runs the sim from specified config path or from a Config Object.
 
         Input structure:
@@ -30,10 +48,29 @@ class SimRunner:
         Example:
             "python3 src/main.py configs/freefall.json"
             "python3 src/main.py configs/test_angles.json -v"
+
+        When called with a Config object, `shm_name` is the shared memory the observed states are published to,
+        None disables publishing (e.g. when several sims run in parallel). Finished runs of seeded configs are
+        stored in and reused from `cache`, if given. The output of every step is streamed to the subscribers of
+        `telemetry`, if given. With `hil`, every step waits for the command of the flight software. With
+        `pacer`, steps are released in (a multiple of) real time. With `metrics`, the throughput of the run is
+        written to a file periodically.
         """
+        self.out = None
+        self.plot = False
+        self._shm_name = shm_name
+        self._cache = cache
+        self._telemetry = telemetry
+        self._hil = hil
+        self._pacer = pacer
+        self._metrics = metrics
+        self._interrupted = False
+        self._error: Optional[str] = None
+
         # if called from somewhere within the program, with config objects
         if isinstance(config, Config):
-            self._sim = CislunarSim(config)
+            self._config = config
+            self._sim = CislunarSim(config, shm_name)
 
         # if called from command line
         else:
@@ -63,7 +100,58 @@ class SimRunner:
                 nargs="?",
                 help="write the sim output to a CSV file"
             )
-            
+            parser.add_argument(
+                "-u",
+                "--unscented",
+                action="store_true",
+                help="propagate the initial_covariance of the config with the unscented transform"
+            )
+            parser.add_argument(
+                "-c",
+                "--cache",
+                action="store_true",
+                help="reuse the stored run of an identical seeded config, nothing is published to shared memory on a hit"
+            )
+            parser.add_argument(
+                "-t",
+                "--telemetry",
+                const=DEFAULT_TELEMETRY_ADDRESS,
+                nargs="?",
+                help=f"stream the output of each step to subscribers on a tcp:// or unix:// address (default {DEFAULT_TELEMETRY_ADDRESS})"
+            )
+            parser.add_argument(
+                "--hil",
+                metavar="ADDRESS",
+                help="run in lockstep with flight software that connects to a tcp://, unix:// or shm:// address"
+            )
+            parser.add_argument(
+                "--hil-timeout",
+                type=float,
+                default=DEFAULT_HIL_TIMEOUT,
+                help=f"seconds to wait for the command of each step in lockstep mode (default {DEFAULT_HIL_TIMEOUT})"
+            )
+            parser.add_argument(
+                "-r",
+                "--realtime",
+                type=float,
+                const=1.0,
+                nargs="?",
+                metavar="RATE",
+                help="advance the sim at RATE times the wall clock rate (default 1) and report deadline misses"
+            )
+            parser.add_argument(
+                "-m",
+                "--metrics",
+                metavar="PATH",
+                help="write the throughput of the run to PATH periodically, as JSON or, for a .prom file, in the Prometheus text format"
+            )
+            parser.add_argument(
+                "--metrics-interval",
+                type=float,
+                default=DEFAULT_METRICS_INTERVAL,
+                help=f"seconds between two writes of the metrics (default {DEFAULT_METRICS_INTERVAL})"
+            )
+
             # Parser command line arguments
             args = parser.parse_args()
 
@@ -71,10 +159,37 @@ class SimRunner:
             log.setLevel(logging.DEBUG) if args.verbose else log.setLevel(logging.INFO)
             self.out = args.out
             self.plot = args.plot
-            self._sim = CislunarSim(Config.make_config(args.config))
+            if args.cache:
+                self._cache = RunCache()
+            if args.telemetry is not None:
+                self._telemetry = TelemetryServer(args.telemetry)
+            if args.hil is not None:
+                self._hil = Lockstep(args.hil, args.hil_timeout)
+            if args.realtime is not None:
+                self._pacer = Pacer(args.realtime)
+            if args.metrics is not None:
+                self._metrics = SimMetrics(args.metrics, args.metrics_interval, {"config": Path(args.config).stem})
+            self._config = Config.make_config(args.config)
+            if args.unscented:
+                self._sim = UnscentedSim(self._config)
+                if self.plot:
+                    log.warning("Plotting is not supported in unscented mode")
+                    self.plot = False
+            else:
+                self._sim = CislunarSim(self._config)
 
         self.state_history = []
 
+    @property
+    def interrupted(self) -> bool:
+        """Whether the last run stopped early, on an exception in a step or a keyboard interrupt."""
+        return self._interrupted
+
+    @property
+    def error(self) -> Optional[str]:
+        """The exception that stopped the last run early, None if it ran to its end or was stopped by hand."""
+        return self._error
+
     def run(self) -> pd.DataFrame:
         """Runs the sim and returns the truth and observed states in a pandas dataframe.
         Both the truth and observed states between each control cycle get thrown out
@@ -83,34 +198,128 @@ class SimRunner:
         Returns:
             pd.DataFrame: Dataframe of the true and observed states at each instant of observation.
         """
-        shm = shared_memory.SharedMemory(create=True, name=SHRD_MEM_NAME, size=getsizeof(state.ObservedState().to_array())) # Create shared memory
-        
-        states = self._run()
+        cache_key = self._cache_key()
+        if cache_key is not None:
+            run_df = self._cache.get(cache_key)
+            if run_df is not None:
+                log.info(f"Loaded run {cache_key[:12]} from the cache")
+                return self._finish(run_df)
+
+            self._resume_from_cache()
+
+        # released even if the telemetry server or the lockstep connection fails to start
+        shm = None
+        try:
+            if self._shm_name is not None:
+                shm = shared_memory.SharedMemory(create=True, name=self._shm_name, size=getsizeof(state.ObservedState().to_array())) # Create shared memory
+
+            if self._telemetry is not None:
+                self._telemetry.start()
+            if self._hil is not None:
+                self._hil.open()
+
+            states = self._run()
+        finally:
+            # each one is released even if releasing the ones before it raises
+            try:
+                if self._telemetry is not None:
+                    self._telemetry.stop()
+            finally:
+                try:
+                    if self._hil is not None:
+                        self._hil.close()
+                finally:
+                    if shm is not None:
+                        shm.close()
+                        shm.unlink()
+
         run_df = states_to_df(states)
+        # the event table travels with the run, into the cache and next to the CSV output
+        if isinstance(self._sim, CislunarSim) and self._config.param.orbital_events:
+            run_df.attrs["events"] = events_to_df(self._sim.events)
+        # and so does the nfev, status and step sizes of every integrated segment
+        run_df.attrs["integrator"] = self._sim.models.diagnostics.to_df()
 
+        # an interrupted run is not the result of the config, so it is never stored
+        if cache_key is not None and not self._interrupted:
+            self._cache.put(cache_key, run_df, run_metadata(self._config, run_df, type(self._sim).__name__))
+        return self._finish(run_df)
+
+    def _resume_from_cache(self) -> None:
+        """Replays the longest stored true trajectory this config shares, so that only the rest is simulated."""
+        # the sigma points of the unscented mode are not stored, so its runs cannot be resumed
+        if type(self._sim) is not CislunarSim:
+            return
+        prefix = self._cache.find_prefix(self._config)
+        if prefix is None:
+            return
+        run_df, end_time = prefix
+        states = true_states(run_df, end_time)
+        events = []
+        if "events" in run_df.attrs and states:
+            events = events_from_df(run_df.attrs["events"], states[-1].time)
+        self.state_history = self._sim.replay(states, events)
+        if "integrator" in run_df.attrs and states:
+            self._sim.models.diagnostics.extend_from_df(run_df.attrs["integrator"], states[-1].time)
+        log.info(f"Resuming from step {len(self.state_history)} (t={self._sim.state_time.time}) of a cached run")
+
+    def _cache_key(self) -> Optional[str]:
+        if self._cache is None:
+            return None
+        if self._hil is not None:
+            log.info("Not caching the run: the commands of the flight software are not part of the config")
+            return None
+        if self._config.param.seed is None:
+            log.info("Not caching the run: the config has no seed, so its sensor noise is not reproducible")
+            return None
+        return config_key(self._config, type(self._sim).__name__)
+
+    def _finish(self, run_df: pd.DataFrame) -> pd.DataFrame:
+        """Plots the run if requested and returns it."""
         log.setLevel(logging.INFO)  # to prevent being spammed by matplotlib's debug logs (doesn't work)
 
         if self.plot:
             data_plot = Plot(run_df)
             data_plot.plot_data()
-        
-        shm.close()
-        shm.unlink()
         return run_df
 
     def _run(self):
+        if self._pacer is not None:
+            self._pacer.start(self._sim.state_time.time)
+        if self._metrics is not None:
+            self._metrics.start(self._sim, self._config)
+
         while self._sim.should_run:
             try:
+                step_start = self._sim.state_time.time
                 updated_states = self._sim.step()
                 self.state_history.append(updated_states)
+                if self._telemetry is not None and isinstance(updated_states, PropagatedOutput):
+                    self._telemetry.publish(updated_states)
+                if self._hil is not None and isinstance(updated_states, PropagatedOutput):
+                    command = self._hil.exchange(updated_states, updated_states.true_state.time - step_start)
+                    if command is not None:
+                        self._sim.apply_command(command)
+                if self._pacer is not None:
+                    self._pacer.pace(self._sim.state_time.time)
+                if self._metrics is not None:
+                    self._metrics.update(self._sim)
             except (Exception) as e:
                 log.critical("Stopping sim due to unhandled exception:")
                 log.error(e, exc_info=True)
+                self._interrupted = True
+                self._error = f"{type(e).__name__}: {e}"
                 break
             except (KeyboardInterrupt):
                 log.info("Stopping sim")
+                self._interrupted = True
                 break
 
+        if self._pacer is not None:
+            self._pacer.log_summary()
+        self._sim.models.diagnostics.log_summary()
+        if self._metrics is not None:
+            self._metrics.finish(self._sim)
         return self.state_history
 
 
@@ -120,7 +329,12 @@ def run_sim():
 
     # don't store any data if the sim was not specified to output to a file
     if sim.out != None:
-        df_to_csv(data, sim.out)
+        name = f"cislunarsim-{current_int_time()}" if sim.out == "None" else sim.out
+        df_to_csv(data, name)
+        if "events" in data.attrs:
+            df_to_csv(data.attrs["events"], f"{name}_events")
+        if "integrator" in data.attrs:
+            df_to_csv(data.attrs["integrator"], f"{name}_integrator")
 
 
 if __name__ == "__main__":
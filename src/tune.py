@@ -0,0 +1,172 @@
+"""Tunes the integrator settings of a config for each mission phase.
+
+The trajectory of the config is first scouted with long, moderately accurate steps to find where it enters each mission
+phase (near Earth, cislunar coast, lunar approach). From the first state of each phase, a short pilot propagation
+is run with every candidate combination of solve_ivp method, tolerance and step length, and compared against the
+reference. The cheapest candidate whose final position error stays within the budget becomes the setting of that
+phase, and the settings are written to a derived config as its `phase_settings`.
+
+Usage:
+    python src/tune.py configs/tli.json --budget 10 [--pilot 600] [--horizon 432000] [-o configs/tli_tuned.json]
+"""
+
+import argparse
+from dataclasses import dataclass
+from itertools import product
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from benchmark import ATOL_PER_RTOL, REFERENCE_SETTINGS, position_error, propagate, with_settings
+from core.config import Config
+from core.integrator.integrator import propagate_state
+from core.models.model_list import ModelContainer
+from core.phase import mission_phase
+from core.state.state import POSITION_INDICES
+from core.state.statetime import StateTime
+from utils.constants import R_EARTH, PhaseEnum
+from utils.log import log
+
+# candidate settings of the pilot propagations
+DEFAULT_METHODS = ["RK45", "DOP853"]
+DEFAULT_RTOLS = [1e-3, 1e-6, 1e-9]
+DEFAULT_STEPS = [1.0, 10.0, 60.0, 300.0]
+# settings of the scouting propagation that looks for the mission phases, it only needs to place the phase changes
+SCOUT_SETTINGS = {**REFERENCE_SETTINGS, "rtol": 1e-8, "atol": 1.0, "d_t": 3600.0}
+
+
+@dataclass
+class PhaseTuning:
+    """The settings chosen for a mission phase and the pilot results of all the candidates."""
+
+    phase: PhaseEnum
+    start: StateTime
+    settings: Dict
+    met_budget: bool
+    pilots: pd.DataFrame
+
+
+def phase_starts(config: Config, horizon: float) -> Dict[PhaseEnum, StateTime]:
+    """Propagates the initial condition of `config` for up to `horizon` seconds with the scouting settings and
+    returns the first state of each mission phase the trajectory enters, in the order they are entered."""
+    scout_config = with_settings(config, SCOUT_SETTINGS)
+    scout_step = scout_config.param.d_t
+    models = ModelContainer(scout_config)
+    state_time = config.init_cond
+    t_end = state_time.time + horizon
+
+    starts = {mission_phase(state_time): state_time}
+    while state_time.time < t_end and len(starts) < len(PhaseEnum):
+        state_time = propagate_state(models, state_time, min(scout_step, t_end - state_time.time))
+        if np.linalg.norm(state_time.state.to_array()[POSITION_INDICES].astype(np.float64)) < R_EARTH:
+            break
+        starts.setdefault(mission_phase(state_time), state_time)
+    return starts
+
+
+def tune_phase(
+    config: Config,
+    start: StateTime,
+    duration: float,
+    budget: float,
+    methods: Sequence[str] = DEFAULT_METHODS,
+    rtols: Sequence[float] = DEFAULT_RTOLS,
+    steps: Sequence[float] = DEFAULT_STEPS,
+) -> Tuple[Dict, bool, pd.DataFrame]:
+    """Runs a pilot propagation from `start` with every candidate setting and picks the fastest one whose final
+    position error is within `budget` meters. If none is, the most accurate candidate is picked.
+
+    Returns:
+        Tuple[Dict, bool, pd.DataFrame]: the chosen settings, whether they meet the budget, and one row of pilot
+            results per candidate
+    """
+    reference = propagate(with_settings(config, REFERENCE_SETTINGS), duration, start)
+
+    rows: List[Dict] = []
+    for method, rtol, d_t in product(methods, rtols, steps):
+        settings = {"d_t": d_t, "integrator": method, "rtol": rtol, "atol": rtol * ATOL_PER_RTOL}
+        result = propagate(with_settings(config, {**settings, "phase_settings": {}}), duration, start)
+        rows.append(
+            {
+                **settings,
+                "wall_time": result.wall_time,
+                "rhs_evaluations": result.rhs_evaluations,
+                "final_position_error": position_error(result.final, reference.final),
+            }
+        )
+    pilots = pd.DataFrame(rows)
+
+    within_budget = pilots[pilots["final_position_error"] <= budget]
+    met_budget = not within_budget.empty
+    if met_budget:
+        best = within_budget.sort_values(["wall_time", "rhs_evaluations"]).iloc[0]
+    else:
+        best = pilots.sort_values("final_position_error").iloc[0]
+    settings = {
+        "d_t": float(best["d_t"]),
+        "integrator": str(best["integrator"]),
+        "rtol": float(best["rtol"]),
+        "atol": float(best["atol"]),
+    }
+    return settings, met_budget, pilots
+
+
+def tune(
+    config: Config,
+    budget: float,
+    pilot_duration: float,
+    horizon: float,
+    methods: Sequence[str] = DEFAULT_METHODS,
+    rtols: Sequence[float] = DEFAULT_RTOLS,
+    steps: Sequence[float] = DEFAULT_STEPS,
+) -> List[PhaseTuning]:
+    """Tunes the integrator settings of every mission phase the trajectory of `config` enters within `horizon`
+    seconds. The phases it never enters keep the global settings."""
+    tunings = []
+    for phase, start in phase_starts(config, horizon).items():
+        settings, met_budget, pilots = tune_phase(config, start, pilot_duration, budget, methods, rtols, steps)
+        if not met_budget:
+            log.warning(f"No candidate meets the {budget} m budget in the {phase.value} phase, using the most accurate")
+        tunings.append(PhaseTuning(phase, start, settings, met_budget, pilots))
+    return tunings
+
+
+def derive_config(config_path: str, tunings: Sequence[PhaseTuning]) -> Dict:
+    """The json content of the config at `config_path`, with the tuned settings as its `phase_settings`."""
+    with open(config_path, "r") as read_file:
+        data = json.load(read_file)
+    parameters = data.setdefault("parameters", {})
+    parameters["phase_settings"] = {tuning.phase.value: tuning.settings for tuning in tunings}
+    return data
+
+
+def main(argv: Optional[List[str]] = None) -> List[PhaseTuning]:
+    parser = argparse.ArgumentParser(description="Tune the integrator settings of a config for each mission phase")
+    parser.add_argument("config", type=str, help="path of the json config to tune")
+    parser.add_argument("--budget", type=float, required=True, help="final position error budget (m) of a pilot")
+    parser.add_argument("--pilot", type=float, default=600.0, help="seconds of sim time per pilot (default 600)")
+    parser.add_argument("--horizon", type=float, default=432000.0, help="seconds of sim time to scout for phases")
+    parser.add_argument("--steps", type=float, nargs="+", default=DEFAULT_STEPS, help="candidate step lengths (s)")
+    parser.add_argument("--methods", nargs="+", default=DEFAULT_METHODS, help="candidate solve_ivp methods")
+    parser.add_argument("--rtols", type=float, nargs="+", default=DEFAULT_RTOLS, help="candidate relative tolerances")
+    parser.add_argument("-o", "--out", type=str, default=None, help="path of the derived config (default *_tuned.json)")
+    args = parser.parse_args(argv)
+
+    config = Config.make_config(args.config)
+    tunings = tune(config, args.budget, args.pilot, args.horizon, args.methods, args.rtols, args.steps)
+    for tuning in tunings:
+        status = "within" if tuning.met_budget else "OVER"
+        print(f"{tuning.phase.value} (entered at t={tuning.start.time}): {tuning.settings}, {status} budget")
+        with pd.option_context("display.max_rows", None, "display.width", 200):
+            print(tuning.pilots.to_string(index=False, float_format=lambda value: f"{value:.3g}"))
+
+    out = Path(args.out) if args.out is not None else Path(args.config).with_name(f"{Path(args.config).stem}_tuned.json")
+    with open(out, "w") as write_file:
+        json.dump(derive_config(args.config, tunings), write_file, indent=4)
+    print(f"Wrote {out}")
+    return tunings
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 from functools import lru_cache
+import numpy as np
+from astropy import units as u
 from astropy.time import Time
-from astropy.coordinates import get_sun, get_moon, CartesianRepresentation
+from astropy.coordinates import get_body, get_sun, get_moon, CartesianRepresentation
 from typing import Tuple
 from utils.constants import BodyEnum
 from astropy.coordinates import SkyCoord
@@ -16,7 +18,7 @@ def get_body_position(time: int, body: BodyEnum) -> Tuple[float, float, float]:
 
     Args:
         time (float): the current time being queried
-        body (BodyEnum): body (earth, moon, sun)
+        body (BodyEnum): body (earth, moon, sun, or one of the planets)
 
     Returns:
         Tuple[float, float, float]: position vector of the specified body
@@ -29,6 +31,8 @@ def get_body_position(time: int, body: BodyEnum) -> Tuple[float, float, float]:
         current_au = get_sun(Time(current_time, format="unix")).cartesian
     elif body == BodyEnum.Moon:
         current_au = get_moon(Time(current_time, format="unix")).cartesian
+    elif body != BodyEnum.Earth:
+        current_au = get_body(body.name.lower(), Time(current_time, format="unix")).cartesian
     current = CartesianRepresentation(
         [current_au.x, current_au.y, current_au.z], unit="m"
     )
@@ -36,3 +40,27 @@ def get_body_position(time: int, body: BodyEnum) -> Tuple[float, float, float]:
     y = current.y.value
     z = current.z.value
     return x, y, z
+
+
+def get_body_positions(times: np.ndarray, body: BodyEnum) -> np.ndarray:
+    """Gets the position vectors of [body] at each of [times] with a single ephemeris query, for post-processing
+    a whole run at once
+
+    Args:
+        times (np.ndarray): length-n array of unix times
+        body (BodyEnum): body (earth, moon, sun, or one of the planets)
+
+    Returns:
+        np.ndarray: n-by-3 array of the positions of the specified body, in meters
+    """
+    times = np.atleast_1d(np.asarray(times, dtype=np.float64))
+    if body == BodyEnum.Earth:
+        return np.zeros((len(times), 3))
+    astropy_times = Time(times, format="unix")
+    if body == BodyEnum.Sun:
+        current_au = get_sun(astropy_times).cartesian
+    elif body == BodyEnum.Moon:
+        current_au = get_moon(astropy_times).cartesian
+    else:
+        current_au = get_body(body.name.lower(), astropy_times).cartesian
+    return np.stack([current_au.x.to_value(u.m), current_au.y.to_value(u.m), current_au.z.to_value(u.m)], axis=-1)
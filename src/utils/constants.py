@@ -21,9 +21,67 @@ class ModelEnum(StringEnum):
 
     GyroModel = "gyro"
 
+    ThrusterModel = "thruster"
+    ElectrolyzerModel = "electrolyzer"
+
     UnittestModel = "unittest"
 
 
+class PropagatorEnum(StringEnum):
+    """Formulations of the position dynamics that the integrator can propagate."""
+
+    # integrate the full acceleration directly
+    Cowell = "cowell"
+    # integrate only the deviation from an osculating two-body orbit around the Earth
+    Encke = "encke"
+    # jump along the two-body orbit when the third body perturbations are negligible
+    Kepler = "kepler"
+
+
+class IntegratorEnum(StringEnum):
+    """scipy `solve_ivp` methods the numerical integration can use."""
+
+    RK23 = "RK23"
+    RK45 = "RK45"
+    DOP853 = "DOP853"
+    Radau = "Radau"
+    BDF = "BDF"
+    LSODA = "LSODA"
+
+
+class PhaseEnum(StringEnum):
+    """Phases of a cislunar mission, each of which can have its own integrator settings."""
+
+    # within NEAR_EARTH_RADIUS of the Earth
+    NearEarth = "near_earth"
+    # between the Earth and the Moon
+    CislunarCoast = "cislunar_coast"
+    # inside the Moon's sphere of influence
+    LunarApproach = "lunar_approach"
+
+
+class OrbitalEventEnum(StringEnum):
+    """Groups of orbital events the integrator can detect."""
+
+    # periapsis and apoapsis around the Earth
+    Apsides = "apsides"
+    # entry into and exit from the Moon's sphere of influence
+    MoonSoi = "moon_soi"
+    # penumbra and umbra entries and exits, of the Earth's and the Moon's shadows
+    Eclipse = "eclipse"
+
+
+class CommandEnum(StringEnum):
+    """Kinds of commands in the `command_timeline` parameter."""
+
+    # constant thrust along an inertial direction over an interval
+    Thrust = "thrust"
+    # electrolysis at the `electolyzer_rate` over an interval
+    Electrolysis = "electrolysis"
+    # instantaneous change of the angular velocity
+    AttitudePulse = "attitude_pulse"
+
+
 DEFAULT_MODELS = [ModelEnum.AttitudeModel, ModelEnum.PositionModel]
 
 # The union of the different types of fields within State.
@@ -37,6 +95,9 @@ class BodyEnum(IntEnum):
     Earth = 0
     Moon = 1
     Sun = 2
+    Venus = 3
+    Mars = 4
+    Jupiter = 5
 
 
 # mu values of the body, where mu = G * m_body
@@ -44,6 +105,18 @@ G = 6.6743e-11
 mu_moon = G * 7.34767309e22
 mu_sun = G * 1.988409870698051e30
 mu_earth = G * 5.972167867791379e24
+mu_venus = G * 4.8675e24
+mu_mars = G * 6.4171e23
+mu_jupiter = G * 1.89819e27
+
+BODY_MU = {
+    BodyEnum.Earth: mu_earth,
+    BodyEnum.Moon: mu_moon,
+    BodyEnum.Sun: mu_sun,
+    BodyEnum.Venus: mu_venus,
+    BodyEnum.Mars: mu_mars,
+    BodyEnum.Jupiter: mu_jupiter,
+}
 
 EARTH_SMA = 149.60e9  # semi-major axis of Earth's orbit around the Sun
 
@@ -52,7 +125,12 @@ R_EARTH = 6_378_137  # Average Radius of the Earth, meters
 R_MOON = 1_737_100  # Average Radius of the Moon, meters
 R_SUN = 696_340_000
 
+MOON_SMA = 384_400_000  # semi-major axis of the Moon's orbit around the Earth, meters
+MOON_SOI = MOON_SMA * (mu_moon / mu_earth) ** (2 / 5)
+NEAR_EARTH_RADIUS = 50_000_000  # just beyond geostationary orbit, meters
+
 R = 8.314_462_618_153_24 # Ideal gas constant
 M_WATER = 18.0153 # Molar mass of water, g/mol
 
 D_T = 0.1  # timestep in seconds
+MAX_RUN_DURATION = 6.312e7  # sim seconds (two years) after which a run stops
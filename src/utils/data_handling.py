@@ -1,18 +1,18 @@
-from typing import List, Optional, Union
+from typing import Any, List, Optional, Union
 import time
 import pandas as pd
-from core.state.statetime import PropagatedOutput
 from dataclasses import asdict
 from utils.constants import SIM_ROOT
 from pathlib import Path
 from matplotlib.animation import FuncAnimation, PillowWriter
 
 
-def states_to_df(states: List[PropagatedOutput]) -> pd.DataFrame:
+def states_to_df(states: List[Any]) -> pd.DataFrame:
     """Converts [states] to a DataFrame to use for plotting
 
     Args:
-        states (List[PropagatedOutput]): the current state
+        states (List[Any]): the output dataclass of each step (a `PropagatedOutput`, or an
+            `UnscentedOutput` in unscented mode)
 
     Returns:
         pd.DataFrame: a Pandas DataFrame containing the states' data
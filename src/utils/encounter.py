@@ -0,0 +1,234 @@
+"""Closest approaches of recorded runs to the bodies and to each other.
+
+An `EncounterIndex` holds the positions of an ensemble of runs on a common time grid. The distances to a body are
+computed for every run at once, from a single ephemeris query over the grid. Close approaches between runs are
+found with a KD-tree over the run positions at each grid time, so an ensemble of m runs costs O(T m log m) rather
+than the O(T m^2) of comparing every pair. The queries are padded by how far the runs move relative to each other
+between grid times, not by how far they move, so the runs of an ensemble flying together are not all candidates. Every sampled minimum is refined between the grid times on the cubic
+Hermite interpolant of the recorded positions and velocities, without re-running the sim.
+
+Usage:
+    python src/utils/encounter.py runs/a.csv runs/b.csv [--bodies earth moon] [--radius 1e5] [--grid-step 60]
+"""
+
+import argparse
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from scipy.interpolate import CubicHermiteSpline, CubicSpline
+from scipy.optimize import minimize_scalar
+from scipy.spatial import cKDTree
+from utils.astropy_util import get_body_positions
+from utils.constants import BodyEnum
+from utils.trajectory_diff import POSITION_COLUMNS, TIME_COLUMN, VELOCITY_COLUMNS, load_run, sorted_unique
+
+# time tolerance (s) of the refinement of an approach between grid times
+REFINE_TOLERANCE = 1e-3
+
+
+@dataclass
+class Trajectory:
+    """The recorded positions and velocities of a run, with their cubic Hermite interpolant."""
+
+    name: str
+    t: np.ndarray
+    position: np.ndarray
+    velocity: np.ndarray
+    interpolant: CubicHermiteSpline = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if len(self.t) < 2:
+            raise ValueError(f"Run {self.name} needs at least two steps to be interpolated")
+        self.interpolant = CubicHermiteSpline(self.t, self.position, self.velocity, axis=0)
+
+    @classmethod
+    def from_run(cls, name: str, run: pd.DataFrame) -> "Trajectory":
+        run = sorted_unique(run)
+        return cls(
+            name,
+            run[TIME_COLUMN].to_numpy(dtype=np.float64),
+            run[POSITION_COLUMNS].to_numpy(dtype=np.float64),
+            run[VELOCITY_COLUMNS].to_numpy(dtype=np.float64),
+        )
+
+    def covers(self, times: np.ndarray) -> np.ndarray:
+        return (times >= self.t[0]) & (times <= self.t[-1])
+
+
+@dataclass
+class Encounter:
+    """The closest approach of run `run` to `other`, a body or another run."""
+
+    run: str
+    other: str
+    time: float
+    distance: float
+
+
+def _refine(distance: Callable[[float], float], lo: float, hi: float, t: float, d: float) -> Tuple[float, float]:
+    """Minimizes `distance` over [lo, hi], starting from the sampled minimum `d` at time `t`."""
+    if hi > lo:
+        result = minimize_scalar(distance, bounds=(lo, hi), method="bounded", options={"xatol": REFINE_TOLERANCE})
+        if result.fun < d:
+            return float(result.x), float(result.fun)
+    return t, d
+
+
+class EncounterIndex:
+    """The positions of an ensemble of runs on a common time grid, indexed for closest approach queries.
+
+    Example:
+        index = EncounterIndex.from_runs({"nominal": nominal_df, "dispersed": dispersed_df})
+        index.closest_approaches(BodyEnum.Moon)
+        index.approaches_between_runs(radius=1e5)
+    """
+
+    def __init__(self, trajectories: Sequence[Trajectory], grid_step: Optional[float] = None) -> None:
+        """
+        Args:
+            trajectories (Sequence[Trajectory]): the runs to index
+            grid_step (Optional[float], optional): spacing of a uniform grid. Defaults to None, the union of the
+                step times of all the runs.
+        """
+        self.trajectories = list(trajectories)
+        start = min(trajectory.t[0] for trajectory in self.trajectories)
+        end = max(trajectory.t[-1] for trajectory in self.trajectories)
+        if grid_step is not None:
+            grid = np.arange(start, end, grid_step)
+            self.grid = np.append(grid, end) if len(grid) == 0 or grid[-1] < end else grid
+        else:
+            self.grid = np.unique(np.concatenate([trajectory.t for trajectory in self.trajectories]))
+
+        # T-by-m-by-3 positions of the runs at the grid times, NaN where a run does not cover a grid time
+        self.positions = np.full((len(self.grid), len(self.trajectories), 3), np.nan)
+        for j, trajectory in enumerate(self.trajectories):
+            covered = trajectory.covers(self.grid)
+            self.positions[covered, j] = trajectory.interpolant(self.grid[covered])
+
+        # furthest any run moves between consecutive grid times relative to the mean motion of the runs. Two runs
+        # move at most twice that relative to each other, which pads the KD-tree queries so that the approaches
+        # between grid times are not missed
+        chords = np.diff(self.positions, axis=0)
+        if len(chords):
+            covered = ~np.isnan(chords[:, :, 0])
+            mean_chords = np.zeros((len(chords), 3))
+            stepped = covered.any(axis=1)
+            mean_chords[stepped] = np.nanmean(chords[stepped], axis=1)
+            deviations = np.linalg.norm(chords - mean_chords[:, np.newaxis, :], axis=2)
+            self._reach = np.nan_to_num(np.nanmax(np.where(covered, deviations, np.nan), axis=1, initial=0.0))
+        else:
+            self._reach = np.zeros(0)
+        self._bodies: Dict[BodyEnum, Tuple[np.ndarray, Callable[[float], np.ndarray]]] = {}
+
+    @classmethod
+    def from_runs(cls, runs: Dict[str, pd.DataFrame], grid_step: Optional[float] = None) -> "EncounterIndex":
+        return cls([Trajectory.from_run(name, run) for name, run in runs.items()], grid_step)
+
+    def _bracket(self, k: int, runs: Sequence[int]) -> Tuple[float, float]:
+        """The grid interval around grid index `k`, within the span covered by all of `runs`."""
+        lo = max([self.grid[max(k - 1, 0)]] + [self.trajectories[j].t[0] for j in runs])
+        hi = min([self.grid[min(k + 1, len(self.grid) - 1)]] + [self.trajectories[j].t[-1] for j in runs])
+        return lo, hi
+
+    def _body(self, body: BodyEnum) -> Tuple[np.ndarray, Callable[[float], np.ndarray]]:
+        """The positions of `body` at the grid times, and an interpolant between them."""
+        if body not in self._bodies:
+            positions = get_body_positions(self.grid, body)
+            if len(self.grid) > 1:
+                interpolant = CubicSpline(self.grid, positions, axis=0)
+            else:
+                interpolant = lambda t: positions[0]
+            self._bodies[body] = (positions, interpolant)
+        return self._bodies[body]
+
+    def body_distances(self, body: BodyEnum) -> np.ndarray:
+        """T-by-m distances of the runs from `body` at the grid times, NaN where a run does not cover a time."""
+        positions, _ = self._body(body)
+        return np.linalg.norm(self.positions - positions[:, np.newaxis, :], axis=2)
+
+    def _refine_body(self, body: BodyEnum, j: int, k: int, d: float) -> Encounter:
+        _, body_position = self._body(body)
+        trajectory = self.trajectories[j]
+
+        def distance(t: float) -> float:
+            return float(np.linalg.norm(trajectory.interpolant(t) - body_position(t)))
+
+        time, distance_min = _refine(distance, *self._bracket(k, [j]), self.grid[k], d)
+        return Encounter(trajectory.name, body.name.lower(), time, distance_min)
+
+    def closest_approaches(self, body: BodyEnum) -> List[Encounter]:
+        """The closest approach of every run to `body`, e.g. the minimum lunar distance."""
+        distances = self.body_distances(body)
+        encounters = []
+        for j in range(len(self.trajectories)):
+            k = int(np.nanargmin(distances[:, j]))
+            encounters.append(self._refine_body(body, j, k, distances[k, j]))
+        return encounters
+
+    def periapses(self, body: BodyEnum, max_distance: float = np.inf) -> List[Encounter]:
+        """Every local minimum of the distance of each run from `body` (e.g. the Earth periapses) closer than
+        `max_distance`, sorted by time."""
+        distances = self.body_distances(body)
+        before, now, after = distances[:-2], distances[1:-1], distances[2:]
+        ks, js = np.nonzero((before > now) & (now <= after) & (now < max_distance))
+        encounters = [self._refine_body(body, j, k + 1, distances[k + 1, j]) for k, j in zip(ks, js)]
+        return sorted(encounters, key=lambda encounter: encounter.time)
+
+    def _candidates(self, radius: float) -> Dict[Tuple[int, int], Tuple[int, float]]:
+        """The grid index and sampled distance of the closest sample of each pair of runs that may come within
+        `radius` meters of each other between grid times."""
+        candidates: Dict[Tuple[int, int], Tuple[int, float]] = {}
+        for k in range(len(self.grid)):
+            runs = np.flatnonzero(~np.isnan(self.positions[k, :, 0]))
+            if len(runs) < 2:
+                continue
+            reach = max(self._reach[k - 1] if k > 0 else 0.0, self._reach[k] if k < len(self._reach) else 0.0)
+            positions = self.positions[k, runs]
+            for a, b in cKDTree(positions).query_pairs(radius + 2 * reach):
+                d = float(np.linalg.norm(positions[a] - positions[b]))
+                pair = (int(runs[a]), int(runs[b]))
+                if pair not in candidates or d < candidates[pair][1]:
+                    candidates[pair] = (k, d)
+        return candidates
+
+    def approaches_between_runs(self, radius: float) -> List[Encounter]:
+        """The closest approach of every pair of runs that come within `radius` meters of each other, sorted by
+        distance. Only the closest approach of each pair is reported."""
+        encounters = []
+        for (i, j), (k, d) in self._candidates(radius).items():
+            a, b = self.trajectories[i], self.trajectories[j]
+
+            def distance(t: float) -> float:
+                return float(np.linalg.norm(a.interpolant(t) - b.interpolant(t)))
+
+            time, distance_min = _refine(distance, *self._bracket(k, [i, j]), self.grid[k], d)
+            if distance_min <= radius:
+                encounters.append(Encounter(a.name, b.name, time, distance_min))
+        return sorted(encounters, key=lambda encounter: encounter.distance)
+
+
+def main(argv: Optional[List[str]] = None) -> EncounterIndex:
+    parser = argparse.ArgumentParser(description="Find the closest approaches of recorded runs")
+    parser.add_argument("runs", nargs="+", help="paths to the runs (.csv or .pkl)")
+    parser.add_argument("--bodies", nargs="+", default=["earth", "moon"], help="bodies to find the closest approach to")
+    parser.add_argument("--radius", type=float, default=None, help="report the runs that come this close (m)")
+    parser.add_argument("--grid-step", type=float, default=None, help="spacing (s) of a uniform common time grid")
+    args = parser.parse_args(argv)
+
+    runs = {Path(path).stem: load_run(path) for path in args.runs}
+    index = EncounterIndex.from_runs(runs, args.grid_step)
+    for name in args.bodies:
+        for encounter in index.closest_approaches(BodyEnum[name.capitalize()]):
+            print(f"{encounter.run}: closest to {encounter.other} at t={encounter.time:.3f}, {encounter.distance:.6e} m")
+    if args.radius is not None:
+        encounters = index.approaches_between_runs(args.radius)
+        print(f"{len(encounters)} pairs of runs come within {args.radius} m")
+        for encounter in encounters:
+            print(f"{encounter.run} and {encounter.other} at t={encounter.time:.3f}, {encounter.distance:.6e} m")
+    return index
+
+
+if __name__ == "__main__":
+    main()
@@ -51,35 +51,73 @@ def calc_psi(v: np.ndarray, r: float) -> np.matrix:
     return np.matrix(np.vstack((top, bot)))  # stacked to be a 4-by-3
 
 
-def quat_to_dcm(quat: np.ndarray) -> np.matrix:
+def quat_to_dcm(quat: np.ndarray) -> np.ndarray:
     """Calculates the direction cosine matrix (DCM) associated with the input quaternion.
     The math in this function is based off of page 17 of https://cornell.app.box.com/file/809903002605
+    Xi^T Psi is expanded in closed form, A = (r^2 - |v|^2) I - 2r [v x] + 2 v v^T.
     Args:
-        quat (np.ndarray): 4x1 quaternion
+        quat (np.ndarray): length-4 quaternion, or an N-by-4 array of quaternions
 
     Returns:
-        np.matrix: 3x3 Direction Cosine Matrix
+        np.ndarray: 3x3 Direction Cosine Matrix, or an N-by-3-by-3 array of them
     """
+    quat = np.asarray(quat, dtype=np.float64)
+    v1, v2, v3, r = quat[..., 0], quat[..., 1], quat[..., 2], quat[..., 3]
 
-    v = quat[0:3]
-    r = quat[3]
+    dcm = np.empty(quat.shape[:-1] + (3, 3))
+    dcm[..., 0, 0] = r * r + v1 * v1 - v2 * v2 - v3 * v3
+    dcm[..., 0, 1] = 2 * (v1 * v2 + r * v3)
+    dcm[..., 0, 2] = 2 * (v1 * v3 - r * v2)
+    dcm[..., 1, 0] = 2 * (v1 * v2 - r * v3)
+    dcm[..., 1, 1] = r * r - v1 * v1 + v2 * v2 - v3 * v3
+    dcm[..., 1, 2] = 2 * (v2 * v3 + r * v1)
+    dcm[..., 2, 0] = 2 * (v1 * v3 + r * v2)
+    dcm[..., 2, 1] = 2 * (v2 * v3 - r * v1)
+    dcm[..., 2, 2] = r * r - v1 * v1 - v2 * v2 + v3 * v3
+    return dcm
 
-    xi = calc_xi(v, r)
-    psi = calc_psi(v, r)
 
-    dcm = np.matmul(xi.T, psi)
+def quat_rotate(quat: np.ndarray, vector: np.ndarray) -> np.ndarray:
+    """Transforms `vector` with the DCM of `quat` (i.e. `quat_to_dcm(quat) @ vector`) without building the DCM.
 
-    return np.matrix(dcm)
+    Args:
+        quat (np.ndarray): length-4 quaternion, or an N-by-4 array of quaternions
+        vector (np.ndarray): length-3 vector, or an N-by-3 array of vectors
+
+    Returns:
+        np.ndarray: the transformed length-3 vector, or N-by-3 array of vectors
+    """
+    quat = np.asarray(quat, dtype=np.float64)
+    vector = np.asarray(vector, dtype=np.float64)
+    v = quat[..., :3]
+    r = quat[..., 3:]
+
+    v_dot_x = np.sum(v * vector, axis=-1, keepdims=True)
+    v_dot_v = np.sum(v * v, axis=-1, keepdims=True)
+    return (r * r - v_dot_v) * vector - 2 * r * np.cross(v, vector) + 2 * v_dot_x * v
+
+
+def quat_normalize(quat: np.ndarray) -> np.ndarray:
+    """Scales a quaternion (or each row of an N-by-4 array of quaternions) to unit norm.
+
+    Args:
+        quat (np.ndarray): length-4 quaternion, or an N-by-4 array of quaternions
+
+    Returns:
+        np.ndarray: the unit quaternion(s)
+    """
+    quat = np.asarray(quat, dtype=np.float64)
+    return quat / np.sqrt(np.sum(quat * quat, axis=-1, keepdims=True))
 
 
 def dcm_to_spherical_coords(
-    dcm: np.matrix, spacecraft_frame_vector: np.ndarray = np.array((1, 0, 0))
+    dcm: np.ndarray, spacecraft_frame_vector: np.ndarray = np.array((1, 0, 0))
 ) -> Tuple[float, float]:
     """Calculates the spherical coordinate components (theta, phi) of the `spacecraft_frame_vector` from the input
     spacecraft-body DCM.
 
     Args:
-        dcm (np.matrix): the DCM of an ECI to spacecraft body frame transformation
+        dcm (np.ndarray): the DCM of an ECI to spacecraft body frame transformation
         spacecraft_frame_vector (np.ndarray, optional): vector in the spacecraft body
         frame that is converted into ECI and then transformed into spherical coordinates.
         Defaults to np.array((1, 0, 0)), the X-axis of the spacecraft .
@@ -99,25 +137,27 @@ def quaternion_derivative(current_quat: np.ndarray, angular_velocity: np.ndarray
     """Calculates the time derivative of a given quaternion based on angular velocity.
     The algo implemented here is based off the math on page 17 of
     https://cornell.app.box.com/file/809903002605
+    0.5 * Xi(q) * omega is expanded in closed form, so no matrices are built and the inputs are not modified.
 
     Args:
         current_quat (np.ndarray): length-4 array describing the quaternion of the spacecraft's angular position in ECI.
-        (first 3 elements describe the vector, last one describes the scalar component)
+        (first 3 elements describe the vector, last one describes the scalar component). An N-by-4 array of
+        quaternions is also accepted.
 
-        angular_velocity (np.ndarray): length-3 array of the angular velocities in rad/s (in the body frame, i think)
+        angular_velocity (np.ndarray): length-3 array of the angular velocities in rad/s (in the body frame, i think),
+        or an N-by-3 array of them.
 
     Returns:
-        np.ndarray: the time derivative of each element of the quaternion
+        np.ndarray: the time derivative of each element of the quaternion, length-4 (or N-by-4)
     """
-
-    current_quat.shape = (4, 1)  # enforces a column vector
-    angular_velocity.shape = (3, 1)
-
-    v = current_quat[0:3]
-    r = current_quat[3]
-
-    xi = calc_xi(v, r)
-
-    quat_derivative = 0.5 * np.matmul(xi, angular_velocity)  # 4x3 times a 3x1 = 4x1
-
+    current_quat = np.asarray(current_quat, dtype=np.float64)
+    angular_velocity = np.asarray(angular_velocity, dtype=np.float64)
+    v1, v2, v3, r = current_quat[..., 0], current_quat[..., 1], current_quat[..., 2], current_quat[..., 3]
+    w1, w2, w3 = angular_velocity[..., 0], angular_velocity[..., 1], angular_velocity[..., 2]
+
+    quat_derivative = np.empty(np.broadcast(v1, w1).shape + (4,))
+    quat_derivative[..., 0] = 0.5 * (r * w1 + v2 * w3 - v3 * w2)
+    quat_derivative[..., 1] = 0.5 * (r * w2 + v3 * w1 - v1 * w3)
+    quat_derivative[..., 2] = 0.5 * (r * w3 + v1 * w2 - v2 * w1)
+    quat_derivative[..., 3] = -0.5 * (v1 * w1 + v2 * w2 + v3 * w3)
     return quat_derivative
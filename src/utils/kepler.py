@@ -0,0 +1,89 @@
+"""Two-body (Keplerian) propagation with universal variables.
+The algorithm is KEPLER from Vallado, Fundamentals of Astrodynamics and Applications, 4th ed., section 2.3.
+"""
+
+from typing import Tuple
+import numpy as np
+from utils.constants import mu_earth
+
+
+def stumpff(psi: float) -> Tuple[float, float]:
+    """Evaluates the Stumpff functions c2 and c3 at `psi`.
+
+    Args:
+        psi (float): the universal variable squared times the reciprocal semi-major axis
+
+    Returns:
+        Tuple[float, float]: (c2, c3)
+    """
+    if psi > 1e-6:
+        sqrt_psi = np.sqrt(psi)
+        return (1 - np.cos(sqrt_psi)) / psi, (sqrt_psi - np.sin(sqrt_psi)) / (sqrt_psi ** 3)
+    if psi < -1e-6:
+        sqrt_psi = np.sqrt(-psi)
+        return (1 - np.cosh(sqrt_psi)) / psi, (np.sinh(sqrt_psi) - sqrt_psi) / (sqrt_psi ** 3)
+    # series expansion around 0
+    return 1 / 2 - psi / 24, 1 / 6 - psi / 120
+
+
+def kepler_propagate(
+    r0: np.ndarray, v0: np.ndarray, dt: float, mu: float = mu_earth, tol: float = 1e-9, max_iter: int = 50
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Propagates a position and velocity by `dt` seconds on a two-body orbit around a body with gravitational
+    parameter `mu`. Works for elliptical, parabolic and hyperbolic orbits, forwards and backwards in time.
+
+    Args:
+        r0 (np.ndarray): length-3 initial position (m)
+        v0 (np.ndarray): length-3 initial velocity (m/s)
+        dt (float): time of flight (s)
+        mu (float, optional): gravitational parameter of the central body. Defaults to mu_earth.
+        tol (float, optional): convergence tolerance on the universal variable. Defaults to 1e-9.
+        max_iter (int, optional): maximum number of Newton iterations. Defaults to 50.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: the propagated position and velocity
+    """
+    if dt == 0:
+        return np.array(r0, dtype=np.float64), np.array(v0, dtype=np.float64)
+
+    sqrt_mu = np.sqrt(mu)
+    r0_mag = np.sqrt(np.dot(r0, r0))
+    rv = np.dot(r0, v0)
+    alpha = 2 / r0_mag - np.dot(v0, v0) / mu  # reciprocal of the semi-major axis
+
+    # initial guess of the universal variable
+    if alpha > 1e-12:
+        chi = sqrt_mu * dt * alpha
+    elif alpha < -1e-12:
+        a = 1 / alpha
+        chi = np.sign(dt) * np.sqrt(-a) * np.log(
+            (-2 * mu * alpha * dt) / (rv + np.sign(dt) * np.sqrt(-mu * a) * (1 - r0_mag * alpha))
+        )
+    else:
+        h = np.cross(r0, v0)
+        p = np.dot(h, h) / mu
+        s = 0.5 * np.arctan(1 / (3 * np.sqrt(mu / p ** 3) * dt))
+        w = np.arctan(np.cbrt(np.tan(s)))
+        chi = np.sqrt(p) * 2 / np.tan(2 * w)
+
+    # Newton iteration on the universal Kepler equation
+    for _ in range(max_iter):
+        psi = chi * chi * alpha
+        c2, c3 = stumpff(psi)
+        r = chi * chi * c2 + rv / sqrt_mu * chi * (1 - psi * c3) + r0_mag * (1 - psi * c2)
+        delta = (sqrt_mu * dt - chi ** 3 * c3 - rv / sqrt_mu * chi * chi * c2 - r0_mag * chi * (1 - psi * c3)) / r
+        chi += delta
+        if abs(delta) < tol:
+            break
+
+    psi = chi * chi * alpha
+    c2, c3 = stumpff(psi)
+    r = chi * chi * c2 + rv / sqrt_mu * chi * (1 - psi * c3) + r0_mag * (1 - psi * c2)
+
+    # Lagrange coefficients
+    f = 1 - chi * chi / r0_mag * c2
+    g = dt - chi ** 3 / sqrt_mu * c3
+    f_dot = sqrt_mu / (r * r0_mag) * chi * (psi * c3 - 1)
+    g_dot = 1 - chi * chi / r * c2
+
+    return f * np.asarray(r0) + g * np.asarray(v0), f_dot * np.asarray(r0) + g_dot * np.asarray(v0)
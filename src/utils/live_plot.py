@@ -0,0 +1,341 @@
+"""Follows a running sim in a live matplotlib window.
+
+The viewer is a separate process that attaches to the telemetry server of a sim started with `-t`, so drawing
+never slows the stepping loop: the server queues frames for its clients without waiting on them, and drops the
+oldest frames of a client that falls behind. A sim started without a server can still be followed through the
+observed state it publishes to shared memory every step (`shm://{name}`); the viewer polls it at the frame rate,
+so it only sees the latest state of each frame, and as the shared memory holds no time, the time axis is the
+wall clock.
+
+The received states are kept in a bounded ring buffer of the last `--history` steps, and the window is redrawn
+at most `--fps` times a second. Redraws blit the lines onto a cached background; the whole figure is only drawn
+again when the data leave the axis limits, which grow by half their span at a time. The trajectory is drawn in
+the x-y plane, as 3D axes cannot be blitted.
+
+Usage:
+    python src/utils/live_plot.py [ADDRESS] [--history 20000] [--fps 10] [--decimation 1]
+with ADDRESS tcp://host:port, unix:///path/to/socket or shm://name, the default telemetry address by default.
+"""
+
+import argparse
+import asyncio
+from multiprocessing import shared_memory
+import threading
+import time
+from typing import Callable, List, Optional, Sequence
+import numpy as np
+import matplotlib.pyplot as plt
+from core.state.state import STATE_ARRAY_ORDER
+from core.telemetry import DEFAULT_TELEMETRY_ADDRESS, FrameKind, read_frame, subscribe
+from utils.constants import R_EARTH
+from utils.log import log
+
+DEFAULT_HISTORY = 20000
+DEFAULT_FPS = 10.0
+# fraction of their span by which the axis limits grow when the data leave them
+LIMIT_GROWTH = 0.5
+
+# the columns of the ring buffer after the time, in the field names of the telemetry hello frame
+LIVE_FIELDS = [
+    "true_state.state.x",
+    "true_state.state.y",
+    "true_state.state.z",
+    "true_state.state.vel_x",
+    "true_state.state.vel_y",
+    "true_state.state.vel_z",
+    "true_state.state.ang_vel_x",
+    "observed_state.ang_vel_x",
+]
+LIVE_INDEX = {field: index + 1 for index, field in enumerate(LIVE_FIELDS)}
+
+
+class RingBuffer:
+    """The last `capacity` rows of `width` float64 values.
+
+    Every row is stored twice, `capacity` rows apart, so the rows in order are always one contiguous slice of the
+    storage. Rows are appended by one thread and read by another, under a lock.
+    """
+
+    def __init__(self, capacity: int, width: int) -> None:
+        if capacity < 1:
+            raise ValueError("The capacity of a ring buffer must be at least 1")
+        self.capacity = capacity
+        self._data = np.full((2 * capacity, width), np.nan)
+        self._next = 0
+        self._count = 0
+        # rows appended since the buffer was made, including the ones overwritten since
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, row: np.ndarray) -> None:
+        with self._lock:
+            self._data[self._next] = row
+            self._data[self._next + self.capacity] = row
+            self._next = (self._next + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+            self.total += 1
+
+    def rows(self) -> np.ndarray:
+        """A copy of the rows in the buffer, oldest first."""
+        with self._lock:
+            end = self._next + self.capacity
+            return self._data[end - self._count : end].copy()
+
+
+class TelemetryFeed:
+    """Receives the propagated frames of a telemetry server into a ring buffer, on a background thread."""
+
+    def __init__(self, address: str, buffer: RingBuffer, decimation: int = 1) -> None:
+        self.address = address
+        self.buffer = buffer
+        self.decimation = decimation
+        # set once the sim stops and the server closes the connection
+        self.finished = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="live-plot", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._loop is not None and self._task is not None and not self.finished.is_set():
+            try:
+                self._loop.call_soon_threadsafe(self._task.cancel)
+            except RuntimeError:
+                # the sim stopped, and the loop closed, in the meantime
+                pass
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._task = self._loop.create_task(self._receive())
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        except OSError as e:
+            log.error(f"Could not follow the telemetry of {self.address}: {e}")
+        finally:
+            self._loop.close()
+            self.finished.set()
+
+    async def _receive(self) -> None:
+        reader, writer = await subscribe(self.address, [FrameKind.Propagated], self.decimation)
+        try:
+            hello = await read_frame(reader)
+            fields = hello.info["fields"][FrameKind.Propagated.name.lower()]
+            columns = np.array([fields.index(field) for field in LIVE_FIELDS])
+            row = np.empty(len(LIVE_FIELDS) + 1)
+            while True:
+                frame = await read_frame(reader)
+                row[0] = frame.time
+                row[1:] = frame.values[columns]
+                self.buffer.append(row)
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            writer.close()
+
+
+class SharedMemoryFeed:
+    """Polls the observed state the sim publishes to shared memory. The observed state stands in for the true
+    state, and the time of a row is the wall clock time since the feed started."""
+
+    def __init__(self, name: str, buffer: RingBuffer) -> None:
+        self.buffer = buffer
+        self._shm = shared_memory.SharedMemory(name=name)
+        self._state = np.ndarray((len(STATE_ARRAY_ORDER),), dtype=np.float64, buffer=self._shm.buf)
+        self._columns = np.array([STATE_ARRAY_ORDER.index(field.rsplit(".", 1)[1]) for field in LIVE_FIELDS])
+        self._last: Optional[np.ndarray] = None
+        self._start = time.monotonic()
+
+    def poll(self) -> None:
+        """Appends the published state, if it changed since the last poll."""
+        values = self._state[self._columns].copy()
+        if self._last is not None and np.array_equal(values, self._last):
+            return
+        self._last = values
+        self.buffer.append(np.concatenate([[time.monotonic() - self._start], values]))
+
+    def close(self) -> None:
+        del self._state
+        self._shm.close()
+
+
+def _grown_limits(limits: Sequence[float], low: float, high: float) -> Optional[List[float]]:
+    """New axis limits that contain [low, high] with room to spare, or None if `limits` already do."""
+    if limits[0] <= low and high <= limits[1]:
+        return None
+    low, high = min(low, limits[0]), max(high, limits[1])
+    margin = LIMIT_GROWTH * max(high - low, 1e-9)
+    return [low - margin if low < limits[0] else limits[0], high + margin if high > limits[1] else limits[1]]
+
+
+class LivePlot:
+    """The trajectory and the position, velocity and angular velocity of the rows in a ring buffer, redrawn at a
+    throttled frame rate with blitting.
+
+    Example:
+        buffer = RingBuffer(DEFAULT_HISTORY, len(LIVE_FIELDS) + 1)
+        TelemetryFeed(DEFAULT_TELEMETRY_ADDRESS, buffer).start()
+        LivePlot(buffer).show()
+    """
+
+    def __init__(self, buffer: RingBuffer, fps: float = DEFAULT_FPS, poll: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            buffer (RingBuffer): the rows to draw, the time followed by the LIVE_FIELDS
+            fps (float, optional): the maximum number of redraws per second
+            poll (Optional[Callable[[], None]], optional): called before every redraw, to fill the buffer
+        """
+        self.buffer = buffer
+        self.poll = poll
+        self.fig = plt.figure("CislunarSim live", figsize=(12, 6))
+        self.ax_traj = self.fig.add_subplot(1, 2, 1)
+        self.ax_pos = self.fig.add_subplot(3, 2, 2)
+        self.ax_vel = self.fig.add_subplot(3, 2, 4, sharex=self.ax_pos)
+        self.ax_ang_vel_x = self.fig.add_subplot(3, 2, 6, sharex=self.ax_pos)
+
+        self.ax_traj.add_patch(plt.Circle((0.0, 0.0), R_EARTH, color="g"))
+        self.ax_traj.set_aspect("equal", adjustable="datalim")
+        self.ax_traj.set_xlim(-2 * R_EARTH, 2 * R_EARTH)
+        self.ax_traj.set_ylim(-2 * R_EARTH, 2 * R_EARTH)
+        self.ax_traj.set_xlabel("x")
+        self.ax_traj.set_ylabel("y")
+        (self.traj,) = self.ax_traj.plot([], [], lw=2, c="blue", animated=True)
+        (self.craft,) = self.ax_traj.plot([], [], "o", c="blue", animated=True)
+
+        # each time series line, and the column of the buffer it draws
+        self.series = []
+        for ax, ylabel, fields in [
+            (self.ax_pos, "Position", ["x", "y", "z"]),
+            (self.ax_vel, "Velocity", ["vel_x", "vel_y", "vel_z"]),
+        ]:
+            for field, color in zip(fields, ["hotpink", "green", "blue"]):
+                (line,) = ax.plot([], [], "--", c=color, label=field[-1], animated=True)
+                self.series.append((line, LIVE_INDEX[f"true_state.state.{field}"]))
+            ax.set_ylabel(ylabel)
+            ax.legend(loc="upper left")
+        for field, color, label in [
+            ("true_state.state.ang_vel_x", "hotpink", "x (true)"),
+            ("observed_state.ang_vel_x", "green", "x (observed)"),
+        ]:
+            (line,) = self.ax_ang_vel_x.plot([], [], "--", c=color, label=label, animated=True)
+            self.series.append((line, LIVE_INDEX[field]))
+        self.ax_ang_vel_x.legend(loc="upper left")
+        self.ax_ang_vel_x.set_xlabel("t")
+        for ax in (self.ax_pos, self.ax_vel, self.ax_ang_vel_x):
+            ax.set_xlim(0.0, 1.0)
+            ax.set_ylim(-1.0, 1.0)
+
+        self.title = self.fig.suptitle("Waiting for the sim", animated=True)
+        self.fig.tight_layout()
+        self.artists = [self.traj, self.craft, self.title] + [line for line, _ in self.series]
+        self._background = None
+        self._drawn_total = -1
+        self.fig.canvas.mpl_connect("draw_event", self._on_draw)
+        self.timer = self.fig.canvas.new_timer(interval=int(1000 / fps))
+        self.timer.add_callback(self.refresh)
+
+    def show(self) -> None:
+        self.timer.start()
+        plt.show()
+
+    def _on_draw(self, _) -> None:
+        """After a full draw, caches the background of the figure without the lines, and blits the lines on it."""
+        self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self._blit()
+
+    def _blit(self) -> None:
+        if self._background is None:
+            return
+        canvas = self.fig.canvas
+        canvas.restore_region(self._background)
+        for artist in self.artists:
+            self.fig.draw_artist(artist)
+        canvas.blit(self.fig.bbox)
+
+    def refresh(self) -> None:
+        """Redraws the lines with the rows received since the last frame, if there are any."""
+        if self.poll is not None:
+            self.poll()
+        if self.buffer.total == self._drawn_total:
+            return
+        self._drawn_total = self.buffer.total
+        rows = self.buffer.rows()
+        if not len(rows):
+            return
+
+        times = rows[:, 0]
+        self.traj.set_data(rows[:, LIVE_INDEX["true_state.state.x"]], rows[:, LIVE_INDEX["true_state.state.y"]])
+        self.craft.set_data(rows[-1:, LIVE_INDEX["true_state.state.x"]], rows[-1:, LIVE_INDEX["true_state.state.y"]])
+        for line, column in self.series:
+            line.set_data(times, rows[:, column])
+        self.title.set_text(f"t = {times[-1]:.1f} s, step {self.buffer.total}")
+
+        if self._rescale(rows):
+            # the background changed, it is cached again and the lines blitted by `_on_draw`
+            self.fig.canvas.draw_idle()
+        else:
+            self._blit()
+
+    def _rescale(self, rows: np.ndarray) -> bool:
+        """Grows the axis limits that do not contain the rows, returns whether any did not."""
+        changed = False
+        x, y = rows[:, LIVE_INDEX["true_state.state.x"]], rows[:, LIVE_INDEX["true_state.state.y"]]
+        for set_limits, limits, values in [
+            (self.ax_traj.set_xlim, self.ax_traj.get_xlim(), x),
+            (self.ax_traj.set_ylim, self.ax_traj.get_ylim(), y),
+            (self.ax_pos.set_xlim, self.ax_pos.get_xlim(), rows[:, 0]),
+        ]:
+            changed |= self._grow(set_limits, limits, values)
+        for ax in (self.ax_pos, self.ax_vel, self.ax_ang_vel_x):
+            columns = [column for line, column in self.series if line.axes is ax]
+            changed |= self._grow(ax.set_ylim, ax.get_ylim(), rows[:, columns])
+        return changed
+
+    @staticmethod
+    def _grow(set_limits: Callable, limits: Sequence[float], values: np.ndarray) -> bool:
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return False
+        new_limits = _grown_limits(limits, float(values.min()), float(values.max()))
+        if new_limits is None:
+            return False
+        set_limits(*new_limits)
+        return True
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Follow a running sim in a live plot")
+    parser.add_argument(
+        "address",
+        nargs="?",
+        default=DEFAULT_TELEMETRY_ADDRESS,
+        help=f"telemetry address of the sim, or shm://name of its shared memory (default {DEFAULT_TELEMETRY_ADDRESS})",
+    )
+    parser.add_argument("--history", type=int, default=DEFAULT_HISTORY, help="number of steps kept and drawn")
+    parser.add_argument("--fps", type=float, default=DEFAULT_FPS, help="maximum redraws per second")
+    parser.add_argument("--decimation", type=int, default=1, help="receive every n-th step of the telemetry")
+    args = parser.parse_args(argv)
+
+    buffer = RingBuffer(args.history, len(LIVE_FIELDS) + 1)
+    if args.address.startswith("shm://"):
+        feed = SharedMemoryFeed(args.address[len("shm://") :], buffer)
+        LivePlot(buffer, args.fps, poll=feed.poll).show()
+        feed.close()
+    else:
+        feed = TelemetryFeed(args.address, buffer, args.decimation)
+        feed.start()
+        LivePlot(buffer, args.fps).show()
+        feed.stop()
+
+
+if __name__ == "__main__":
+    main()
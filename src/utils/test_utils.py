@@ -64,7 +64,20 @@ d3456_dict: Dict = {
         "electolyzer_rate": 10.0 * (1/1000),
         "thruster_force": 6,
         "combustion_chamber_volume": 7,
-        "max_iter": 1000000
+        "max_iter": 1000000,
+        "seed": None,
+        "gravity_bodies": ["earth", "moon", "sun"],
+        "propagator": "cowell",
+        "rectify_tol": 0.01,
+        "kepler_tol": 1e-3,
+        "kepler_max_jump": 3600.0,
+        "d_t": 0.1,
+        "integrator": "RK45",
+        "rtol": 1e-3,
+        "atol": 1e-6,
+        "phase_settings": {},
+        "orbital_events": [],
+        "command_timeline": [],
 }
 
 
@@ -0,0 +1,181 @@
+"""Compares a sim run against a stored golden run.
+
+Both runs are interpolated onto a common time grid (the union of their step times where they overlap), and the
+position, velocity and attitude errors are computed at every grid time. The exit status is non-zero if any of the
+maximum errors exceeds its tolerance, so the tool can gate refactors in CI.
+
+Usage:
+    python src/utils/trajectory_diff.py runs/golden.csv runs/new.csv [--pos-tol 1.0] [--vel-tol 1e-3] [--att-tol 1e-6]
+"""
+
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+import sys
+from typing import Dict, List, Optional, Union
+import numpy as np
+import pandas as pd
+
+TIME_COLUMN = "true_state.time"
+POSITION_COLUMNS = ["true_state.state.x", "true_state.state.y", "true_state.state.z"]
+VELOCITY_COLUMNS = ["true_state.state.vel_x", "true_state.state.vel_y", "true_state.state.vel_z"]
+QUATERNION_COLUMNS = [
+    "true_state.state.quat_v1",
+    "true_state.state.quat_v2",
+    "true_state.state.quat_v3",
+    "true_state.state.quat_r",
+]
+
+# default maximum errors: meters, meters/second and radians
+DEFAULT_TOLERANCES = {"position": 1.0, "velocity": 1e-3, "attitude": 1e-6}
+
+
+def load_run(path: Union[str, Path]) -> pd.DataFrame:
+    """Loads a run written by `df_to_csv` (.csv) or stored by the run cache (.pkl)."""
+    path = Path(path)
+    if path.suffix == ".pkl":
+        return pd.read_pickle(path)
+    return pd.read_csv(path)
+
+
+def interpolate(t: np.ndarray, values: np.ndarray, grid: np.ndarray) -> np.ndarray:
+    """Linearly interpolates the rows of `values` (sampled at the increasing times `t`) at the times of `grid`.
+
+    Args:
+        t (np.ndarray): length-n sample times
+        values (np.ndarray): n-by-k samples
+        grid (np.ndarray): length-m times, within [t[0], t[-1]]
+
+    Returns:
+        np.ndarray: m-by-k interpolated samples
+    """
+    if len(t) == 1:
+        return np.repeat(values, len(grid), axis=0)
+    index = np.clip(np.searchsorted(t, grid, side="right") - 1, 0, len(t) - 2)
+    weight = ((grid - t[index]) / (t[index + 1] - t[index]))[:, np.newaxis]
+    return values[index] * (1 - weight) + values[index + 1] * weight
+
+
+def attitude_error(q_a: np.ndarray, q_b: np.ndarray) -> np.ndarray:
+    """Angle (radians) of the rotation between the rows of two n-by-4 quaternion arrays. q and -q are the same
+    attitude. Rows where both quaternions are zero (attitude not simulated) have no error."""
+    norm_a = np.linalg.norm(q_a, axis=1)
+    norm_b = np.linalg.norm(q_b, axis=1)
+    valid = (norm_a > 0) & (norm_b > 0)
+
+    a = q_a[valid] / norm_a[valid, np.newaxis]
+    b = q_b[valid] / norm_b[valid, np.newaxis]
+    # scalar and vector part of the relative rotation conj(a) * b, atan2 keeps small angles accurate
+    cos_half = np.abs(np.einsum("ij,ij->i", a, b))
+    sin_half = np.linalg.norm(a[:, 3:] * b[:, :3] - b[:, 3:] * a[:, :3] - np.cross(a[:, :3], b[:, :3]), axis=1)
+
+    error = np.where(norm_a == norm_b, 0.0, np.pi)
+    error[valid] = 2 * np.arctan2(sin_half, cos_half)
+    return error
+
+
+@dataclass
+class TrajectoryDiff:
+    """Errors of a run against a golden run at every time of the common grid."""
+
+    grid: np.ndarray
+    position: np.ndarray
+    velocity: np.ndarray
+    attitude: np.ndarray
+
+    def errors(self) -> Dict[str, np.ndarray]:
+        return {"position": self.position, "velocity": self.velocity, "attitude": self.attitude}
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """The max, rms and final value of each error, and the time of its max."""
+        summary = {}
+        for name, error in self.errors().items():
+            worst = int(np.argmax(error))
+            summary[name] = {
+                "max": float(error[worst]),
+                "t_max": float(self.grid[worst]),
+                "rms": float(np.sqrt(np.mean(error ** 2))),
+                "final": float(error[-1]),
+            }
+        return summary
+
+    def exceeded(self, tolerances: Dict[str, float]) -> List[str]:
+        """The names of the errors whose max exceeds its tolerance."""
+        return [name for name, error in self.errors().items() if np.max(error) > tolerances[name]]
+
+
+def sorted_unique(run: pd.DataFrame) -> pd.DataFrame:
+    """The steps of a run in time order, keeping the last of any steps with the same time."""
+    return run.sort_values(TIME_COLUMN, kind="stable").drop_duplicates(TIME_COLUMN, keep="last")
+
+
+def diff_runs(golden: pd.DataFrame, run: pd.DataFrame, grid_step: Optional[float] = None) -> TrajectoryDiff:
+    """Interpolates two runs onto a common time grid and computes the errors of `run` against `golden`.
+
+    Args:
+        golden (pd.DataFrame): the reference run
+        run (pd.DataFrame): the run to check
+        grid_step (Optional[float], optional): spacing of a uniform grid. Defaults to None, the union of the step
+            times of both runs.
+
+    Returns:
+        TrajectoryDiff: the errors at each grid time
+    """
+    golden = sorted_unique(golden)
+    run = sorted_unique(run)
+    t_golden = golden[TIME_COLUMN].to_numpy(dtype=np.float64)
+    t_run = run[TIME_COLUMN].to_numpy(dtype=np.float64)
+    start, end = max(t_golden[0], t_run[0]), min(t_golden[-1], t_run[-1])
+    if start > end:
+        raise ValueError(f"The runs do not overlap: [{t_golden[0]}, {t_golden[-1]}] and [{t_run[0]}, {t_run[-1]}]")
+
+    if grid_step is not None:
+        grid = np.arange(start, end, grid_step)
+        grid = np.append(grid, end) if len(grid) == 0 or grid[-1] < end else grid
+    else:
+        grid = np.union1d(t_golden, t_run)
+        grid = grid[(grid >= start) & (grid <= end)]
+
+    columns = POSITION_COLUMNS + VELOCITY_COLUMNS + QUATERNION_COLUMNS
+    golden_values = interpolate(t_golden, golden[columns].to_numpy(dtype=np.float64), grid)
+    run_values = interpolate(t_run, run[columns].to_numpy(dtype=np.float64), grid)
+    delta = run_values - golden_values
+
+    return TrajectoryDiff(
+        grid,
+        position=np.linalg.norm(delta[:, 0:3], axis=1),
+        velocity=np.linalg.norm(delta[:, 3:6], axis=1),
+        attitude=attitude_error(golden_values[:, 6:10], run_values[:, 6:10]),
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare a sim run against a golden run")
+    parser.add_argument("golden", type=str, help="path to the golden run (.csv or .pkl)")
+    parser.add_argument("run", type=str, help="path to the run to check (.csv or .pkl)")
+    parser.add_argument("--pos-tol", type=float, default=DEFAULT_TOLERANCES["position"], help="max position error (m)")
+    parser.add_argument("--vel-tol", type=float, default=DEFAULT_TOLERANCES["velocity"], help="max velocity error (m/s)")
+    parser.add_argument("--att-tol", type=float, default=DEFAULT_TOLERANCES["attitude"], help="max attitude error (rad)")
+    parser.add_argument("--grid-step", type=float, default=None, help="spacing (s) of a uniform comparison grid")
+    args = parser.parse_args(argv)
+
+    diff = diff_runs(load_run(args.golden), load_run(args.run), args.grid_step)
+    tolerances = {"position": args.pos_tol, "velocity": args.vel_tol, "attitude": args.att_tol}
+
+    print(f"Compared {len(diff.grid)} times from t={diff.grid[0]} to t={diff.grid[-1]}")
+    for name, stats in diff.summary().items():
+        print(
+            f"{name:>9}: max {stats['max']:.3e} at t={stats['t_max']}, rms {stats['rms']:.3e}, "
+            f"final {stats['final']:.3e} (tolerance {tolerances[name]:.1e})"
+        )
+
+    exceeded = diff.exceeded(tolerances)
+    if exceeded:
+        print(f"FAILED: {', '.join(exceeded)} error exceeds its tolerance")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
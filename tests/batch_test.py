@@ -0,0 +1,79 @@
+import json
+import os
+from pathlib import Path
+import tempfile
+import unittest
+from batch import MANIFEST_NAME, Job, make_jobs, read_manifest, resolve_configs, run_batch, run_job
+
+CONFIG = {
+    "parameters": {"max_iter": 3, "seed": 1},
+    "initial_condition": {"x": 7e6, "vel_y": 7.5e3, "time": 1651906800},
+    "models": ["pos"],
+}
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+        for name in ("a", "b"):
+            (self.root / f"{name}.json").write_text(json.dumps(CONFIG))
+        (self.root / "broken.json").write_text(json.dumps({"parameters": {"max_iter": "three"}}))
+        (self.root / "schema.json").write_text("{}")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_resolve_configs(self):
+        paths = resolve_configs([str(self.root / "*.json")])
+        self.assertEqual([Path(path).name for path in paths], ["a.json", "b.json", "broken.json"])
+
+        manifest = self.root / "list.txt"
+        manifest.write_text(f"# the nominal runs\n{self.root / 'b.json'}\n\n{self.root / 'a.json'}  # again\n")
+        paths = resolve_configs([str(self.root / "a.json")], str(manifest))
+        self.assertEqual([Path(path).name for path in paths], ["a.json", "b.json"])
+
+    def test_make_jobs(self):
+        previous = {"runs": [{"config_path": "x/a.json", "wall_time": 1.0}, {"config_path": "y/a.json", "wall_time": 5.0}]}
+        jobs = make_jobs(["x/a.json", "y/a.json", "c.json"], previous)
+        # runs without an estimate first, then longest first, and the names of the outputs are unique
+        self.assertEqual([job.config_path for job in jobs], ["c.json", "y/a.json", "x/a.json"])
+        self.assertEqual(sorted(job.name for job in jobs), ["a", "a_2", "c"])
+
+    def test_run_batch(self):
+        results = self.root / "results"
+        jobs = make_jobs(resolve_configs([str(self.root / "*.json")]))
+        cwd = os.getcwd()
+        manifest = run_batch(jobs, results, workers=2, metrics_dir=str(self.root / "metrics"))
+        self.assertEqual(os.getcwd(), cwd)
+
+        self.assertEqual(manifest, read_manifest(results))
+        self.assertEqual(manifest["failed"], 1)
+        runs = {run["name"]: run for run in manifest["runs"]}
+        self.assertEqual(runs["broken"]["status"], "failed")
+        for name in ("a", "b"):
+            self.assertEqual(runs[name]["status"], "ok")
+            self.assertGreater(runs[name]["steps"], 0)
+            self.assertTrue((results / runs[name]["outputs"][0]).exists())
+        self.assertEqual(sorted(path.name for path in results.iterdir()), ["a.csv", "a_integrator.csv", "b.csv", "b_integrator.csv", MANIFEST_NAME])
+        self.assertIn('cislunarsim_running{run="a"} 0', (self.root / "metrics" / "a.prom").read_text())
+
+    def test_interrupted_run(self):
+        # a craft without mass cannot thrust, so the step into the thrust raises
+        t0 = CONFIG["initial_condition"]["time"]
+        thrust = {"command": "thrust", "start": t0 + 0.15, "end": t0 + 100, "direction": [1.0, 0.0, 0.0], "force": 1.0}
+        parameters = {**CONFIG["parameters"], "max_iter": 5, "command_timeline": [thrust]}
+        (self.root / "thrust.json").write_text(json.dumps({**CONFIG, "parameters": parameters}))
+
+        results = self.root / "results"
+        results.mkdir()
+        result = run_job(Job(str(self.root / "thrust.json"), "thrust"), str(results))
+        self.assertEqual(result.status, "interrupted")
+        self.assertIn("ValueError", result.error)
+        # the steps before the exception are kept
+        self.assertEqual(result.steps, 1)
+        self.assertTrue((results / "thrust.csv").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+import numpy as np
+from benchmark import pareto_front, propagate, run_matrix, with_settings
+from core.config import Config
+from utils.constants import IntegratorEnum
+
+ISS_CONFIG = "configs/iss.json"
+
+
+class BenchmarkTest(unittest.TestCase):
+    def test_pareto_front(self):
+        wall_times = np.array([1.0, 2.0, 2.0, 3.0, 1.0])
+        errors = np.array([5.0, 1.0, 2.0, 0.5, 5.0])
+        # the third is slower than the second for a larger error, equal points do not dominate each other
+        np.testing.assert_array_equal(pareto_front(wall_times, errors), [True, True, False, True, True])
+
+    def test_with_settings(self):
+        config = Config.make_config(ISS_CONFIG)
+        changed = with_settings(config, {"integrator": IntegratorEnum.DOP853, "d_t": 5.0})
+        self.assertEqual(changed.param.integrator, "DOP853")
+        self.assertEqual(changed.param.d_t, 5.0)
+        # the original config is untouched
+        self.assertEqual(config.param.integrator, "RK45")
+
+    def test_propagate_ends_at_duration(self):
+        config = with_settings(Config.make_config(ISS_CONFIG), {"d_t": 7.0})
+        result = propagate(config, 20.0)
+        self.assertAlmostEqual(result.final.time, config.init_cond.time + 20.0)
+        self.assertEqual(result.steps, 3)
+        self.assertGreater(result.rhs_evaluations, 0)
+
+    def test_run_matrix(self):
+        table = run_matrix([ISS_CONFIG], 60.0, [30.0, 60.0], ["RK45"], [1e-3, 1e-9], ["cowell"])
+        self.assertEqual(len(table), 4)
+        self.assertTrue(table["pareto"].any())
+        # a tighter tolerance never costs fewer evaluations at the same step length
+        for _, group in table.groupby("d_t"):
+            loose, tight = group.sort_values("rtol", ascending=False)["rhs_evaluations"]
+            self.assertLessEqual(loose, tight)
+
+
+if __name__ == "__main__":
+    unittest.main()
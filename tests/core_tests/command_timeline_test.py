@@ -0,0 +1,67 @@
+import unittest
+import numpy as np
+from core.command_timeline import CommandTimeline, first_difference
+from core.config import Config
+from core.event import AttitudeFiringEvent
+from core.integrator.integrator import propagate_state
+from core.models.model_list import ModelContainer
+from core.state.statetime import StateTime
+from utils.constants import ModelEnum
+
+T0 = 1651906800.0
+THRUST = {"command": "thrust", "start": T0 + 100, "end": T0 + 400, "direction": [2.0, 0.0, 0.0], "force": 10.0}
+ELECTROLYSIS = {"command": "electrolysis", "start": T0 + 50, "end": T0 + 250}
+PULSE = {"command": "attitude_pulse", "time": T0 + 300, "delta_ang_vel": [0.0, 0.0, 0.1]}
+
+
+class CommandTimelineTest(unittest.TestCase):
+    def test_lookup(self):
+        timeline = CommandTimeline([PULSE, THRUST, ELECTROLYSIS, dict(PULSE)], electrolyzer_rate=0.01)
+        np.testing.assert_array_equal(timeline.boundaries(T0, T0 + 400), [T0 + 50, T0 + 100, T0 + 250, T0 + 300])
+        self.assertEqual(len(timeline.boundaries(T0 + 400, T0 + 1000)), 0)
+
+        forces = timeline.thrust_forces(np.array([T0 + 99, T0 + 100, T0 + 399, T0 + 400]))
+        np.testing.assert_array_equal(forces[:, 0], [0.0, 10.0, 10.0, 0.0])
+        self.assertTrue(timeline.thrusting(T0 + 200))
+        np.testing.assert_array_equal(timeline.electrolysis_rates(np.array([T0, T0 + 50])), [0.0, 0.01])
+
+        # pulses at the same time add up, and only apply at exactly their time
+        state_array = np.zeros(21)
+        self.assertEqual(timeline.apply_pulses(T0 + 300, state_array)[3], 0.2)
+        self.assertIs(timeline.apply_pulses(T0 + 301, state_array), state_array)
+
+    def test_overlap(self):
+        with self.assertRaises(ValueError):
+            CommandTimeline([THRUST, {**THRUST, "start": T0 + 399, "end": T0 + 500}])
+
+    def test_first_difference(self):
+        self.assertEqual(first_difference([THRUST, PULSE], [dict(PULSE), dict(THRUST)]), float("inf"))
+        self.assertEqual(first_difference([THRUST, PULSE], [THRUST]), T0 + 300)
+        self.assertEqual(first_difference([THRUST], [{**THRUST, "force": 11.0}]), T0 + 100)
+
+    def test_split_at_commands(self):
+        """A single long step integrates the piecewise constant forcing exactly."""
+        parameters = {
+            "gravity_bodies": [],
+            "dry_mass": 5.0,
+            "electolyzer_rate": 0.01,
+            "command_timeline": [THRUST, PULSE, {**ELECTROLYSIS, "start": T0 + 500, "end": T0 + 600}],
+        }
+        models = ModelContainer(Config(parameters, {"time": T0, "fuel_mass": 5.0}, [ModelEnum.PositionModel]))
+        final = propagate_state(models, StateTime.from_dict({"time": T0, "fuel_mass": 5.0}), 1000.0)
+
+        acceleration = 10.0 / 10.0
+        self.assertAlmostEqual(final.state.vel_x, acceleration * 300)
+        self.assertAlmostEqual(final.state.x, acceleration * 300 ** 2 / 2 + acceleration * 300 * 600)
+        self.assertAlmostEqual(final.state.ang_vel_z, 0.1)
+        self.assertAlmostEqual(final.state.fuel_mass, 4.0)
+        self.assertEqual(final.time, T0 + 1000)
+
+    def test_attitude_firing_event(self):
+        models = ModelContainer(Config({}, {"time": T0}, [ModelEnum.AttitudeModel]))
+        fired, _ = AttitudeFiringEvent(models, [0.1, 0.0, 0.0]).evaluate(StateTime.from_dict({"ang_vel_x": 0.2}))
+        self.assertAlmostEqual(fired.state.ang_vel_x, 0.3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -148,6 +148,16 @@ class ConfigTestCases(unittest.TestCase):
             Config.make_config(FAIL_GYRO_PATH)
             # gyro_bias only has two items, it requires 3, this test tests against the requirements not specified by the json schema
 
+    def test_to_dict(self):
+        """Tests that a config rebuilt from its dict matches the original."""
+        config = Config.make_config("configs/test1.json")
+        config_dict = config.to_dict()
+        rebuilt = Config(**config_dict)
+        self.assertEqual(rebuilt.param.__dict__, config.param.__dict__)
+        self.assertEqual(rebuilt.init_cond.__dict__, config.init_cond.__dict__)
+        self.assertEqual(rebuilt.models, config.models)
+        self.assertEqual(config_dict, rebuilt.to_dict())
+
 
 if __name__ == "__main__":
     unittest.main()
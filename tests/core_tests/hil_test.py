@@ -0,0 +1,121 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from multiprocessing import shared_memory
+import numpy as np
+from core.config import Config
+from core.hil import HilClient, Lockstep, LockstepStats, decode_command, encode_command
+from core.state.command import ActuatorCommand
+from main import SimRunner
+from utils.constants import ModelEnum
+
+
+def flight_software(address: str, skip: int, steps: int) -> None:
+    """Commands the thrusters on from the first step on, and never answers step `skip`."""
+    while True:
+        try:
+            client = HilClient(address)
+            break
+        except (FileNotFoundError, ConnectionRefusedError):
+            time.sleep(0.01)
+    for _ in range(steps):
+        observation = client.receive_observation(timeout=5.0)
+        if observation is None:
+            break
+        seq = observation[0]
+        if seq != skip:
+            client.send_command(seq, ActuatorCommand(propulsion_on=seq >= 1, solenoid_actuation_on=True))
+    client.close()
+
+
+class HilTestCases(unittest.TestCase):
+    """
+    This class tests the lockstep protocol against a flight software thread.
+    """
+
+    def test_command_framing(self):
+        command = ActuatorCommand(True, False, 2.5)
+        self.assertEqual((7, command), decode_command(encode_command(7, command)))
+
+    def test_round_trip_budget(self):
+        # a round trip is measured against the length of its own step
+        stats = LockstepStats(round_trips=[0.05, 0.05, 0.05], step_sizes=[float("nan"), 10.0, 0.1])
+        summary = stats.summary()
+        self.assertAlmostEqual(0.005 + 0.99 * (0.5 - 0.005), summary["rtt_step_p99"])
+        self.assertNotIn("rtt_step_p99", LockstepStats([0.05], [float("nan")]).summary())
+
+    def run_lockstep(self, address: str) -> None:
+        config = Config({"max_iter": 4, "thruster_force": 3.0}, {"x": 7e6}, [ModelEnum.UnittestModel, ModelEnum.ThrusterModel])
+        fsw = threading.Thread(target=flight_software, args=(address, 3, 6))
+        fsw.start()
+        lockstep = Lockstep(address, timeout=0.2, connect_timeout=5.0)
+        run_df = SimRunner(config, shm_name=None, hil=lockstep).run()
+        fsw.join()
+
+        # the command of a step is applied from the next step on, step 3 times out and holds the command of step 2
+        self.assertEqual([0, 0, 1, 1, 1, 1], run_df["true_state.state.propulsion_on"].tolist())
+        self.assertEqual([0, 0, 3, 3, 3, 3], run_df["true_state.state.force_propulsion_thrusters"].tolist())
+        self.assertEqual(1, lockstep.stats.timeouts)
+        self.assertEqual(5, len(lockstep.stats.round_trips))
+        for step_size in lockstep.stats.step_sizes:
+            self.assertAlmostEqual(0.1, step_size)
+
+    def test_unix_socket(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            address = f"unix://{os.path.join(tmp_dir, 'hil.sock')}"
+            self.run_lockstep(address)
+            self.assertFalse(os.path.exists(address[len("unix://") :]))
+
+    def test_shared_memory(self):
+        self.run_lockstep(f"shm://cislunarsim-hil-test-{os.getpid()}")
+
+    def test_commanded_thrust(self):
+        params = {"max_iter": 4, "thruster_force": 3.0, "dry_mass": 1.0, "gravity_bodies": ["earth"]}
+        config = Config(params, {"x": 7e6, "vel_y": 7.5e3}, [ModelEnum.PositionModel, ModelEnum.ThrusterModel])
+        address = f"shm://cislunarsim-hil-test-thrust-{os.getpid()}"
+        fsw = threading.Thread(target=flight_software, args=(address, -1, 6))
+        fsw.start()
+        run_df = SimRunner(config, shm_name=None, hil=Lockstep(address, timeout=1.0)).run()
+        fsw.join()
+        coasting_df = SimRunner(config, shm_name=None).run()
+
+        # 3 N on 1 kg speeds the craft up by 0.3 m/s every 0.1 s step, from the step after the first command
+        velocity_columns = [f"true_state.state.vel_{axis}" for axis in "xyz"]
+        speed_gain = np.linalg.norm(run_df[velocity_columns].to_numpy(), axis=1) - np.linalg.norm(
+            coasting_df[velocity_columns].to_numpy(), axis=1
+        )
+        np.testing.assert_allclose([0.0, 0.0, 0.3, 0.6, 0.9, 1.2], speed_gain, atol=1e-5)
+
+    def test_address_in_use(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "hil.sock")
+            owner = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            owner.bind(path)
+            try:
+                lockstep = Lockstep(f"unix://{path}", connect_timeout=0.05)
+                with self.assertRaises(OSError):
+                    lockstep.open()
+                lockstep.close()
+                # the socket file of the process listening on the address is left alone
+                self.assertTrue(os.path.exists(path))
+            finally:
+                owner.close()
+
+    def test_no_flight_software(self):
+        config = Config({"max_iter": 4}, {"x": 7e6}, [ModelEnum.UnittestModel])
+        shm_name = f"cislunarsim-hil-test-observed-{os.getpid()}"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            lockstep = Lockstep(f"unix://{os.path.join(tmp_dir, 'hil.sock')}", connect_timeout=0.05)
+            with self.assertRaises(TimeoutError):
+                SimRunner(config, shm_name=shm_name, hil=lockstep).run()
+            self.assertEqual([], os.listdir(tmp_dir))
+        # the shared memory of the observed states is released too
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=shm_name)
+
+
+if __name__ == "__main__":
+    unittest.main()
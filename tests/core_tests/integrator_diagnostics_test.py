@@ -0,0 +1,93 @@
+import unittest
+import numpy as np
+from scipy.integrate import solve_ivp
+from scipy.integrate._ivp.ivp import OdeResult
+from core.config import Config
+from core.integrator.diagnostics import IntegratorDiagnostics, event_steps, rejected_steps
+from core.sim import CislunarSim
+from utils.constants import ModelEnum
+
+
+def segment(times, nfev: int = 100, status: int = 0, message: str = "") -> OdeResult:
+    return OdeResult(t=np.array(times, dtype=float), nfev=nfev, status=status, message=message, t_events=None)
+
+
+class IntegratorDiagnosticsTest(unittest.TestCase):
+    def test_rejected_steps(self):
+        # 2 evaluations to start, 6 per attempted step
+        self.assertEqual(rejected_steps("RK45", 2 + 6 * 10, 8), 2)
+        self.assertEqual(rejected_steps("DOP853", 2 + 12 * 5 + 3 * 2, 5, event_steps=2), 0)
+        # one dense output per step with events, however many it locates
+        self.assertEqual(rejected_steps("DOP853", 2 + 12 * 6 + 3, 5, event_steps=1), 1)
+        self.assertIsNone(rejected_steps("LSODA", 100, 8))
+
+        # a step far too long for an oscillation of period 0.2 s is rejected until it fits
+        solution = solve_ivp(lambda t, y: [y[1], -1e3 * y[0]], (0, 1), [1.0, 0.0], first_step=1.0)
+        diagnostics = IntegratorDiagnostics()
+        diagnostics.record(solution, "RK45")
+        row = diagnostics.rows[0]
+        self.assertGreater(row["rejected"], 0)
+        self.assertEqual((row["accepted"], row["nfev"]), (len(solution.t) - 1, solution.nfev))
+        self.assertEqual(diagnostics.rejected_steps, row["rejected"])
+
+    def test_event_steps(self):
+        # the last step of this straight line locates all four events
+        events = [lambda t, y, level=level: y[0] - level for level in (0.3, 0.4, 0.45, 0.5)]
+        solution = solve_ivp(lambda t, y: [1.0], (0, 1), [0.0], method="DOP853", events=events)
+        self.assertEqual(event_steps(solution), 1)
+        self.assertEqual(solution.nfev, 2 + 12 * (len(solution.t) - 1) + 3)
+        self.assertEqual(rejected_steps("DOP853", solution.nfev, len(solution.t) - 1, event_steps(solution)), 0)
+        self.assertEqual(event_steps(segment([0.0, 1.0])), 0)
+
+    def test_step_shrink_alert(self):
+        diagnostics = IntegratorDiagnostics(capacity=2)
+        for start in range(5):
+            diagnostics.record(segment([start, start + 0.01, start + 0.5, start + 1.0]), "RK45")
+        # the first and last steps do not count, nor do segments without steps between them
+        self.assertEqual(diagnostics.rows["h_min"][0], 0.49)
+        diagnostics.record(segment([5.0, 6.0]), "RK45")
+        self.assertTrue(np.isnan(diagnostics.rows["h_min"][-1]))
+        self.assertFalse(diagnostics.rows["alert"].any())
+
+        with self.assertLogs("Sim", level="WARNING") as logs:
+            diagnostics.record(segment([6.0, 6.1, 6.101, 6.102, 7.0]), "RK45")
+            diagnostics.record(segment([7.0, 7.1, 7.1001, 8.0]), "RK45")
+        # one warning where the alerts begin
+        self.assertEqual(len(logs.output), 1)
+        self.assertEqual(diagnostics.rows["alert"].tolist(), [False] * 6 + [True, True])
+
+        summary = diagnostics.summary()
+        self.assertEqual((summary["segments"], summary["alerts"], summary["first_alert"]), (8, 2, 6.0))
+        self.assertAlmostEqual(summary["h_min"], 1e-4)
+
+    def test_failed_segment(self):
+        diagnostics = IntegratorDiagnostics()
+        diagnostics.record(segment([0.0, 1.0]), "Radau")
+        with self.assertLogs("Sim", level="WARNING"):
+            diagnostics.record(segment([1.0, 1.5], status=-1, message="Required step size is less than spacing"), "RK45")
+        table = diagnostics.to_df()
+        self.assertEqual(table["message"].tolist(), ["", "Required step size is less than spacing"])
+        self.assertEqual(table["rejected"].tolist(), [-1, 15])
+        self.assertEqual(diagnostics.summary()["failed"], 1)
+
+        # the table of a stored run restores the diagnostics up to the end of the reused steps
+        restored = IntegratorDiagnostics()
+        restored.extend_from_df(table, end_time=1.0)
+        self.assertEqual((len(restored), restored.accepted_steps, restored.messages), (1, 1, {}))
+        restored.extend_from_df(table[table["t_start"] >= 1.0])
+        self.assertEqual(restored.messages, {1: "Required step size is less than spacing"})
+
+    def test_run_records_every_segment(self):
+        parameters = {"max_iter": 5, "d_t": 10.0}
+        config = Config(parameters, {"x": 7e6, "vel_y": 7.5e3, "time": 1651906800}, [ModelEnum.PositionModel])
+        sim = CislunarSim(config, shm_name=None)
+        for _ in range(5):
+            sim.step()
+        rows = sim.models.diagnostics.rows
+        self.assertEqual(len(rows), 5)
+        np.testing.assert_allclose(rows["t_end"] - rows["t_start"], 10.0)
+        self.assertEqual(rows["nfev"].sum(), sim.models.rhs_evaluations)
+
+
+if __name__ == "__main__":
+    unittest.main()
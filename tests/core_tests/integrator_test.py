@@ -1,7 +1,28 @@
 import unittest
+import numpy as np
+from scipy.integrate import solve_ivp
+from core.config import Config
+from core.integrator.fast_forward import kepler_jump
+from core.integrator.integrator import coast, propagate_state
+from core.models.model_list import ModelContainer
+from core.state.state import POSITION_INDICES, VELOCITY_INDICES
+from utils.constants import ModelEnum
+from utils.kepler import kepler_propagate
 
 DEBUG = False
 
+# ISS-like low Earth orbit
+ISS_IC = {
+    "x": 201289.9547729282,
+    "y": -1748827.84098,
+    "z": 6551130.06623,
+    "vel_x": 7665.4147515,
+    "vel_y": 13.6338551383,
+    "vel_z": -229.87558448,
+    "time": 1651906800,
+}
+
+
 class IntegratorTestCases(unittest.TestCase):
     """
     This class tests the methods of class IntegratorTest.
@@ -14,6 +35,68 @@ class IntegratorTestCases(unittest.TestCase):
         """
         ...
 
+    def test_propagate_encke(self):
+        """
+        Encke's method agrees with a tight tolerance Cowell integration of the same models.
+        """
+        config = Config({"propagator": "encke"}, dict(ISS_IC), [ModelEnum.PositionModel])
+        models = ModelContainer(config)
+        init = config.init_cond
+        dt = 600.0
+
+        encke = propagate_state(models, init, dt)
+        self.assertEqual(init.time + dt, encke.time)
+
+        reference = solve_ivp(
+            models.state_update_function,
+            (init.time, init.time + dt),
+            init.state.to_array().astype(np.float64),
+            rtol=1e-10,
+            atol=1e-9,
+        )
+        error = encke.state.to_array()[POSITION_INDICES] - reference.y[POSITION_INDICES, -1]
+        self.assertLess(np.linalg.norm(error), 10.0)
+
+
+    def test_kepler_fast_forward(self):
+        """
+        In low Earth orbit the perturbations are below the default `kepler_tol`, so a coast is jumped
+        analytically. At geostationary altitude the Sun's acceleration is too large and no jump is made.
+        """
+        config = Config({"propagator": "kepler"}, dict(ISS_IC), [ModelEnum.PositionModel])
+        models = ModelContainer(config)
+        init = config.init_cond
+        init_array = init.state.to_array().astype(np.float64)
+
+        coasted = coast(models, init, 2 * 86400.0)
+        self.assertEqual(init.time + 2 * 86400.0, coasted.time)
+
+        r, v = kepler_propagate(init_array[POSITION_INDICES], init_array[VELOCITY_INDICES], 2 * 86400.0)
+        coasted_array = coasted.state.to_array()
+        np.testing.assert_allclose(r, coasted_array[POSITION_INDICES], atol=1.0)
+        np.testing.assert_allclose(v, coasted_array[VELOCITY_INDICES], atol=1e-3)
+
+        geo_ic = {"x": 4.2164e7, "vel_y": 3074.66, "time": ISS_IC["time"]}
+        geo_config = Config({"propagator": "kepler"}, geo_ic, [ModelEnum.PositionModel])
+        self.assertIsNone(kepler_jump(ModelContainer(geo_config), geo_config.init_cond, 3600.0))
+
+    def test_kepler_end_check(self):
+        """
+        A jump whose end is too perturbed is refused before the other models are integrated over it.
+        """
+        models_list = [ModelEnum.PositionModel, ModelEnum.AttitudeModel]
+        config = Config({"propagator": "kepler"}, dict(ISS_IC), models_list)
+        models = ModelContainer(config)
+        self.assertIsNotNone(kepler_jump(models, config.init_cond, 3600.0))
+        self.assertEqual(1, len(models.diagnostics))
+
+        # an eccentric orbit from low Earth orbit, a day out it is far from the Earth
+        eccentric_ic = {"x": 6.8e6, "vel_y": 10.6e3, "time": ISS_IC["time"]}
+        eccentric_config = Config({"propagator": "kepler"}, eccentric_ic, models_list)
+        models = ModelContainer(eccentric_config)
+        self.assertIsNone(kepler_jump(models, eccentric_config.init_cond, 86400.0))
+        self.assertEqual(0, len(models.diagnostics))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,74 @@
+import json
+from pathlib import Path
+import tempfile
+import unittest
+from core.config import Config
+from core.metrics import SimMetrics, to_prometheus, write_atomically
+from core.sim import CislunarSim
+from utils.constants import ModelEnum
+
+INITIAL_CONDITION = {"x": 7e6, "vel_y": 7.5e3, "time": 1651906800}
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class MetricsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_prometheus(self):
+        text = to_prometheus({"steps": 3, "running": 1}, {"run": 'tli "nominal"'})
+        self.assertIn("# TYPE cislunarsim_steps_total counter\n", text)
+        self.assertIn('cislunarsim_running{run="tli \\"nominal\\""} 1\n', text)
+
+    def test_write_atomically(self):
+        path = self.root / "run.prom"
+        write_atomically(path, "a 1\n")
+        write_atomically(path, "a 2\n")
+        self.assertEqual(path.read_text(), "a 2\n")
+        self.assertEqual([child.name for child in self.root.iterdir()], ["run.prom"])
+
+    def test_sim_metrics(self):
+        config = Config({"max_iter": 100}, INITIAL_CONDITION, [ModelEnum.PositionModel])
+        sim = CislunarSim(config, shm_name=None)
+        clock = FakeClock()
+        metrics = SimMetrics(str(self.root / "metrics.json"), interval=1.0, labels={"run": "test"}, clock=clock)
+        metrics.start(sim, config)
+        self.assertEqual(json.loads(metrics.path.read_text())["eta_seconds"], -1.0)
+
+        for _ in range(10):
+            sim.step()
+            self.assertFalse(metrics.update(sim))
+        clock.now = 1.0
+        self.assertTrue(metrics.update(sim))
+        written = json.loads(metrics.path.read_text())
+        self.assertEqual(written["steps"], 10)
+        self.assertEqual(written["labels"], {"run": "test"})
+        self.assertAlmostEqual(written["steps_per_second"], 10.0)
+        self.assertAlmostEqual(written["sim_seconds_per_second"], 1.0, places=5)
+        self.assertEqual(written["rhs_evaluations_per_step"], sim.models.rhs_evaluations / 10)
+        self.assertEqual(written["integrator_steps"], sim.models.diagnostics.accepted_steps)
+        # the run stops after max_iter steps
+        self.assertAlmostEqual(written["eta_seconds"], 9.0)
+        self.assertEqual(written["running"], 1)
+
+        # not written again within the interval
+        sim.step()
+        self.assertFalse(metrics.update(sim))
+        metrics.finish(sim)
+        written = json.loads(metrics.path.read_text())
+        self.assertEqual((written["steps"], written["running"], written["eta_seconds"]), (11, 0, 0.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
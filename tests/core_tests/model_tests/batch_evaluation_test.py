@@ -0,0 +1,59 @@
+import unittest
+import numpy as np
+from core.models.derived_models import DerivedAttitude, DerivedPosition
+from core.models.dynamics_model import AttitudeDynamics, InertiaModel
+from core.models.gyro_model import GyroModel
+from core.models.model_base import Model
+from core.models.model_list import PositionDynamics
+from core.parameters import Parameters
+from core.state.state import STATE_ARRAY_ORDER, array_to_state
+from core.state.statetime import StateTime
+from utils.test_utils import d3456, state_1
+
+
+class BatchEvaluationTest(unittest.TestCase):
+    """The native `evaluate_batch` of each model against the row by row fallback of `Model`."""
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.times = 1.6e9 + np.array([0.0, 0.4, 1.5, 7.0, 7.9])
+        base = state_1.to_array().astype(np.float64)
+        base[[STATE_ARRAY_ORDER.index(field) for field in ("x", "y", "z")]] = [7e6, 1e6, -2e6]
+        self.states = base + rng.normal(scale=[0.0] + [0.5] * 7 + [10.0] * 6 + [0.0] * 7, size=(5, len(base)))
+        # a quaternion without a vector part
+        self.states[4, [STATE_ARRAY_ORDER.index(field) for field in ("quat_v1", "quat_v2", "quat_v3")]] = 0.0
+
+    def assert_batch_matches_rows(self, model: Model, rtol: float = 1e-12) -> None:
+        batch = model.evaluate_batch(self.times, self.states)
+        rows = Model.evaluate_batch(model, self.times, self.states)
+        self.assertEqual(batch.shape, rows.shape)
+        np.testing.assert_allclose(batch, rows, rtol=rtol, atol=1e-300)
+
+    def test_environment_models(self):
+        self.assert_batch_matches_rows(PositionDynamics(d3456), rtol=1e-9)
+        self.assert_batch_matches_rows(AttitudeDynamics(d3456))
+
+    def test_derived_models(self):
+        self.assert_batch_matches_rows(DerivedPosition(), rtol=1e-9)
+        self.assert_batch_matches_rows(DerivedAttitude())
+
+    def test_row_fallback(self):
+        """Models without a native version are evaluated one row at a time."""
+        inertia = InertiaModel().evaluate_batch(self.times, self.states)
+        self.assertEqual(inertia.shape, (5, 9))
+        expected = InertiaModel().evaluate(self.times[0], array_to_state(self.states[0]))
+        self.assertEqual(inertia[0, 0], expected["Ixx"])
+
+    def test_gyro_model_draws_same_noise(self):
+        """The batch draws the same noise as evaluating the rows in order."""
+        gyro_batch = GyroModel(Parameters({"seed": 3}))
+        gyro_rows = GyroModel(Parameters({"seed": 3}))
+        batch = gyro_batch.evaluate_batch(self.times, self.states)
+        for t, state_array, observed in zip(self.times, self.states, batch):
+            expected = gyro_rows.evaluate(StateTime(array_to_state(state_array), t))
+            for field, value in expected.items():
+                self.assertEqual(observed[STATE_ARRAY_ORDER.index(field)], value)
+
+
+if __name__ == "__main__":
+    unittest.main()
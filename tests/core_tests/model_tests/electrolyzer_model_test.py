@@ -1,6 +1,8 @@
 import unittest
 from core.parameters import Parameters
 from core.models.electrolyzer_model import ElectrolyzerModel
+from core.state.command import ActuatorCommand
+from core.state.state import State
 from core.state.statetime import StateTime
 from typing import Dict
 from utils.test_utils import state_1
@@ -16,7 +18,7 @@ class ElectrolyzerModelUnitTest(unittest.TestCase):
         param_a = Parameters(config_a)
         state_a = StateTime(state_1)
 
-        electrolyzer_a = ElectrolyzerModel(10.0, param_a)
+        electrolyzer_a = ElectrolyzerModel(param_a, 10.0)
         eval_a = electrolyzer_a.evaluate(state_a)
 
         # verify objects exist/are reasonable
@@ -24,5 +26,16 @@ class ElectrolyzerModelUnitTest(unittest.TestCase):
         self.assertIsInstance(electrolyzer_a, ElectrolyzerModel)
         self.assertIsInstance(eval_a, Dict)
 
+    def test_commanded_electrolysis(self):
+        """Tests that a commanded electrolysis is performed once."""
+        param = Parameters({})
+        state = StateTime(State(fuel_mass=1.0))
+        electrolyzer = ElectrolyzerModel(param)
+        self.assertEqual(1.0, electrolyzer.evaluate(state)["fuel_mass"])
+
+        electrolyzer.command(ActuatorCommand(electrolysis_duration=10.0))
+        self.assertAlmostEqual(1.0 - 10.0 * param.electolyzer_rate, electrolyzer.evaluate(state)["fuel_mass"])
+        self.assertEqual(1.0, electrolyzer.evaluate(state)["fuel_mass"])
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
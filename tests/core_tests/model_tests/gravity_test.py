@@ -0,0 +1,58 @@
+import unittest
+import numpy as np
+from core.models.gravity import BodyTable
+from core.models.model_list import PositionDynamics
+from core.parameters import Parameters
+from core.state.state import State
+from core.state.statetime import StateTime
+from utils.constants import BodyEnum, mu_earth, mu_moon, mu_sun
+
+
+class GravityTestCases(unittest.TestCase):
+    """
+    This class tests the vectorized body table against the Earth, Moon and Sun terms written out by hand.
+    """
+
+    def setUp(self):
+        self.state_time = StateTime(State(x=-22486296.71, y=-40157448.728, z=-1245754.259), 1539102600.0)
+
+    def test_matches_three_body_sum(self):
+        d = self.state_time.derived_state
+        expected = (
+            mu_moon * d.r_mc / (np.dot(d.r_mc, d.r_mc) ** (3 / 2))
+            + mu_sun * d.r_sc / (np.dot(d.r_sc, d.r_sc) ** (3 / 2))
+            + mu_earth * d.r_ec / (np.dot(d.r_ec, d.r_ec) ** (3 / 2))
+        )
+
+        d_state = PositionDynamics(Parameters()).d_state(self.state_time)
+        np.testing.assert_allclose(expected, [d_state["vel_x"], d_state["vel_y"], d_state["vel_z"]], rtol=1e-12)
+
+    def test_batch_of_positions(self):
+        """
+        An n-by-3 array of craft positions gives one row of accelerations per craft.
+        """
+        table = BodyTable.from_names(["earth", "moon", "sun"])
+        positions = np.array([[7e6, 0.0, 0.0], [0.0, 4e7, 0.0], [-1e7, 1e7, 1e6]])
+
+        batch = table.acceleration(self.state_time.time, positions)
+        self.assertEqual((3, 3), batch.shape)
+        for position, acceleration in zip(positions, batch):
+            np.testing.assert_allclose(table.acceleration(self.state_time.time, position), acceleration)
+
+    def test_extra_bodies(self):
+        """
+        Jupiter and Venus can be added to the table, and only perturb the acceleration slightly.
+        """
+        table = BodyTable.from_names(["earth", "moon", "sun"])
+        extended = BodyTable.from_names(["earth", "moon", "sun", "jupiter", "venus"])
+        self.assertEqual([BodyEnum.Jupiter, BodyEnum.Venus], extended.bodies[3:])
+
+        r_co = self.state_time.derived_state.r_co
+        a = table.acceleration(self.state_time.time, r_co)
+        a_extended = extended.acceleration(self.state_time.time, r_co)
+        self.assertFalse(np.array_equal(a, a_extended))
+        np.testing.assert_allclose(a, a_extended, atol=1e-6)
+
+
+if __name__ == "__main__":
+    unittest.main()
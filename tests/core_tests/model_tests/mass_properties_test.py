@@ -0,0 +1,59 @@
+import unittest
+import numpy as np
+from core.models.dynamics_model import AttitudeDynamics, InertiaModel, KaneModel
+from core.models.mass_properties import (
+    CAD_TO_BODY_DCM,
+    INERTIA_FULL_CAD,
+    INERTIA_INITIAL_CAD,
+    KANE_K,
+    get_mass_properties,
+)
+from core.parameters import Parameters
+from core.state.state import State
+
+
+class MassPropertiesTestCases(unittest.TestCase):
+    """
+    This class tests the precomputed inertia and Kane damping tables.
+    """
+
+    def test_shared(self):
+        # every model reads the same tables, whatever its parameters
+        self.assertIs(get_mass_properties(), get_mass_properties())
+        self.assertIs(get_mass_properties(), AttitudeDynamics(Parameters()).mass_properties)
+        self.assertIs(get_mass_properties(), AttitudeDynamics(Parameters({"dry_mass": 3})).mass_properties)
+
+    def test_inertia(self):
+        """
+        The inertia tensor moves linearly between the body frame initial and full tensors,
+        for single fill fractions and arrays of them.
+        """
+        mass_properties = get_mass_properties()
+        initial = CAD_TO_BODY_DCM @ INERTIA_INITIAL_CAD @ CAD_TO_BODY_DCM.T
+        full = CAD_TO_BODY_DCM @ INERTIA_FULL_CAD @ CAD_TO_BODY_DCM.T
+
+        np.testing.assert_allclose(initial, mass_properties.inertia(0.0))
+        np.testing.assert_allclose(full, mass_properties.inertia(1.0))
+        np.testing.assert_allclose((initial + full) / 2, mass_properties.inertia(0.5))
+
+        batch = mass_properties.inertia(np.array([0.0, 0.5, 1.0]))
+        self.assertEqual((3, 3, 3), batch.shape)
+        np.testing.assert_allclose(full, batch[2])
+
+        derived = InertiaModel().evaluate(0.0, State(fill_frac=1.0))
+        self.assertAlmostEqual(full[0][1], derived["Ixy"])
+        self.assertAlmostEqual(full[2][2], derived["Izz"])
+
+    def test_kane_damping(self):
+        mass_properties = get_mass_properties()
+        fills = np.linspace(0.0, 1.0, 11)
+        kane = mass_properties.kane_damping(fills)
+
+        self.assertEqual((11,), kane.shape)
+        self.assertTrue(np.all(kane >= 0.0))
+        self.assertTrue(np.all(kane <= KANE_K + 1e-12))
+        self.assertAlmostEqual(kane[3], KaneModel().evaluate(0.0, State(fill_frac=0.3))["kane_c"])
+
+
+if __name__ == "__main__":
+    unittest.main()
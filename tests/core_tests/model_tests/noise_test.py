@@ -0,0 +1,45 @@
+import unittest
+import numpy as np
+from core.models.gyro_model import GyroModel
+from core.models.noise import NoiseStream
+from core.parameters import Parameters
+from core.state.statetime import StateTime
+from utils.test_utils import state_1
+
+
+class NoiseStreamTestCases(unittest.TestCase):
+    """
+    This class tests that the sensor noise streams are reproducible.
+    """
+
+    def test_block_size_independent(self):
+        """
+        The samples only depend on the seed and the name of the stream, not on how they are generated.
+        """
+        small_blocks = NoiseStream(42, "gyro", 3, block_size=7)
+        large_blocks = NoiseStream(42, "gyro", 3)
+
+        rows = np.array([small_blocks.next() for _ in range(20)])
+        np.testing.assert_array_equal(rows, large_blocks.take(20))
+        np.testing.assert_array_equal(small_blocks.take(30), large_blocks.take(30))
+
+    def test_streams_differ(self):
+        gyro = NoiseStream(42, "gyro", 3).take(10)
+        self.assertFalse(np.array_equal(gyro, NoiseStream(42, "accelerometer", 3).take(10)))
+        self.assertFalse(np.array_equal(gyro, NoiseStream(43, "gyro", 3).take(10)))
+
+    def test_seeded_gyro(self):
+        """
+        Two gyro models with the same seed measure the same noisy angular velocities.
+        """
+        param = Parameters({"seed": 1234})
+        gyro_a = GyroModel(param)
+        gyro_b = GyroModel(param)
+        state = StateTime(state_1)
+
+        for _ in range(5):
+            self.assertEqual(gyro_a.evaluate(state), gyro_b.evaluate(state))
+
+
+if __name__ == "__main__":
+    unittest.main()
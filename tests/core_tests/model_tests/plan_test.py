@@ -0,0 +1,85 @@
+import unittest
+from typing import Dict
+import numpy as np
+from core.config import Config
+from core.models.derived_models import DERIVED_MODEL_LIST, DerivedPosition, DerivedStateModel
+from core.models.model import EnvironmentModel
+from core.models.model_list import MODEL_DICT, ModelContainer, PositionDynamics
+from core.models.plan import EvaluationPlan, required_derived_models
+from core.state.state import STATE_ARRAY_ORDER, State
+from core.state.statetime import StateTime
+from utils.constants import ModelEnum
+from utils.test_utils import d3456, state_1
+
+
+class RadialModel(EnvironmentModel):
+    """Reads a derived field, and declares nothing about its outputs."""
+
+    inputs = ["r_ec"]
+
+    def d_state(self, state_time: StateTime) -> Dict[str, float]:
+        return {"fuel_mass": float(np.linalg.norm(state_time.derived_state.r_ec))}
+
+
+class UndeclaredModel(EnvironmentModel):
+    def d_state(self, state_time: StateTime) -> Dict[str, float]:
+        return {"chamber_temp": 1.0}
+
+
+class RangeModel(DerivedStateModel):
+    """A derived model that depends on the output of another."""
+
+    inputs = ["r_ec"]
+    fields = ["kane_c"]
+
+    def evaluate(self, _: float, state: State) -> Dict[str, float]:
+        return {"kane_c": 0.0}
+
+
+class EvaluationPlanTest(unittest.TestCase):
+    def test_prunes_unread_derived_models(self):
+        plan = EvaluationPlan([PositionDynamics(d3456)])
+        self.assertEqual(plan.derived_models, [])
+
+        plan = EvaluationPlan([RadialModel(d3456)])
+        self.assertEqual([type(model) for model in plan.derived_models], [DerivedPosition])
+
+        # a model that declares no inputs may read any derived field
+        plan = EvaluationPlan([UndeclaredModel(d3456)])
+        self.assertEqual(len(plan.derived_models), len(DERIVED_MODEL_LIST))
+
+    def test_dependency_order(self):
+        range_model = RangeModel()
+        kane_reader = RadialModel(d3456)
+        kane_reader.inputs = ["kane_c"]
+        ordered = required_derived_models([kane_reader], [range_model] + DERIVED_MODEL_LIST)
+        self.assertEqual([type(model) for model in ordered], [DerivedPosition, RangeModel])
+
+    def test_matches_evaluate(self):
+        """The scattered outputs are the derivatives the models return."""
+        models = [PositionDynamics(d3456), RadialModel(d3456), UndeclaredModel(d3456)]
+        plan = EvaluationPlan(models)
+        state_array = state_1.to_array().astype(np.float64)
+        d_state_array = plan.d_state(1.6e9, state_array)
+
+        state_time = StateTime(State(**dict(zip(STATE_ARRAY_ORDER, state_array))), 1.6e9)
+        expected = {}
+        for model in models:
+            expected.update(model.evaluate(state_time))
+        for field, value in expected.items():
+            self.assertAlmostEqual(d_state_array[STATE_ARRAY_ORDER.index(field)], value)
+        self.assertEqual(d_state_array[STATE_ARRAY_ORDER.index("quat_r")], 0.0)
+
+    def test_write_conflicts(self):
+        plan = EvaluationPlan([PositionDynamics(d3456), MODEL_DICT[ModelEnum.UnittestModel](d3456)])
+        self.assertEqual(plan.conflicts["x"], ["PositionDynamics", "TestModel"])
+        self.assertNotIn("vel_x", plan.conflicts)
+        # the last model wins
+        self.assertEqual(plan.d_state(0.0, state_1.to_array().astype(np.float64))[STATE_ARRAY_ORDER.index("x")], 0.0)
+
+        with self.assertLogs("Sim", level="WARNING"):
+            ModelContainer(Config({}, {}, [ModelEnum.PositionModel, ModelEnum.UnittestModel]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import numpy as np
+from core.config import Config
+from core.integrator.orbital_events import event_functions, events_from_df, events_to_df, kepler_events
+from core.sim import CislunarSim
+from core.state.state import POSITION_INDICES, State
+from core.state.statetime import StateTime
+from main import SimRunner
+from utils.astropy_util import get_body_position
+from utils.constants import BodyEnum, ModelEnum
+
+# ISS-like low Earth orbit
+ISS_IC = {
+    "x": 201289.9547729282,
+    "y": -1748827.84098,
+    "z": 6551130.06623,
+    "vel_x": 7665.4147515,
+    "vel_y": 13.6338551383,
+    "vel_z": -229.87558448,
+    "time": 1651906800,
+}
+ORBIT = 5600.0
+
+
+def run_events(d_t: float, groups) -> list:
+    parameters = {"gravity_bodies": ["earth"], "orbital_events": groups, "d_t": d_t, "rtol": 1e-8, "atol": 1e-2}
+    sim = CislunarSim(Config(parameters, ISS_IC, models=[ModelEnum.PositionModel]), shm_name=None)
+    while sim.state_time.time < ISS_IC["time"] + ORBIT:
+        sim.step()
+    return sim.events
+
+
+def state_array_at(position) -> np.ndarray:
+    state_array = State().to_array().astype(np.float64)
+    state_array[POSITION_INDICES] = position
+    return state_array
+
+
+class OrbitalEventsTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.events = run_events(1400.0, ["apsides", "eclipse"])
+
+    def test_apsides_and_eclipse_over_an_orbit(self):
+        events = self.events
+        kinds = [event.kind for event in events]
+        self.assertEqual(["apoapsis", "penumbra_entry", "umbra_entry", "umbra_exit", "penumbra_exit", "periapsis"], kinds)
+
+        # the radial velocity vanishes at the apsides
+        for event in events:
+            if event.kind.endswith("apsis"):
+                r = np.array([event.x, event.y, event.z])
+                v = np.array([event.vel_x, event.vel_y, event.vel_z])
+                self.assertLess(abs(np.dot(r, v)) / (np.linalg.norm(r) * np.linalg.norm(v)), 1e-6)
+
+    def test_event_times_do_not_depend_on_the_step(self):
+        long_steps = [event for event in self.events if event.kind.endswith("apsis")]
+        short_steps = run_events(400.0, ["apsides"])
+        np.testing.assert_allclose([event.time for event in long_steps], [event.time for event in short_steps], atol=1e-2)
+
+        # with Earth gravity only, the Kepler jump finds the same apsides on the analytic orbit
+        state_array = StateTime.from_dict(ISS_IC).state.to_array().astype(np.float64)
+        functions = event_functions(["apsides"], ISS_IC["time"], ISS_IC["time"] + ORBIT)
+        kepler = kepler_events(functions, state_array, ISS_IC["time"], ORBIT)
+        np.testing.assert_allclose([event.time for event in kepler], [event.time for event in long_steps], atol=1e-2)
+
+    def test_shadow_and_soi_functions(self):
+        t = ISS_IC["time"]
+        functions = {(f.kind, f.body): f for f in event_functions(["moon_soi", "eclipse"], t, t + 60.0)}
+        sun = np.array(get_body_position(t, BodyEnum.Sun))
+        moon = np.array(get_body_position(t, BodyEnum.Moon))
+        behind_earth = state_array_at(-7e6 * sun / np.linalg.norm(sun))
+        sunward = state_array_at(7e6 * sun / np.linalg.norm(sun))
+
+        self.assertLess(functions[("umbra_entry", "earth")](t, behind_earth), 0)
+        self.assertLess(functions[("penumbra_entry", "earth")](t, behind_earth), 0)
+        self.assertGreater(functions[("penumbra_entry", "earth")](t, sunward), 0)
+        self.assertGreater(functions[("soi_entry", "moon")](t, sunward), 0)
+        self.assertLess(functions[("soi_entry", "moon")](t, state_array_at(0.9 * moon)), 0)
+
+    def test_event_table(self):
+        parameters = {"gravity_bodies": ["earth"], "orbital_events": ["apsides"], "d_t": 600.0, "max_iter": 9}
+        run_df = SimRunner(Config(parameters, ISS_IC, models=[ModelEnum.PositionModel]), shm_name=None).run()
+        table = run_df.attrs["events"]
+        self.assertEqual(["apoapsis", "periapsis"], table["kind"].tolist())
+        self.assertTrue(table["time"].is_monotonic_increasing)
+
+        events = events_from_df(table, end_time=table["time"].iloc[0])
+        self.assertEqual(1, len(events))
+        self.assertTrue(events_to_df(events).equals(table.iloc[:1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
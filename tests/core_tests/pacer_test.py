@@ -0,0 +1,76 @@
+import unittest
+import numpy as np
+from core.pacer import SPIN_WINDOW, Pacer
+
+
+class FakeClock:
+    """A wall clock that only moves when the sim computes or the pacer sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        # a real sleep(0) takes a little time too
+        self.now += max(seconds, SPIN_WINDOW / 10)
+
+    def compute(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class PacerTestCases(unittest.TestCase):
+    """
+    This class tests the release schedule and the statistics of the pacer.
+    """
+
+    def run_steps(self, pacer: Pacer, clock: FakeClock, compute_times) -> list:
+        releases = []
+        pacer.start(0.0)
+        for step, compute_time in enumerate(compute_times):
+            clock.compute(compute_time)
+            pacer.pace((step + 1) * 1.0)
+            releases.append(clock.now)
+        return releases
+
+    def test_on_time(self):
+        clock = FakeClock()
+        pacer = Pacer(rate=2.0, clock=clock, sleep=clock.sleep)
+        releases = self.run_steps(pacer, clock, [0.1] * 4)
+
+        np.testing.assert_allclose([0.5, 1.0, 1.5, 2.0], releases, atol=SPIN_WINDOW)
+        self.assertEqual(0, pacer.stats.misses)
+        np.testing.assert_allclose([0.1] * 4, pacer.stats.latencies)
+        self.assertEqual(4, pacer.stats.jitter_histogram().sum())
+
+    def test_catch_up(self):
+        """
+        The overrun of the second step is made up by releasing the third step right away.
+        """
+        clock = FakeClock()
+        pacer = Pacer(rate=1.0, clock=clock, sleep=clock.sleep)
+        releases = self.run_steps(pacer, clock, [0.1, 1.5, 0.1, 0.1])
+
+        np.testing.assert_allclose([1.0, 2.5, 3.0, 4.0], releases, atol=SPIN_WINDOW)
+        self.assertEqual(1, pacer.stats.misses)
+        np.testing.assert_allclose([0.5], pacer.stats.lateness, atol=SPIN_WINDOW)
+
+    def test_no_catch_up(self):
+        """
+        Without catching up, the schedule is shifted by the overrun.
+        """
+        clock = FakeClock()
+        pacer = Pacer(rate=1.0, catch_up=False, clock=clock, sleep=clock.sleep)
+        releases = self.run_steps(pacer, clock, [0.1, 1.5, 0.1, 0.1])
+
+        np.testing.assert_allclose([1.0, 2.5, 3.5, 4.5], releases, atol=SPIN_WINDOW)
+        self.assertEqual(1, pacer.stats.misses)
+
+    def test_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            Pacer(rate=0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -23,6 +23,19 @@ class ParametersTestCase(unittest.TestCase):
             "thruster_force": 0,
             "combustion_chamber_volume": 1,
             "max_iter": 1000000,
+            "seed": None,
+            "gravity_bodies": ["earth", "moon", "sun"],
+            "propagator": "cowell",
+            "rectify_tol": 0.01,
+            "kepler_tol": 1e-3,
+            "kepler_max_jump": 3600.0,
+            "d_t": 0.1,
+            "integrator": "RK45",
+            "rtol": 1e-3,
+            "atol": 1e-6,
+            "phase_settings": {},
+            "orbital_events": [],
+            "command_timeline": [],
         }
         d_main["gyro_bias"] = [1.0, 2.0, 3.0]
         self.assertEqual(
@@ -71,6 +84,19 @@ class ParametersTestCase(unittest.TestCase):
                 "thruster_force": 0,
                 "combustion_chamber_volume": 1,
                 "max_iter": 1000000,
+                "seed": None,
+                "gravity_bodies": ["earth", "moon", "sun"],
+                "propagator": "cowell",
+                "rectify_tol": 0.01,
+                "kepler_tol": 1e-3,
+                "kepler_max_jump": 3600.0,
+                "d_t": 0.1,
+                "integrator": "RK45",
+                "rtol": 1e-3,
+                "atol": 1e-6,
+                "phase_settings": {},
+                "orbital_events": [],
+                "command_timeline": [],
             },
             Parameters({}).__dict__,
         )
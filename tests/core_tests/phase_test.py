@@ -0,0 +1,52 @@
+import unittest
+import numpy as np
+from core.config import Config
+from core.models.model_list import ModelContainer
+from core.phase import mission_phase
+from core.sim import CislunarSim
+from core.state.statetime import StateTime
+from utils.astropy_util import get_body_position
+from utils.constants import BodyEnum, ModelEnum, PhaseEnum
+
+T0 = 1651906800
+PHASE_SETTINGS = {"near_earth": {"d_t": 5.0, "integrator": "DOP853", "rtol": 1e-9}}
+
+
+def state_time_at(position) -> StateTime:
+    x, y, z = position
+    return StateTime.from_dict({"x": x, "y": y, "z": z, "time": T0})
+
+
+class PhaseTest(unittest.TestCase):
+    def test_mission_phase(self):
+        r_moon = np.array(get_body_position(T0, BodyEnum.Moon))
+        self.assertEqual(mission_phase(state_time_at([7e6, 0, 0])), PhaseEnum.NearEarth)
+        self.assertEqual(mission_phase(state_time_at(r_moon / 2)), PhaseEnum.CislunarCoast)
+        self.assertEqual(mission_phase(state_time_at(r_moon * 0.95)), PhaseEnum.LunarApproach)
+
+    def test_use_phase(self):
+        config = Config({"d_t": 2.0, "phase_settings": PHASE_SETTINGS}, {"time": T0}, models=[ModelEnum.PositionModel])
+        models = ModelContainer(config)
+        self.assertEqual(models.d_t, 2.0)
+        self.assertEqual(models.solver_options, {"method": "RK45", "rtol": 1e-3, "atol": 1e-6})
+
+        models.use_phase(PhaseEnum.NearEarth)
+        self.assertEqual(models.d_t, 5.0)
+        self.assertEqual(models.solver_options, {"method": "DOP853", "rtol": 1e-9, "atol": 1e-6})
+
+        # a phase without settings uses the global ones
+        models.use_phase(PhaseEnum.LunarApproach)
+        self.assertEqual(models.d_t, 2.0)
+        self.assertEqual(models.solver_options["method"], "RK45")
+
+    def test_sim_steps_with_phase_settings(self):
+        initial_condition = {"x": 7e6, "vel_y": 7.5e3, "time": T0}
+        config = Config({"phase_settings": PHASE_SETTINGS}, initial_condition, models=[ModelEnum.PositionModel])
+        sim = CislunarSim(config, shm_name=None)
+        output = sim.step()
+        self.assertEqual(sim._models.phase, PhaseEnum.NearEarth)
+        self.assertAlmostEqual(output.true_state.time, T0 + 5.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import pandas as pd
+from core.config import Config
+from core.run_cache import RunCache, config_key, shared_prefix_end
+from main import SimRunner
+from utils.constants import ModelEnum
+
+
+class RunCacheTestCases(unittest.TestCase):
+    """
+    This class tests the keys, storage and eviction of the run cache.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = RunCache(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_key(self):
+        config = Config({"seed": 1}, {"x": 1.0})
+        self.assertEqual(config_key(config), config_key(Config(**config.to_dict())))
+        self.assertNotEqual(config_key(config), config_key(Config({"seed": 2}, {"x": 1.0})))
+        self.assertNotEqual(config_key(config), config_key(Config({"seed": 1, "rectify_tol": 0.02}, {"x": 1.0})))
+        self.assertNotEqual(config_key(config), config_key(Config({"seed": 1, "d_t": 1.0}, {"x": 1.0})))
+        self.assertNotEqual(config_key(config), config_key(Config({"seed": 1}, {"x": 1.5})))
+        self.assertNotEqual(config_key(config), config_key(config, "UnscentedSim"))
+
+    def test_get_put(self):
+        run_df = pd.DataFrame({"a": [1.0, 2.0]})
+        self.assertIsNone(self.cache.get("key"))
+        self.cache.put("key", run_df)
+        pd.testing.assert_frame_equal(run_df, self.cache.get("key"))
+
+    def test_eviction(self):
+        run_df = pd.DataFrame({"a": range(1000)})
+        self.cache.put("old", run_df)
+        self.cache.put("new", run_df)
+        os.utime(self.cache.path / "old.pkl", (0, 0))
+        os.utime(self.cache.path / "new.pkl", (1, 1))
+        self.cache.get("old")  # now the most recently used
+
+        self.cache.max_bytes = self.cache.size() - 1
+        self.cache.evict()
+        self.assertIsNotNone(self.cache.get("old"))
+        self.assertIsNone(self.cache.get("new"))
+
+    def test_sim_runner(self):
+        config = Config({"max_iter": 3, "seed": 0}, {}, [ModelEnum.UnittestModel])
+        run_df = SimRunner(config, shm_name=None, cache=self.cache).run()
+        self.assertEqual(1, len(list(self.cache.path.glob("*.pkl"))))
+
+        cached_df = SimRunner(config, shm_name=None, cache=self.cache).run()
+        pd.testing.assert_frame_equal(run_df, cached_df)
+
+        # unseeded runs are not reproducible, so they are never stored
+        SimRunner(Config({"max_iter": 3}, {}, [ModelEnum.UnittestModel]), shm_name=None, cache=self.cache).run()
+        self.assertEqual(1, len(list(self.cache.path.glob("*.pkl"))))
+
+    def test_shared_prefix_end(self):
+        config = Config({"seed": 1, "max_iter": 10}, {"x": 1.0}, [ModelEnum.PositionModel, ModelEnum.GyroModel])
+        sensor_change = Config(
+            {"seed": 2, "max_iter": 20, "gyro_noise": [0.0, 0.0, 0.0]}, {"x": 1.0}, [ModelEnum.PositionModel]
+        )
+        dynamics_change = Config(
+            {"seed": 1, "max_iter": 10, "dry_mass": 2}, {"x": 1.0}, [ModelEnum.PositionModel, ModelEnum.GyroModel]
+        )
+
+        self.assertEqual(float("inf"), shared_prefix_end(config.to_dict(), sensor_change.to_dict()))
+        self.assertEqual(float("-inf"), shared_prefix_end(config.to_dict(), dynamics_change.to_dict()))
+
+        # runs with different commands share the trajectory up to the first differing command
+        pulse = {"command": "attitude_pulse", "time": 50.0, "delta_ang_vel": [0.0, 0.0, 0.1]}
+        command_change = Config(
+            {"seed": 1, "max_iter": 10, "command_timeline": [pulse]}, {"x": 1.0}, [ModelEnum.PositionModel]
+        )
+        self.assertEqual(50.0, shared_prefix_end(config.to_dict(), command_change.to_dict()))
+
+    def test_resume(self):
+        """
+        A longer run with different sensor noise resumes from a stored run and matches a fresh run.
+        """
+        ic = {"x": 7e6, "vel_y": 7.5e3, "quat_r": 1.0}
+        models = [ModelEnum.PositionModel, ModelEnum.GyroModel]
+        short = Config({"max_iter": 5, "seed": 0}, ic, models)
+        long = Config({"max_iter": 12, "seed": 1, "gyro_noise": [0.2, 0.2, 0.2]}, ic, models)
+
+        SimRunner(short, shm_name=None, cache=self.cache).run()
+        self.assertIsNotNone(self.cache.find_prefix(long))
+        self.assertIsNone(self.cache.find_prefix(Config({"seed": 0, "dry_mass": 1}, ic, models)))
+
+        runner = SimRunner(long, shm_name=None, cache=self.cache)
+        with patch.object(runner._sim, "step", wraps=runner._sim.step) as step:
+            resumed_df = runner.run()
+        # the short run stored 6 steps, so only 7 of the 13 steps are simulated
+        self.assertEqual(7, step.call_count)
+        fresh_df = SimRunner(long, shm_name=None).run()
+        pd.testing.assert_frame_equal(fresh_df, resumed_df)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import numpy as np
+from core.config import Config
+from core.sweep import SamplingEnum, Sweep, SweepRange, apply_sample, duration, make_plan
+from utils.constants import ModelEnum
+
+
+def final_x(run_df) -> float:
+    return float(run_df["true_state.state.x"].iloc[-1])
+
+
+class SweepTestCases(unittest.TestCase):
+    """
+    This class tests the sample plans and running a sweep.
+    """
+
+    ranges = [SweepRange("x", 0.0, 10.0, levels=3), SweepRange("gyro_bias[1]", -1.0, 1.0, levels=2)]
+
+    def test_grid_plan(self):
+        plan = make_plan(self.ranges)
+        self.assertEqual(["x", "gyro_bias[1]"], list(plan.columns))
+        self.assertEqual(6, len(plan))
+        self.assertEqual([0.0, 5.0, 10.0], sorted(set(plan["x"])))
+
+    def test_latin_hypercube_plan(self):
+        """
+        Every one of the n equal bins of each range holds exactly one sample.
+        """
+        plan = make_plan(self.ranges, SamplingEnum.LatinHypercube, n_samples=8, seed=0)
+        self.assertEqual(8, len(plan))
+        bins = np.floor((plan["x"].to_numpy() - 0.0) / 10.0 * 8)
+        self.assertEqual(list(range(8)), sorted(bins.astype(int)))
+
+    def test_sobol_plan(self):
+        plan = make_plan(self.ranges, SamplingEnum.Sobol, n_samples=16, seed=0)
+        self.assertEqual(16, len(plan))
+        self.assertTrue(plan["x"].between(0.0, 10.0).all())
+        self.assertTrue(plan["gyro_bias[1]"].between(-1.0, 1.0).all())
+
+    def test_apply_sample(self):
+        base = Config({}, {"y": 2.0}).to_dict()
+        new = apply_sample(base, {"x": 1.0, "gyro_bias[1]": 0.5, "dry_mass": 3.0})
+
+        self.assertEqual(1.0, new["initial_condition"]["x"])
+        self.assertEqual(2.0, new["initial_condition"]["y"])
+        self.assertEqual(0.5, new["parameters"]["gyro_bias"][1])
+        self.assertEqual(3.0, new["parameters"]["dry_mass"])
+        # the base config is left untouched
+        self.assertEqual(0.0, base["initial_condition"]["x"])
+
+        with self.assertRaises(ValueError):
+            apply_sample(base, {"not_a_field": 1.0})
+
+    def test_run(self):
+        """
+        With the unittest model the state never changes, so the final x is the sampled x.
+        """
+        base = Config({"max_iter": 2}, {"time": 0.0}, [ModelEnum.UnittestModel])
+        sweep = Sweep(base, [SweepRange("x", 7e6, 8e6, levels=2)], {"final_x": final_x, "duration": duration})
+        results = sweep.run(processes=1)
+
+        self.assertEqual(["x", "final_x", "duration"], list(results.columns))
+        np.testing.assert_allclose(results["x"], results["final_x"])
+        self.assertTrue((results["duration"] > 0).all())
+
+    def test_failed_sample(self):
+        """
+        A sample whose run raises partway through gets NaN metrics, not the metrics of the steps before.
+        """
+        t0 = 1651906800.0
+        thrust = {"command": "thrust", "start": t0 + 0.15, "end": t0 + 100, "direction": [1.0, 0.0, 0.0], "force": 1.0}
+        base = Config({"max_iter": 5, "command_timeline": [thrust]}, {"x": 7e6, "time": t0}, [ModelEnum.PositionModel])
+        # a craft without mass cannot thrust
+        sweep = Sweep(base, [SweepRange("dry_mass", 0.0, 1.0, levels=2)], {"final_x": final_x})
+        results = sweep.run(processes=1)
+
+        self.assertTrue(np.isnan(results["final_x"].iloc[0]))
+        self.assertFalse(np.isnan(results["final_x"].iloc[1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import asyncio
+from multiprocessing import shared_memory
+import os
+import socket
+import tempfile
+import unittest
+import numpy as np
+from core.config import Config
+from core.state.state import ObservedState, State, STATE_ARRAY_ORDER
+from core.state.statetime import PropagatedOutput, StateTime
+from core.telemetry import (
+    FrameKind,
+    TelemetryServer,
+    _Client,
+    encode_frame,
+    parse_address,
+    read_frame,
+    subscribe,
+)
+from main import SimRunner
+from utils.constants import ModelEnum
+
+
+def output(step: int) -> PropagatedOutput:
+    return PropagatedOutput(StateTime(State(x=float(step)), float(step) * 0.1), ObservedState(x=step + 0.5))
+
+
+class TelemetryTestCases(unittest.TestCase):
+    """
+    This class tests the framing, decimation and back-pressure of the telemetry server.
+    """
+
+    def test_parse_address(self):
+        self.assertEqual(("tcp", "127.0.0.1", 5760), parse_address("tcp://127.0.0.1:5760"))
+        self.assertEqual(("unix", "/tmp/sim.sock", None), parse_address("unix:///tmp/sim.sock"))
+        with self.assertRaises(ValueError):
+            parse_address("127.0.0.1:5760")
+
+    def test_framing(self):
+        values = np.arange(5, dtype=np.float64)
+
+        async def decode():
+            reader = asyncio.StreamReader()
+            reader.feed_data(encode_frame(FrameKind.Observed, 7, 1.5, values))
+            reader.feed_eof()
+            return await read_frame(reader)
+
+        frame = asyncio.run(decode())
+        self.assertEqual((FrameKind.Observed, 7, 1.5), (frame.kind, frame.step, frame.time))
+        np.testing.assert_array_equal(values, frame.values)
+
+    def test_back_pressure(self):
+        async def overflow():
+            client = _Client(None, 1 << FrameKind.Observed, 1, queue_size=2)
+            for frame in [b"a", b"b", b"c"]:
+                client.offer(frame)
+            return client.dropped, [client.queue.get_nowait() for _ in range(2)]
+
+        # the oldest frame is dropped
+        self.assertEqual((1, [b"b", b"c"]), asyncio.run(overflow()))
+
+    def test_stream(self):
+        server = TelemetryServer("tcp://127.0.0.1:0")
+        server.start()
+
+        async def client():
+            reader, writer = await subscribe(server.address, [FrameKind.Propagated], decimation=2)
+            hello = await read_frame(reader)
+            for step in range(5):
+                server.publish(output(step))
+            await asyncio.get_running_loop().run_in_executor(None, server.stop)
+
+            frames = []
+            try:
+                while True:
+                    frames.append(await read_frame(reader))
+            except asyncio.IncompleteReadError:
+                writer.close()
+            return hello, frames
+
+        hello, frames = asyncio.run(client())
+        fields = hello.info["fields"]["propagated"]
+        self.assertEqual(2 * len(STATE_ARRAY_ORDER), len(fields))
+
+        self.assertEqual([0, 2, 4], [frame.step for frame in frames])
+        last = dict(zip(fields, frames[-1].values))
+        self.assertEqual(4.0, last["true_state.state.x"])
+        self.assertEqual(4.5, last["observed_state.x"])
+        self.assertAlmostEqual(0.4, frames[-1].time)
+
+    def test_port_in_use(self):
+        taken = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        taken.bind(("127.0.0.1", 0))
+        taken.listen(1)
+        server = TelemetryServer(f"tcp://127.0.0.1:{taken.getsockname()[1]}")
+        config = Config({"max_iter": 2}, {"x": 7e6}, [ModelEnum.UnittestModel])
+        shm_name = f"cislunarsim-telemetry-test-{os.getpid()}"
+        try:
+            with self.assertRaisesRegex(RuntimeError, "Could not start the telemetry server"):
+                SimRunner(config, shm_name=shm_name, telemetry=server).run()
+        finally:
+            taken.close()
+        # stopping the server that never listened does not keep the shared memory from being released
+        server.stop()
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=shm_name)
+
+    def test_path_in_use(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # asyncio replaces a stale socket file, but not a file of another kind
+            path = os.path.join(tmp_dir, "telemetry.sock")
+            with open(path, "w") as write_file:
+                write_file.write("not a socket")
+            server = TelemetryServer(f"unix://{path}")
+            with self.assertRaises(RuntimeError):
+                server.start()
+            server.stop()
+            # the file that kept the server from listening is left alone
+            self.assertTrue(os.path.exists(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
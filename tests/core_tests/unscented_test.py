@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+from core.config import Config
+from core.unscented import UnscentedSim, sigma_points, unscented_transform
+from utils.constants import ModelEnum
+
+
+class UnscentedTestCases(unittest.TestCase):
+    """
+    This class tests the sigma point generation and the unscented propagation mode.
+    """
+
+    mean = np.array([1.0, -2.0, 3.0])
+    covariance = np.array([[4.0, 1.0, 0.0], [1.0, 2.0, 0.5], [0.0, 0.5, 1.0]])
+
+    def test_transform_recovers_statistics(self):
+        """
+        Recombining the sigma points without propagating them gives back the input mean and covariance.
+        """
+        for alpha, beta, kappa in [(1.0, 2.0, 0.0), (1e-3, 2.0, 0.0), (0.5, 0.0, 1.0)]:
+            points, wm, wc = sigma_points(self.mean, self.covariance, alpha, beta, kappa)
+            self.assertEqual((7, 3), points.shape)
+
+            mean, covariance = unscented_transform(points, wm, wc)
+            np.testing.assert_allclose(self.mean, mean, atol=1e-9)
+            np.testing.assert_allclose(self.covariance, covariance, atol=1e-6)
+
+    def test_step(self):
+        """
+        With the unittest model nothing moves, so the mean and covariance stay constant.
+        """
+        init_cov = {"fields": ["x", "vel_x"], "matrix": [[100.0, 0.0], [0.0, 1.0]]}
+        config = Config({}, {"x": 7e6, "vel_x": 10.0}, [ModelEnum.UnittestModel], init_cov)
+        sim = UnscentedSim(config)
+        output = sim.step()
+
+        self.assertAlmostEqual(7e6, output.mean_state.state.x)
+        self.assertAlmostEqual(100.0, output.covariance["x,x"])
+        self.assertAlmostEqual(0.0, output.covariance["x,vel_x"])
+        self.assertAlmostEqual(1.0, output.covariance["vel_x,vel_x"])
+
+    def test_missing_covariance(self):
+        with self.assertRaises(ValueError):
+            UnscentedSim(Config({}, {}, [ModelEnum.UnittestModel]))
+
+    def test_unsupported_parameters(self):
+        """
+        The sigma points are integrated with Cowell's method at a fixed step, so settings it would ignore are
+        rejected.
+        """
+        init_cov = {"fields": ["x"], "matrix": [[100.0]]}
+        for parameters in [
+            {"propagator": "encke"},
+            {"propagator": "kepler"},
+            {"phase_settings": {"near_earth": {"d_t": 10.0}}},
+            {"orbital_events": ["apsides"]},
+        ]:
+            with self.subTest(parameters=parameters), self.assertRaises(ValueError):
+                UnscentedSim(Config(parameters, {"x": 7e6}, [ModelEnum.PositionModel], init_cov))
+        UnscentedSim(Config({"propagator": "cowell"}, {"x": 7e6}, [ModelEnum.PositionModel], init_cov))
+
+
+if __name__ == "__main__":
+    unittest.main()
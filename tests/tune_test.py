@@ -0,0 +1,58 @@
+import json
+import os
+import tempfile
+import unittest
+from core.config import Config
+from tune import PhaseTuning, derive_config, phase_starts, tune_phase
+from utils.constants import PhaseEnum
+
+ISS_CONFIG = "configs/iss.json"
+
+
+class TuneTest(unittest.TestCase):
+    def test_phase_starts(self):
+        config = Config.make_config(ISS_CONFIG)
+        starts = phase_starts(config, 1200.0)
+        # the ISS never leaves low Earth orbit
+        self.assertEqual(list(starts), [PhaseEnum.NearEarth])
+        self.assertEqual(starts[PhaseEnum.NearEarth].time, config.init_cond.time)
+
+    def test_tune_phase(self):
+        config = Config.make_config(ISS_CONFIG)
+        budget = 1.0
+        settings, met_budget, pilots = tune_phase(
+            config, config.init_cond, 60.0, budget, methods=["RK45"], rtols=[1e-3, 1e-9], steps=[20.0, 60.0]
+        )
+        self.assertTrue(met_budget)
+        self.assertEqual(len(pilots), 4)
+
+        chosen = pilots[(pilots["d_t"] == settings["d_t"]) & (pilots["rtol"] == settings["rtol"])].iloc[0]
+        self.assertLessEqual(chosen["final_position_error"], budget)
+        within_budget = pilots[pilots["final_position_error"] <= budget]
+        self.assertEqual(chosen["wall_time"], within_budget["wall_time"].min())
+
+    def test_tune_phase_over_budget(self):
+        config = Config.make_config(ISS_CONFIG)
+        settings, met_budget, pilots = tune_phase(
+            config, config.init_cond, 60.0, 0.0, methods=["RK45"], rtols=[1e-3], steps=[30.0, 60.0]
+        )
+        self.assertFalse(met_budget)
+        self.assertEqual(settings["d_t"], pilots.sort_values("final_position_error").iloc[0]["d_t"])
+
+    def test_derive_config(self):
+        settings = {"d_t": 60.0, "integrator": "DOP853", "rtol": 1e-6, "atol": 1e-3}
+        tuning = PhaseTuning(PhaseEnum.NearEarth, Config.make_config(ISS_CONFIG).init_cond, settings, True, None)
+        data = derive_config(ISS_CONFIG, [tuning])
+        self.assertEqual(data["parameters"]["phase_settings"], {"near_earth": settings})
+
+        # the derived config passes the schema validation
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "iss_tuned.json")
+            with open(path, "w") as write_file:
+                json.dump(data, write_file)
+            derived = Config.make_config(path)
+        self.assertEqual(derived.param.phase_settings, {"near_earth": settings})
+
+
+if __name__ == "__main__":
+    unittest.main()
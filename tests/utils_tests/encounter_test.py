@@ -0,0 +1,107 @@
+import unittest
+import numpy as np
+import pandas as pd
+from utils.constants import BodyEnum
+from utils.encounter import EncounterIndex, Trajectory
+from utils.trajectory_diff import POSITION_COLUMNS, TIME_COLUMN, VELOCITY_COLUMNS
+
+
+def straight_run(t: np.ndarray, start: np.ndarray, velocity: np.ndarray) -> pd.DataFrame:
+    """A run moving in a straight line, which the cubic Hermite interpolant reproduces exactly."""
+    position = start + np.outer(t - t[0], velocity)
+    data = {TIME_COLUMN: t}
+    for i, column in enumerate(POSITION_COLUMNS):
+        data[column] = position[:, i]
+    for i, column in enumerate(VELOCITY_COLUMNS):
+        data[column] = np.full(len(t), velocity[i])
+    return pd.DataFrame(data)
+
+
+class EncounterTestCases(unittest.TestCase):
+    """
+    This class tests the closest approach queries of the encounter index.
+    """
+
+    def setUp(self):
+        self.t = np.arange(0.0, 101.0, 10.0)
+
+    def test_closest_approach_to_earth(self):
+        # passes the Earth at 7e6 m at t=43.7, between two steps
+        run = straight_run(self.t, np.array([-43.7e3, 7e6, 0.0]), np.array([1e3, 0.0, 0.0]))
+        index = EncounterIndex.from_runs({"flyby": run})
+        (encounter,) = index.closest_approaches(BodyEnum.Earth)
+        self.assertEqual(encounter.run, "flyby")
+        self.assertEqual(encounter.other, "earth")
+        self.assertAlmostEqual(encounter.time, 43.7, places=2)
+        self.assertAlmostEqual(encounter.distance, 7e6, places=3)
+
+    def test_periapses(self):
+        # two flybys of the Earth by the same run, with the run reversing its direction in between
+        t = np.arange(0.0, 201.0, 10.0)
+        x = 1e3 * (np.abs(t - 100.0) - 55.0)
+        vel_x = 1e3 * np.sign(t - 100.0)
+        data = {TIME_COLUMN: t, POSITION_COLUMNS[0]: x, POSITION_COLUMNS[1]: np.full(len(t), 7e6)}
+        data.update({POSITION_COLUMNS[2]: 0 * t, VELOCITY_COLUMNS[0]: vel_x})
+        data.update({VELOCITY_COLUMNS[1]: 0 * t, VELOCITY_COLUMNS[2]: 0 * t})
+        index = EncounterIndex.from_runs({"twice": pd.DataFrame(data)})
+        periapses = index.periapses(BodyEnum.Earth)
+        np.testing.assert_allclose([45.0, 155.0], [encounter.time for encounter in periapses], atol=1e-2)
+        self.assertEqual([], index.periapses(BodyEnum.Earth, max_distance=6e6))
+
+    def test_approaches_between_runs(self):
+        # a grid of parallel runs 1e4 m apart, and one run crossing the first of them at t=55 between the steps
+        runs = {
+            f"parallel_{i}": straight_run(self.t, np.array([0.0, 1e4 * i, 0.0]), np.array([1e3, 0.0, 0.0]))
+            for i in range(50)
+        }
+        runs["crossing"] = straight_run(self.t, np.array([55e3, -55e3, 500.0]), np.array([0.0, 1e3, 0.0]))
+        index = EncounterIndex.from_runs(runs)
+
+        encounters = index.approaches_between_runs(radius=1e3)
+        self.assertEqual(1, len(encounters))
+        self.assertEqual({"parallel_0", "crossing"}, {encounters[0].run, encounters[0].other})
+        self.assertAlmostEqual(encounters[0].time, 55.0, places=2)
+        self.assertAlmostEqual(encounters[0].distance, 500.0, places=3)
+
+        # the parallel neighbours are all 1e4 m apart
+        pairs = {(encounter.run, encounter.other) for encounter in index.approaches_between_runs(radius=1.0001e4)}
+        self.assertTrue({(f"parallel_{i}", f"parallel_{i + 1}") for i in range(49)} <= pairs)
+        self.assertNotIn(("parallel_0", "parallel_2"), pairs)
+
+    def test_co_moving_candidates(self):
+        # an ensemble flying together at 7.5 km/s, 1e3 m apart and slightly dispersed in velocity: each run moves
+        # 7.5e4 m between the steps, but only a few meters relative to the others
+        rng = np.random.default_rng(1)
+        counts = []
+        for m in (100, 400):
+            runs = {
+                f"run_{i}": straight_run(
+                    self.t, np.array([0.0, 1e3 * i, 7e6]), np.array([7.5e3, 0.0, 0.0]) + rng.normal(0.0, 0.1, 3)
+                )
+                for i in range(m)
+            }
+            index = EncounterIndex.from_runs(runs)
+            counts.append(len(index._candidates(radius=1.5e3)))
+            self.assertEqual(m - 1, len(index.approaches_between_runs(radius=1.5e3)))
+        # only the neighbours are candidates, rather than all m (m - 1) / 2 pairs
+        self.assertEqual(counts, [99, 399])
+
+    def test_partial_overlap(self):
+        early = straight_run(self.t, np.array([0.0, 0.0, 7e6]), np.array([1e3, 0.0, 0.0]))
+        late = straight_run(self.t + 50.0, np.array([50e3, 100.0, 7e6]), np.array([1e3, 0.0, 0.0]))
+        index = EncounterIndex.from_runs({"early": early, "late": late})
+        self.assertEqual(16, len(index.grid))
+        self.assertTrue(np.isnan(index.positions[-1, 0]).all())
+
+        (encounter,) = index.approaches_between_runs(radius=1e3)
+        self.assertGreaterEqual(encounter.time, 50.0)
+        self.assertLessEqual(encounter.time, 100.0)
+        self.assertAlmostEqual(encounter.distance, 100.0, places=3)
+
+    def test_trajectory_needs_two_steps(self):
+        with self.assertRaises(ValueError):
+            Trajectory("short", np.zeros(1), np.zeros((1, 3)), np.zeros((1, 3)))
+
+
+if __name__ == "__main__":
+    unittest.main()
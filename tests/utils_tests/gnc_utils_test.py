@@ -0,0 +1,72 @@
+import unittest
+import numpy as np
+from utils.gnc_utils import (
+    calc_psi,
+    calc_xi,
+    quat_normalize,
+    quat_rotate,
+    quat_to_dcm,
+    quaternion_derivative,
+)
+
+
+class QuaternionKernelTestCases(unittest.TestCase):
+    """
+    This class tests the closed form quaternion kernels against the Xi/Psi matrix definitions,
+    for single quaternions and N-by-4 batches.
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.quats = quat_normalize(rng.normal(size=(20, 4)))
+        self.omegas = rng.normal(size=(20, 3))
+        self.vectors = rng.normal(size=(20, 3))
+
+    def test_quaternion_derivative(self):
+        batch = quaternion_derivative(self.quats, self.omegas)
+        self.assertEqual((20, 4), batch.shape)
+
+        for quat, omega, d_quat in zip(self.quats, self.omegas, batch):
+            xi = calc_xi(quat[:3], quat[3])
+            expected = 0.5 * np.asarray(xi @ omega.reshape(3, 1)).ravel()
+
+            single = quaternion_derivative(quat, omega)
+            self.assertEqual((4,), single.shape)
+            np.testing.assert_allclose(expected, single, atol=1e-12)
+            np.testing.assert_allclose(expected, d_quat, atol=1e-12)
+
+    def test_inputs_not_modified(self):
+        quat = self.quats[0].copy()
+        omega = self.omegas[0].copy()
+        quaternion_derivative(quat, omega)
+        self.assertEqual((4,), quat.shape)
+        self.assertEqual((3,), omega.shape)
+
+    def test_quat_to_dcm(self):
+        batch = quat_to_dcm(self.quats)
+        self.assertEqual((20, 3, 3), batch.shape)
+
+        for quat, dcm in zip(self.quats, batch):
+            v = quat[:3]
+            expected = np.asarray(calc_xi(v, quat[3]).T @ calc_psi(v, quat[3]))
+            np.testing.assert_allclose(expected, quat_to_dcm(quat), atol=1e-12)
+            np.testing.assert_allclose(expected, dcm, atol=1e-12)
+            # unit quaternions give orthonormal DCMs
+            np.testing.assert_allclose(np.eye(3), dcm @ dcm.T, atol=1e-12)
+
+    def test_quat_rotate(self):
+        batch = quat_rotate(self.quats, self.vectors)
+        self.assertEqual((20, 3), batch.shape)
+
+        for quat, vector, rotated in zip(self.quats, self.vectors, batch):
+            expected = quat_to_dcm(quat) @ vector
+            np.testing.assert_allclose(expected, quat_rotate(quat, vector), atol=1e-12)
+            np.testing.assert_allclose(expected, rotated, atol=1e-12)
+
+    def test_quat_normalize(self):
+        np.testing.assert_allclose(np.ones(20), np.linalg.norm(self.quats, axis=1))
+        np.testing.assert_allclose([0.0, 0.6, 0.0, 0.8], quat_normalize(np.array([0.0, 3.0, 0.0, 4.0])))
+
+
+if __name__ == "__main__":
+    unittest.main()
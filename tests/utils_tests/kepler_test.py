@@ -0,0 +1,47 @@
+import unittest
+import numpy as np
+from utils.constants import mu_earth
+from utils.kepler import kepler_propagate
+
+
+class KeplerTestCases(unittest.TestCase):
+    """
+    This class tests the universal variable two-body propagation.
+    """
+
+    r0 = np.array([7e6, 0.0, 1e5])
+    v0 = np.array([0.0, 7546.0, 100.0])
+
+    def period(self, r0: np.ndarray, v0: np.ndarray) -> float:
+        a = 1 / (2 / np.linalg.norm(r0) - np.dot(v0, v0) / mu_earth)
+        return 2 * np.pi * np.sqrt(a ** 3 / mu_earth)
+
+    def test_full_period(self):
+        """
+        An elliptical orbit returns to its initial position and velocity after one period.
+        """
+        for v0 in [self.v0, 1.3 * self.v0]:
+            r, v = kepler_propagate(self.r0, v0, self.period(self.r0, v0))
+            np.testing.assert_allclose(self.r0, r, atol=1e-3)
+            np.testing.assert_allclose(v0, v, atol=1e-6)
+
+    def test_forwards_and_backwards(self):
+        """
+        Propagating forwards then backwards gives back the initial state, for elliptical and hyperbolic orbits.
+        """
+        for v0 in [self.v0, 1.6 * self.v0]:
+            r, v = kepler_propagate(self.r0, v0, 5000.0)
+            r_back, v_back = kepler_propagate(r, v, -5000.0)
+            np.testing.assert_allclose(self.r0, r_back, atol=1e-2)
+            np.testing.assert_allclose(v0, v_back, atol=1e-6)
+
+    def test_energy_conserved(self):
+        for v0 in [self.v0, 1.6 * self.v0]:
+            r, v = kepler_propagate(self.r0, v0, 12345.0)
+            energy_0 = np.dot(v0, v0) / 2 - mu_earth / np.linalg.norm(self.r0)
+            energy = np.dot(v, v) / 2 - mu_earth / np.linalg.norm(r)
+            self.assertAlmostEqual(energy_0, energy, delta=1e-6 * abs(energy_0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import time
+import unittest
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+from core.state.state import ObservedState, State
+from core.state.statetime import PropagatedOutput, StateTime
+from core.telemetry import TelemetryServer
+from utils.live_plot import LIVE_FIELDS, LIVE_INDEX, LivePlot, RingBuffer, TelemetryFeed, _grown_limits
+
+
+def output(step: int) -> PropagatedOutput:
+    state = State(x=7e6 + step, y=float(step), ang_vel_x=0.1)
+    return PropagatedOutput(StateTime(state, 10.0 * step), ObservedState(ang_vel_x=0.2))
+
+
+class LivePlotTest(unittest.TestCase):
+    def test_ring_buffer(self):
+        buffer = RingBuffer(3, 2)
+        self.assertEqual(buffer.rows().shape, (0, 2))
+        for i in range(5):
+            buffer.append(np.array([i, -i]))
+        # only the last rows are kept, oldest first
+        np.testing.assert_array_equal(buffer.rows()[:, 0], [2, 3, 4])
+        self.assertEqual((len(buffer), buffer.total), (3, 5))
+
+    def test_grown_limits(self):
+        self.assertIsNone(_grown_limits([0.0, 10.0], 1.0, 9.0))
+        self.assertEqual(_grown_limits([0.0, 10.0], 1.0, 12.0), [0.0, 18.0])
+        self.assertEqual(_grown_limits([0.0, 10.0], -2.0, 5.0), [-8.0, 10.0])
+
+    def test_telemetry_feed(self):
+        server = TelemetryServer("tcp://127.0.0.1:0")
+        server.start()
+        buffer = RingBuffer(4, len(LIVE_FIELDS) + 1)
+        feed = TelemetryFeed(server.address, buffer)
+        feed.start()
+        deadline = time.monotonic() + 5.0
+        while not server._clients and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        for step in range(6):
+            server.publish(output(step))
+        server.stop()
+        self.assertTrue(feed.finished.wait(5.0))
+        feed.stop()
+
+        rows = buffer.rows()
+        np.testing.assert_array_equal(rows[:, 0], [20.0, 30.0, 40.0, 50.0])
+        np.testing.assert_array_equal(rows[:, LIVE_INDEX["true_state.state.y"]], [2.0, 3.0, 4.0, 5.0])
+        np.testing.assert_array_equal(rows[:, LIVE_INDEX["observed_state.ang_vel_x"]], 0.2)
+
+    def test_refresh(self):
+        buffer = RingBuffer(10, len(LIVE_FIELDS) + 1)
+        plot = LivePlot(buffer)
+        plot.fig.canvas.draw()
+        for step in range(3):
+            buffer.append(np.concatenate([[10.0 * step], np.full(len(LIVE_FIELDS), 1e7 * step)]))
+        plot.refresh()
+
+        # the limits grew to contain the rows, and the lines hold them
+        self.assertGreaterEqual(plot.ax_traj.get_xlim()[1], 2e7)
+        self.assertGreaterEqual(plot.ax_pos.get_xlim()[1], 20.0)
+        np.testing.assert_array_equal(plot.traj.get_xdata(), [0.0, 1e7, 2e7])
+        self.assertTrue(all(len(line.get_xdata()) == 3 for line, _ in plot.series))
+        plt.close(plot.fig)
+
+
+if __name__ == "__main__":
+    unittest.main()
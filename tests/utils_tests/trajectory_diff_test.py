@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from utils.trajectory_diff import (
+    POSITION_COLUMNS,
+    QUATERNION_COLUMNS,
+    TIME_COLUMN,
+    VELOCITY_COLUMNS,
+    attitude_error,
+    diff_runs,
+    interpolate,
+    main,
+)
+
+
+def circular_run(t: np.ndarray, radius: float = 7e6, angle_offset: float = 0.0) -> pd.DataFrame:
+    """A circular orbit, spinning about z with the orbital rate."""
+    rate = 1e-3
+    angle = rate * t + angle_offset
+    data = {TIME_COLUMN: t}
+    for column, values in zip(POSITION_COLUMNS, [radius * np.cos(angle), radius * np.sin(angle), 0 * t]):
+        data[column] = values
+    for column, values in zip(VELOCITY_COLUMNS, [-radius * rate * np.sin(angle), radius * rate * np.cos(angle), 0 * t]):
+        data[column] = values
+    for column, values in zip(QUATERNION_COLUMNS, [0 * t, 0 * t, np.sin(angle / 2), np.cos(angle / 2)]):
+        data[column] = values
+    return pd.DataFrame(data)
+
+
+class TrajectoryDiffTestCases(unittest.TestCase):
+    """
+    This class tests the alignment and error metrics of the trajectory diff tool.
+    """
+
+    def test_interpolate(self):
+        t = np.array([0.0, 1.0, 3.0])
+        values = np.array([[0.0, 1.0], [1.0, 1.0], [5.0, 0.0]])
+        np.testing.assert_allclose([[0.5, 1.0], [3.0, 0.5], [5.0, 0.0]], interpolate(t, values, np.array([0.5, 2.0, 3.0])))
+
+    def test_attitude_error(self):
+        q = np.array([[0.0, 0.0, np.sin(0.1), np.cos(0.1)]])
+        self.assertAlmostEqual(0.0, attitude_error(q, -q)[0])
+        self.assertAlmostEqual(0.2, attitude_error(q, np.array([[0.0, 0.0, 0.0, 1.0]]))[0])
+        self.assertEqual(0.0, attitude_error(np.zeros((1, 4)), np.zeros((1, 4)))[0])
+
+    def test_same_trajectory(self):
+        """
+        The same trajectory sampled on different grids only differs by the interpolation error.
+        """
+        golden = circular_run(np.arange(0.0, 100.0, 1.0))
+        run = circular_run(np.arange(0.0, 100.0, 0.3))
+        diff = diff_runs(golden, run)
+
+        self.assertEqual(0.0, diff.grid[0])
+        self.assertEqual(99.0, diff.grid[-1])
+        self.assertLess(diff.summary()["position"]["max"], 1.0)
+        self.assertEqual([], diff.exceeded({"position": 1.0, "velocity": 1e-3, "attitude": 1e-6}))
+
+    def test_offset_trajectory(self):
+        golden = circular_run(np.arange(0.0, 100.0, 1.0))
+        run = circular_run(np.arange(0.0, 100.0, 1.0), angle_offset=1e-6)
+        diff = diff_runs(golden, run, grid_step=10.0)
+
+        np.testing.assert_allclose(7.0, diff.position, rtol=1e-3)
+        np.testing.assert_allclose(1e-6, diff.attitude, rtol=1e-3)
+        self.assertEqual(["position"], diff.exceeded({"position": 1.0, "velocity": 1e-2, "attitude": 1e-5}))
+
+    def test_main(self):
+        t = np.arange(0.0, 50.0, 1.0)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            golden_path = os.path.join(tmp_dir, "golden.csv")
+            run_path = os.path.join(tmp_dir, "run.pkl")
+            circular_run(t).to_csv(golden_path)
+            circular_run(t, radius=7e6 + 10).to_pickle(run_path)
+
+            self.assertEqual(0, main([golden_path, golden_path]))
+            self.assertEqual(1, main([golden_path, run_path]))
+            self.assertEqual(0, main([golden_path, run_path, "--pos-tol", "20", "--vel-tol", "1"]))
+
+
+if __name__ == "__main__":
+    unittest.main()